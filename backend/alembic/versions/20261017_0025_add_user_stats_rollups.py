@@ -0,0 +1,46 @@
+"""add user stats rollups
+
+Revision ID: 20261017_0025
+Revises: 20260222_0024
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0025"
+down_revision: Union[str, None] = "20260222_0024"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are built lazily on the first unfiltered stats read for each user.
+    op.create_table(
+        "user_stats_rollups",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("topic", sa.String(length=50), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("score_sum", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("best_score", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_attempt_date", sa.Date(), nullable=True),
+        sa.Column("current_streak", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("recent_attempts", postgresql.JSONB(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "topic"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats_rollups")
@@ -0,0 +1,69 @@
+"""add user_question_state
+
+Revision ID: 20261017_0026
+Revises: 20261017_0025
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0026"
+down_revision: Union[str, None] = "20261017_0025"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_question_state",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("question_id", sa.UUID(), nullable=False),
+        sa.Column("is_correct", sa.Boolean(), nullable=False),
+        sa.Column("wrong_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_attempt_id", sa.UUID(), nullable=True),
+        sa.Column(
+            "last_seen_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["question_id"], ["questions.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["last_attempt_id"], ["quiz_attempts.id"], ondelete="SET NULL"
+        ),
+        sa.PrimaryKeyConstraint("user_id", "question_id"),
+    )
+    op.create_index(
+        "ix_user_question_state_user_correct_seen",
+        "user_question_state",
+        ["user_id", "is_correct", "last_seen_at"],
+    )
+    op.execute(
+        """
+        INSERT INTO user_question_state
+            (user_id, question_id, is_correct, wrong_count, last_attempt_id, last_seen_at)
+        SELECT DISTINCT ON (aa.user_id, aa.question_id)
+            aa.user_id,
+            aa.question_id,
+            aa.is_correct,
+            COUNT(*) FILTER (WHERE NOT aa.is_correct)
+                OVER (PARTITION BY aa.user_id, aa.question_id),
+            aa.attempt_id,
+            MAX(aa.created_at) OVER (PARTITION BY aa.user_id, aa.question_id)
+        FROM attempt_answers aa
+        JOIN quiz_attempts qa ON qa.id = aa.attempt_id
+        ORDER BY aa.user_id, aa.question_id, qa.created_at DESC, aa.created_at DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_user_question_state_user_correct_seen", table_name="user_question_state"
+    )
+    op.drop_table("user_question_state")
@@ -0,0 +1,39 @@
+"""unique attempt_answers per (attempt_id, question_id)
+
+Revision ID: 20261017_0027
+Revises: 20261017_0026
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0027"
+down_revision: Union[str, None] = "20261017_0026"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the newest row when an attempt recorded the same question twice.
+    op.execute(
+        """
+        DELETE FROM attempt_answers a
+        USING attempt_answers b
+        WHERE a.attempt_id = b.attempt_id
+          AND a.question_id = b.question_id
+          AND (a.created_at, a.id) < (b.created_at, b.id)
+        """
+    )
+    op.create_index(
+        "uq_attempt_answers_attempt_question",
+        "attempt_answers",
+        ["attempt_id", "question_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_attempt_answers_attempt_question", table_name="attempt_answers")
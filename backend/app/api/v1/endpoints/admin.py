@@ -3,10 +3,20 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache_stats
 from app.core.config import get_settings
+from app.core.jobs import job_stats
+from app.core.metrics import counter_stats, latency_stats
 from app.db.session import get_session
+from app.integrations.llm_registry import llm_registry_stats
 from app.repositories.user_repo import UserRepository
-from app.services.auth_service import get_current_user
+from app.services.auth_service import (
+    get_admin_user,
+    get_current_user,
+    invalidate_cached_user,
+)
+from app.services.hint_cache import hint_cache_stats
+from app.services.password_hashing import password_hasher_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 settings = get_settings()
@@ -32,9 +42,23 @@ async def bootstrap_admin(
     db_user.role = db_user.role or "admin"
     await session.commit()
     await session.refresh(db_user)
+    await invalidate_cached_user(db_user.id)
     return {
         "id": str(db_user.id),
         "email": db_user.email,
         "is_admin": db_user.is_admin,
         "role": db_user.role,
     }
+
+
+@router.get("/metrics")
+async def get_metrics(_admin=Depends(get_admin_user)) -> dict:
+    return {
+        "cache": cache_stats(),
+        "latency": latency_stats(),
+        "counters": counter_stats(),
+        "jobs": job_stats(),
+        "llm": llm_registry_stats(),
+        "hints": hint_cache_stats(),
+        "passwords": password_hasher_stats(),
+    }
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import logging
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field, model_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.cache import invalidate, invalidate_pattern
+from app.core.cache import invalidate
 from app.api.v1.endpoints.meta import META_CACHE_KEY
 from app.core.config import get_settings
 from app.db.session import get_session
@@ -21,6 +22,7 @@ from app.services.question_candidates_service import (
     get_candidate_by_id,
     list_candidates,
     publish_candidate,
+    publish_candidates_batch,
     reject_candidate,
     record_parse_failure,
     validate_candidate_by_id,
@@ -62,6 +64,11 @@ class QuestionCandidateUpdateRequest(BaseModel):
     payload_json: dict
 
 
+class QuestionCandidatePublishBatchRequest(BaseModel):
+    candidate_ids: list[UUID] = Field(min_length=1, max_length=200)
+    approve: bool = False
+
+
 @router.post("/generate")
 async def generate_question_candidates_endpoint(
     body: QuestionCandidateGenerateRequest,
@@ -69,7 +76,7 @@ async def generate_question_candidates_endpoint(
     session: AsyncSession = Depends(get_session),
 ) -> dict:
     settings = get_settings()
-    if not settings.GOOGLE_API_KEY:
+    if not settings.GOOGLE_API_KEY and not settings.GEMINI_QC_STUB:
         raise HTTPException(status_code=503, detail="Gemini not configured")
 
     topic = body.topic or "random"
@@ -80,45 +87,41 @@ async def generate_question_candidates_endpoint(
         "difficulty": body.difficulty,
         "qtype": qtype,
     }
+    created_ids: list[str] = []
+    failed = 0
 
-    try:
-        items = await generate_question_candidates_items(payload)
-    except CandidateParseError as exc:
-        logger.warning("question candidate parse failed: %s", exc)
-        await record_parse_failure(
+    async def persist_batch(items: list) -> None:
+        nonlocal failed
+        batch_ids, batch_failed = await create_candidates_from_items(
             session=session,
-            topic=topic,
-            difficulty=body.difficulty,
-            qtype=qtype,
-            raw_output=exc.raw_output,
-            error=str(exc),
+            items=items,
+            fallback_topic=topic,
+            fallback_difficulty=body.difficulty,
+            fallback_type=body.qtype,
             prompt_version=body.prompt_version,
             source_model=settings.GEMINI_QC_MODEL,
         )
-        return {"created": 0, "failed": 1, "candidate_ids": []}
+        created_ids.extend(batch_ids)
+        failed += batch_failed
+
+    try:
+        await generate_question_candidates_items(payload, on_batch=persist_batch)
     except Exception as exc:
         logger.warning("question candidate parse failed: %s", exc)
+        # A failed batch insert leaves the session mid-transaction; batches
+        # persisted before it are already committed.
+        await session.rollback()
         await record_parse_failure(
             session=session,
             topic=topic,
             difficulty=body.difficulty,
             qtype=qtype,
-            raw_output=None,
+            raw_output=exc.raw_output if isinstance(exc, CandidateParseError) else None,
             error=str(exc),
             prompt_version=body.prompt_version,
             source_model=settings.GEMINI_QC_MODEL,
         )
-        return {"created": 0, "failed": 1, "candidate_ids": []}
-
-    created_ids, failed = await create_candidates_from_items(
-        session=session,
-        items=items,
-        fallback_topic=topic,
-        fallback_difficulty=body.difficulty,
-        fallback_type=body.qtype,
-        prompt_version=body.prompt_version,
-        source_model=settings.GEMINI_QC_MODEL,
-    )
+        failed += 1
     return {"created": len(created_ids), "failed": failed, "candidate_ids": created_ids}
 
 
@@ -145,11 +148,12 @@ async def validate_question_candidates_batch(
     user=Depends(get_admin_user),
     session: AsyncSession = Depends(get_session),
 ) -> dict:
-    items = await validate_candidates_batch(session, limit)
+    items, timings = await validate_candidates_batch(session, limit)
     return {
         "validated": len([item for item in items if item.status == "validated"]),
         "failed": len([item for item in items if item.status == "failed"]),
         "candidate_ids": [str(item.id) for item in items],
+        "timings": timings,
     }
 
 
@@ -242,7 +246,6 @@ async def publish_question_candidate(
     if candidate.status != "published":
         raise HTTPException(status_code=400, detail="Candidate publish failed")
     await invalidate(META_CACHE_KEY)
-    await invalidate_pattern("quizstudy:qcount:*")
     return {
         "candidate": {
             "id": str(candidate.id),
@@ -253,6 +256,25 @@ async def publish_question_candidate(
     }
 
 
+@router.post("/publish-batch")
+async def publish_question_candidates_batch(
+    body: QuestionCandidatePublishBatchRequest,
+    user=Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session),
+) -> dict:
+    results = await publish_candidates_batch(
+        session, body.candidate_ids, user_id=user.id, approve=body.approve
+    )
+    published = [item for item in results if item.get("reason") is None]
+    if published:
+        await invalidate(META_CACHE_KEY)
+    return {
+        "published": len(published),
+        "created_question_ids": [item["question_id"] for item in published if item["created"]],
+        "results": results,
+    }
+
+
 @router.patch("/{candidate_id}")
 async def update_question_candidate(
     candidate_id: str,
@@ -7,14 +7,19 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
-from app.core.cache import cached, invalidate_pattern
+from app.api.v1.endpoints.jobs import to_job_out
+from app.core.cache import bump_generation, cached, namespaced_key
 from app.core.config import get_settings
+from app.core.jobs import enqueue, job_handler, llm_slot
+from app.db import session as db_session
 from app.db.session import get_session
 from app.integrations.ai_review_chain import generate_ai_review, normalize_next_quiz_difficulty
 from app.repositories.quiz_attempt_repo import QuizAttemptRepository
-from app.repositories.ai_recommendation_repo import AiRecommendationRepository
 from app.repositories.attempt_answer_repo import AttemptAnswerRepository
 from app.repositories.question_repo import QuestionRepository
+from app.repositories.user_stats_rollup_repo import UserStatsRollupRepository
+from app.services import attempt_service
+from app.services.question_bank import answer_keys, normalize_answer
 from app.schemas.attempts import (
     AiReviewResponse,
     AttemptAnswer,
@@ -26,6 +31,7 @@ from app.schemas.attempts import (
     AttemptStats,
     AttemptTopicStats,
 )
+from app.schemas.jobs import JobOut
 from app.utils.enums import QuestionType
 from app.utils.rate_limit import ai_review_rate_limiter
 from app.services.auth_service import get_current_user
@@ -34,6 +40,7 @@ router = APIRouter(prefix="/attempts", tags=["attempts"])
 logger = logging.getLogger(__name__)
 
 STATS_CACHE_TTL = 120
+STATS_CACHE_L1_TTL = 30
 
 
 def _to_out(attempt) -> AttemptOut:
@@ -60,7 +67,7 @@ def _to_out(attempt) -> AttemptOut:
 
 
 async def _recheck_exam_answers(
-    answers: list[AttemptAnswer], question_repo: QuestionRepository
+    answers: list[AttemptAnswer], session: AsyncSession
 ) -> tuple[int, list[dict]]:
     """Score exam answers server-side. Returns (correct_count, answers_payload)."""
     question_ids: list[UUID] = []
@@ -70,8 +77,8 @@ async def _recheck_exam_answers(
         except ValueError:
             continue
 
-    questions = await question_repo.get_by_ids(question_ids)
-    question_map = {str(q.id): q.correct_answer for q in questions}
+    keys = await answer_keys.get_many(session, question_ids)
+    question_map = {str(question_id): answer for question_id, answer in keys.items()}
 
     correct_count = 0
     answers_payload: list[dict] = []
@@ -80,7 +87,7 @@ async def _recheck_exam_answers(
         provided = item.selected_answer or ""
         is_correct = False
         if expected is not None:
-            is_correct = _normalize(expected) == _normalize(provided)
+            is_correct = expected == normalize_answer(provided)
         if is_correct:
             correct_count += 1
         answers_payload.append(
@@ -94,10 +101,6 @@ async def _recheck_exam_answers(
     return correct_count, answers_payload
 
 
-def _normalize(value: str) -> str:
-    return value.replace("\r\n", "\n").strip()
-
-
 def _format_question_block(
     question,
     answer: dict,
@@ -171,28 +174,22 @@ async def create_attempt(
     if not data.get("submitted_at") and data.get("finished_at"):
         data["submitted_at"] = datetime.now(timezone.utc)
     if body.mode == "exam":
-        question_repo = QuestionRepository(session)
         correct_count, answers_payload = await _recheck_exam_answers(
-            body.answers, question_repo
+            body.answers, session
         )
         data["correct_count"] = correct_count
         data["answers"] = answers_payload
     data["user_id"] = user.id
 
+    attempt = None
     if body.attempt_id:
         attempt = await repo.get_by_id(UUID(str(body.attempt_id)))
         if not attempt or attempt.user_id != user.id:
             raise HTTPException(status_code=404, detail="Attempt not found")
-        data.pop("attempt_id", None)
-        attempt = await repo.update_attempt(attempt, data)
-    else:
-        data.pop("attempt_id", None)
-        attempt = await repo.create_attempt(data)
-
-    answer_repo = AttemptAnswerRepository(session)
-    await answer_repo.replace_for_attempt(attempt.id, user.id, attempt.answers or [])
+    data.pop("attempt_id", None)
+    attempt = await attempt_service.save_attempt(session, attempt, data)
 
-    await invalidate_pattern(f"quizstudy:user:{user.id}:stats:*")
+    await bump_generation(attempt_service.stats_namespace(user.id))
 
     return _to_out(attempt)
 
@@ -257,9 +254,8 @@ async def submit_attempt(
         data["topic"] = attempt.topic or fallback
 
     if body.mode == "exam":
-        question_repo = QuestionRepository(session)
         correct_count, answers_payload = await _recheck_exam_answers(
-            body.answers, question_repo
+            body.answers, session
         )
         data["correct_count"] = correct_count
         data["answers"] = answers_payload
@@ -270,15 +266,9 @@ async def submit_attempt(
     if not data.get("finished_at"):
         data["finished_at"] = data["submitted_at"]
 
-    attempt = await repo.update_attempt(attempt, data)
+    attempt = await attempt_service.submit_attempt(session, attempt, data)
 
-    answer_repo = AttemptAnswerRepository(session)
-    await answer_repo.replace_for_attempt(attempt.id, user.id, attempt.answers or [])
-
-    recommendation_repo = AiRecommendationRepository(session)
-    await recommendation_repo.complete_by_attempt(user.id, attempt.id)
-
-    await invalidate_pattern(f"quizstudy:user:{user.id}:stats:*")
+    await bump_generation(attempt_service.stats_namespace(user.id))
 
     logger.info("attempt submitted %s at %s", attempt.id, attempt.submitted_at)
     return _to_out(attempt)
@@ -380,19 +370,27 @@ async def get_attempt_stats(
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> AttemptStats:
-    repo = QuizAttemptRepository(session)
-    cache_key = f"quizstudy:user:{user.id}:stats:{topics}:{mode}:{date_from}:{date_to}"
+    cache_key = await namespaced_key(
+        attempt_service.stats_namespace(user.id),
+        f"{topics}:{mode}:{date_from}:{date_to}",
+    )
 
-    stats = await cached(
-        cache_key,
-        STATS_CACHE_TTL,
-        lambda: repo.stats(
+    async def _fetch() -> dict:
+        if not topics and not mode and date_from is None and date_to is None:
+            return await UserStatsRollupRepository(session).stats(user.id)
+        return await QuizAttemptRepository(session).stats(
             user_id=user.id,
             topics=topics,
             mode=mode,
             date_from=date_from,
             date_to=date_to,
-        ),
+        )
+
+    stats = await cached(
+        cache_key,
+        STATS_CACHE_TTL,
+        _fetch,
+        l1_ttl=STATS_CACHE_L1_TTL,
     )
     return AttemptStats(
         total_attempts=stats["total_attempts"],
@@ -408,30 +406,7 @@ async def get_attempt_stats(
     )
 
 
-@router.get("/{attempt_id}/ai-review", response_model=AiReviewResponse)
-async def get_attempt_ai_review(
-    attempt_id: UUID,
-    generate: bool = Query(default=False),
-    user=Depends(get_current_user),
-    _rate_limiter=Depends(ai_review_rate_limiter),
-    session: AsyncSession = Depends(get_session),
-) -> AiReviewResponse:
-    settings = get_settings()
-    if not settings.GROQ_API_KEY:
-        raise HTTPException(status_code=503, detail="AI review not configured")
-
-    repo = QuizAttemptRepository(session)
-    attempt = await repo.get_by_id(attempt_id)
-    if not attempt or attempt.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Attempt not found")
-
-    if attempt.ai_review_json:
-        guarded = _apply_next_quiz_guard({**attempt.ai_review_json})
-        return AiReviewResponse(status="ready", **guarded)
-
-    if not generate:
-        return AiReviewResponse(status="not_generated", ai_review=None)
-
+async def _build_ai_review_payload(attempt, session: AsyncSession) -> dict:
     answers = attempt.answers or []
     question_ids: list[UUID] = []
     for item in answers:
@@ -487,8 +462,10 @@ async def get_attempt_ai_review(
         "mode": attempt.mode,
         "questions_compact_json": json.dumps(questions_compact, ensure_ascii=False),
     }
+    return payload
 
-    review_json = await generate_ai_review(payload)
+
+def _finalize_ai_review(review_json: dict[str, Any] | None) -> dict[str, Any]:
     review_json = {
         "headline": "",
         "score_line": "",
@@ -506,12 +483,82 @@ async def get_attempt_ai_review(
         if isinstance(item, dict) and (item.get("question_ref") or item.get("why"))
     ]
     review_json = _apply_next_quiz_guard(review_json)
+    return review_json
+
+
+async def _load_reviewable_attempt(attempt_id: UUID, user, session: AsyncSession):
+    settings = get_settings()
+    if not settings.GROQ_API_KEY:
+        raise HTTPException(status_code=503, detail="AI review not configured")
+
+    repo = QuizAttemptRepository(session)
+    attempt = await repo.get_by_id(attempt_id)
+    if not attempt or attempt.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Attempt not found")
+    return attempt
+
+
+@job_handler("ai_review")
+async def _ai_review_job(payload: dict) -> dict:
+    async with llm_slot():
+        review_json = await generate_ai_review(payload["prompt"])
+    review_json = _finalize_ai_review(review_json)
+    if review_json.get("status") == "error":
+        return AiReviewResponse(**review_json).model_dump()
+    async with db_session.AsyncSessionLocal() as session:
+        await QuizAttemptRepository(session).set_ai_review(
+            UUID(payload["attempt_id"]), review_json
+        )
+    return AiReviewResponse(status="ready", **review_json).model_dump()
+
+
+@router.get("/{attempt_id}/ai-review", response_model=AiReviewResponse)
+async def get_attempt_ai_review(
+    attempt_id: UUID,
+    generate: bool = Query(default=False),
+    user=Depends(get_current_user),
+    _rate_limiter=Depends(ai_review_rate_limiter),
+    session: AsyncSession = Depends(get_session),
+) -> AiReviewResponse:
+    attempt = await _load_reviewable_attempt(attempt_id, user, session)
+
+    if attempt.ai_review_json:
+        guarded = _apply_next_quiz_guard({**attempt.ai_review_json})
+        return AiReviewResponse(status="ready", **guarded)
+
+    if not generate:
+        return AiReviewResponse(status="not_generated", ai_review=None)
+
+    payload = await _build_ai_review_payload(attempt, session)
+    async with llm_slot():
+        review_json = await generate_ai_review(payload)
+    review_json = _finalize_ai_review(review_json)
     if review_json.get("status") == "error":
         return AiReviewResponse(**review_json)
-    await repo.set_ai_review(attempt_id, review_json)
+    await QuizAttemptRepository(session).set_ai_review(attempt_id, review_json)
     return AiReviewResponse(status="ready", **review_json)
 
 
+@router.post("/{attempt_id}/ai-review/jobs", response_model=JobOut, status_code=202)
+async def enqueue_attempt_ai_review(
+    attempt_id: UUID,
+    user=Depends(get_current_user),
+    _rate_limiter=Depends(ai_review_rate_limiter),
+    session: AsyncSession = Depends(get_session),
+) -> JobOut:
+    """Queue review generation; poll ``GET /jobs/{job_id}`` for the result."""
+    attempt = await _load_reviewable_attempt(attempt_id, user, session)
+    if attempt.ai_review_json:
+        raise HTTPException(status_code=409, detail="AI review already generated")
+    payload = await _build_ai_review_payload(attempt, session)
+    job = await enqueue(
+        "ai_review",
+        {"attempt_id": str(attempt_id), "prompt": payload},
+        user.id,
+    )
+    return to_job_out(job)
+
+
 @router.get("/{attempt_id}", response_model=AttemptOut)
 async def get_attempt(
     attempt_id: UUID,
@@ -10,40 +10,54 @@ from app.db.session import get_session
 from app.repositories.oauth_account_repo import OAuthAccountRepository
 from app.repositories.user_repo import UserRepository
 from app.schemas.auth import LoginRequest, RegisterRequest, TokenResponse, UserOut
-from app.core.redis_client import get_redis
 from app.services.auth_service import (
     build_user_out,
     clear_refresh_cookie,
     create_access_token,
     create_oauth_state,
     get_current_user,
-    hash_refresh_token,
+    get_user_cached,
     issue_refresh_token,
+    revoke_refresh_token,
     rotate_refresh_token,
     set_refresh_cookie,
     verify_oauth_state,
 )
 from app.core.config import get_settings
-from passlib.context import CryptContext
+from app.services.password_hashing import PasswordHasherBusy, get_password_hasher
 
 from app.utils.rate_limit import build_rate_limiter
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 auth_rate_limiter = build_rate_limiter(
+    "auth",
     user_times=5, user_seconds=300,
     anon_times=10, anon_seconds=600,
 )
 
 
-def _hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def _password_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="AUTH_BUSY",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _hash_password(password: str) -> str:
+    try:
+        return await get_password_hasher().hash(password)
+    except PasswordHasherBusy as exc:
+        raise _password_busy() from exc
 
 
-def _verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+async def _verify_password(password: str, password_hash: str) -> bool:
+    try:
+        return await get_password_hasher().verify(password, password_hash)
+    except PasswordHasherBusy as exc:
+        raise _password_busy() from exc
 
 
 def _oauth_configured(provider: str) -> None:
@@ -114,7 +128,8 @@ async def register(
     if existing:
         raise HTTPException(status_code=409, detail="EMAIL_TAKEN")
 
-    user = await repo.create(email=body.email.lower(), password_hash=_hash_password(body.password))
+    password_hash = await _hash_password(body.password)
+    user = await repo.create(email=body.email.lower(), password_hash=password_hash)
     refresh_token = await issue_refresh_token(session, user.id)
     set_refresh_cookie(response, refresh_token)
     access_token = create_access_token(str(user.id), user.email)
@@ -130,7 +145,11 @@ async def login(
 ) -> TokenResponse:
     repo = UserRepository(session)
     user = await repo.get_by_email(body.email.lower())
-    if not user or not user.password_hash or not _verify_password(body.password, user.password_hash):
+    if (
+        not user
+        or not user.password_hash
+        or not await _verify_password(body.password, user.password_hash)
+    ):
         raise HTTPException(status_code=401, detail="INVALID_CREDENTIALS")
 
     refresh_token = await issue_refresh_token(session, user.id)
@@ -150,8 +169,7 @@ async def refresh(
         raise HTTPException(status_code=401, detail="Missing refresh token")
 
     new_token, user_id = await rotate_refresh_token(session, refresh_token)
-    user_repo = UserRepository(session)
-    user = await user_repo.get_by_id(user_id)
+    user = await get_user_cached(session, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
@@ -168,13 +186,7 @@ async def logout(
 ) -> dict:
     refresh_token = request.cookies.get(settings.REFRESH_COOKIE_NAME)
     if refresh_token:
-        from app.repositories.refresh_token_repo import RefreshTokenRepository
-        repo = RefreshTokenRepository(session)
-        stored = await repo.get_by_hash(hash_refresh_token(refresh_token))
-        if stored:
-            await repo.revoke(stored.id)
-        redis = await get_redis()
-        await redis.delete(f"quizstudy:refresh:{hash_refresh_token(refresh_token)}")
+        await revoke_refresh_token(session, refresh_token)
 
     clear_refresh_cookie(response)
     return {"ok": True}
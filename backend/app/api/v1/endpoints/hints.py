@@ -1,18 +1,28 @@
+import json
 import logging
+import time
+from collections.abc import AsyncIterator
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.endpoints.jobs import to_job_out
 from app.core.config import get_settings
+from app.core.jobs import enqueue, job_handler, llm_slot
+from app.core.metrics import increment, record_latency
+from app.db import session as db_session
 from app.db.session import get_session
-from app.integrations.hint_chain import generate_hint
+from app.integrations.hint_chain import generate_hint, stream_hint
 from app.models.user import User
 from app.repositories.hint_usage_repo import HintUsageRepository
 from app.repositories.question_repo import QuestionRepository
 from app.repositories.quiz_attempt_repo import QuizAttemptRepository
 from app.schemas.hint import HintRequest, HintResponse
+from app.schemas.jobs import JobOut
 from app.services.auth_service import get_current_user
+from app.services.hint_cache import get_cached_hint, hint_cache_key, store_hint
 from app.utils.enums import QuestionType
 from app.utils.rate_limit import ai_hint_rate_limiter
 
@@ -20,18 +30,12 @@ from app.utils.rate_limit import ai_hint_rate_limiter
 router = APIRouter(prefix="/questions", tags=["hints"])
 logger = logging.getLogger(__name__)
 
-@router.post("/{question_id}/hint", response_model=HintResponse)
-async def hint(
+async def _load_hint_question(
+    session: AsyncSession,
     question_id: UUID,
     body: HintRequest,
-    user: User = Depends(get_current_user),
-    _rate_limiter=Depends(ai_hint_rate_limiter),
-    session: AsyncSession = Depends(get_session),
-) -> HintResponse:
-    settings = get_settings()
-    if not settings.GROQ_API_KEY:
-        raise HTTPException(status_code=503, detail="AI hints not configured")
-    
+    user: User,
+):
     if body.attempt_id:
         attempt_repo = QuizAttemptRepository(session)
         attempt = await attempt_repo.get_by_id(body.attempt_id)
@@ -46,12 +50,15 @@ async def hint(
     question = await repo.get_by_id(question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
+    return question
+
 
+def _build_hint_payload(question, body: HintRequest) -> dict:
     choices_text = ""
     if question.type == QuestionType.MCQ and question.choices:
         choices_text = "\n".join(f"{k}) {v}" for k, v in question.choices.items())
 
-    payload = {
+    return {
         "question_prompt": question.prompt,
         "question_type": question.type,
         "choices_text": choices_text,
@@ -59,18 +66,165 @@ async def hint(
         "level": body.level,
     }
 
-    hint_text = await generate_hint(payload)
 
+async def _record_hint_usage(
+    session: AsyncSession,
+    question_id: UUID,
+    body: HintRequest,
+) -> None:
     try:
         penalty_points = int(body.level)
         usage_repo = HintUsageRepository(session)
         await usage_repo.create_usage(
             attempt_id=body.attempt_id,
-            question_id=question.id,
+            question_id=question_id,
             level=body.level,
             penalty_points=penalty_points,
         )
     except Exception:
         logger.exception("Failed to log hint usage")
 
-    return HintResponse(hint=hint_text)
\ No newline at end of file
+
+async def _generate_cached_hint(cache_key: str | None, prompt: dict) -> str:
+    if cache_key is not None:
+        hint_text = await get_cached_hint(cache_key)
+        if hint_text is not None:
+            return hint_text
+    async with llm_slot():
+        hint_text = await generate_hint(prompt)
+    if cache_key is not None:
+        await store_hint(cache_key, hint_text)
+    return hint_text
+
+
+@job_handler("hint")
+async def _hint_job(payload: dict) -> dict:
+    body = HintRequest.model_validate(payload["body"])
+    question_id = UUID(payload["question_id"])
+    hint_text = await _generate_cached_hint(payload.get("cache_key"), payload["prompt"])
+    async with db_session.AsyncSessionLocal() as session:
+        await _record_hint_usage(session, question_id, body)
+    return HintResponse(hint=hint_text).model_dump()
+
+
+@router.post("/{question_id}/hint", response_model=HintResponse)
+async def hint(
+    question_id: UUID,
+    body: HintRequest,
+    user: User = Depends(get_current_user),
+    _rate_limiter=Depends(ai_hint_rate_limiter),
+    session: AsyncSession = Depends(get_session),
+) -> HintResponse:
+    settings = get_settings()
+    if not settings.GROQ_API_KEY:
+        raise HTTPException(status_code=503, detail="AI hints not configured")
+
+    question = await _load_hint_question(session, question_id, body, user)
+    payload = _build_hint_payload(question, body)
+    cache_key = await hint_cache_key(question, body.level, body.user_answer)
+    # Return the connection to the pool for the LLM call; the session opens a
+    # new one when usage is recorded.
+    await session.close()
+    hint_text = await _generate_cached_hint(cache_key, payload)
+
+    await _record_hint_usage(session, question.id, body)
+
+    return HintResponse(hint=hint_text)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _hint_events(
+    question_id: UUID,
+    body: HintRequest,
+    payload: dict,
+    cache_key: str,
+) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    hint_text = await get_cached_hint(cache_key)
+    if hint_text is not None:
+        record_latency("hints.stream.first_token", time.perf_counter() - started)
+        yield _sse("token", {"text": hint_text})
+    else:
+        parts: list[str] = []
+        try:
+            async with llm_slot():
+                async for chunk in stream_hint(payload):
+                    if not parts:
+                        record_latency(
+                            "hints.stream.first_token", time.perf_counter() - started
+                        )
+                    parts.append(chunk)
+                    yield _sse("token", {"text": chunk})
+        except Exception:
+            logger.exception("Hint stream failed for question %s", question_id)
+            increment("hints.stream.errors")
+            yield _sse("error", {"detail": "Hint generation failed"})
+            return
+        hint_text = "".join(parts)
+        await store_hint(cache_key, hint_text)
+
+    async with db_session.AsyncSessionLocal() as session:
+        await _record_hint_usage(session, question_id, body)
+    record_latency("hints.stream", time.perf_counter() - started)
+    yield _sse("done", {"hint": hint_text})
+
+
+@router.post("/{question_id}/hint/stream")
+async def stream_hint_events(
+    question_id: UUID,
+    body: HintRequest,
+    user: User = Depends(get_current_user),
+    _rate_limiter=Depends(ai_hint_rate_limiter),
+) -> StreamingResponse:
+    """Stream the hint as Server-Sent Events.
+
+    Emits ``token`` events with ``{"text": ...}`` as the LLM produces output,
+    then a single ``done`` event with the full hint once usage is recorded,
+    or an ``error`` event if generation fails midway. Access checks run before
+    the stream starts, so they still surface as regular HTTP errors. The
+    question is read in its own short session: a request-scoped one would
+    keep its connection checked out until the stream ends.
+    """
+    settings = get_settings()
+    if not settings.GROQ_API_KEY:
+        raise HTTPException(status_code=503, detail="AI hints not configured")
+
+    async with db_session.AsyncSessionLocal() as session:
+        question = await _load_hint_question(session, question_id, body, user)
+    payload = _build_hint_payload(question, body)
+    cache_key = await hint_cache_key(question, body.level, body.user_answer)
+    return StreamingResponse(
+        _hint_events(question.id, body, payload, cache_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{question_id}/hint/jobs", response_model=JobOut, status_code=202)
+async def enqueue_hint(
+    question_id: UUID,
+    body: HintRequest,
+    user: User = Depends(get_current_user),
+    _rate_limiter=Depends(ai_hint_rate_limiter),
+    session: AsyncSession = Depends(get_session),
+) -> JobOut:
+    """Queue hint generation; poll ``GET /jobs/{job_id}`` for the result."""
+    settings = get_settings()
+    if not settings.GROQ_API_KEY:
+        raise HTTPException(status_code=503, detail="AI hints not configured")
+
+    question = await _load_hint_question(session, question_id, body, user)
+    job = await enqueue(
+        "hint",
+        {
+            "question_id": str(question.id),
+            "body": body.model_dump(mode="json"),
+            "prompt": _build_hint_payload(question, body),
+            "cache_key": await hint_cache_key(question, body.level, body.user_answer),
+        },
+        user.id,
+    )
+    return to_job_out(job)
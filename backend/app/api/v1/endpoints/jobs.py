@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.jobs import get_job
+from app.schemas.jobs import JobOut
+from app.services.auth_service import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def to_job_out(job: dict) -> JobOut:
+    return JobOut(
+        id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        result=job.get("result"),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        finished_at=job.get("finished_at"),
+    )
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job_status(job_id: str, user=Depends(get_current_user)) -> JobOut:
+    job = await get_job(job_id)
+    if not job or job.get("user_id") != str(user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return to_job_out(job)
@@ -1,38 +1,42 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.cache import cached
 from app.core.config import get_settings
 from app.schemas.meta import MetaResponse, QuestionOptionsResponse
 from app.utils.enums import QuizMode
-from app.db.session import get_session
+from app.db import session as db_session
 from app.models.question import Question
 
 router = APIRouter(tags=["meta"])
 
 META_CACHE_KEY = "quizstudy:meta"
-META_CACHE_TTL = 300 
+META_CACHE_TTL = 3600
+META_CACHE_SOFT_TTL = 300
+META_CACHE_L1_TTL = 60
 
 
 @router.get("/meta", response_model=MetaResponse)
-async def get_meta(session: AsyncSession = Depends(get_session)) -> MetaResponse:
+async def get_meta() -> MetaResponse:
     settings = get_settings()
 
     async def _fetch() -> dict:
         topics = ["python_core", "big_o", "sql", "algorithms", "data_structures"]
         difficulties = ["junior", "middle"]
         try:
-            topics_result = await session.execute(select(Question.topic).distinct())
-            db_topics = sorted({str(row[0]) for row in topics_result.all() if row[0]})
-            if db_topics:
-                topics = db_topics
-            difficulties_result = await session.execute(select(Question.difficulty).distinct())
-            db_difficulties = sorted(
-                {str(row[0]) for row in difficulties_result.all() if row[0]}
-            )
-            if db_difficulties:
-                difficulties = db_difficulties
+            async with db_session.AsyncSessionLocal() as session:
+                topics_result = await session.execute(select(Question.topic).distinct())
+                db_topics = sorted({str(row[0]) for row in topics_result.all() if row[0]})
+                if db_topics:
+                    topics = db_topics
+                difficulties_result = await session.execute(
+                    select(Question.difficulty).distinct()
+                )
+                db_difficulties = sorted(
+                    {str(row[0]) for row in difficulties_result.all() if row[0]}
+                )
+                if db_difficulties:
+                    difficulties = db_difficulties
         except Exception:
             pass
         return {
@@ -43,7 +47,13 @@ async def get_meta(session: AsyncSession = Depends(get_session)) -> MetaResponse
             "maxQuestionsPerQuiz": settings.MAX_QUESTIONS_PER_QUIZ,
         }
 
-    data = await cached(META_CACHE_KEY, META_CACHE_TTL, _fetch)
+    data = await cached(
+        META_CACHE_KEY,
+        META_CACHE_TTL,
+        _fetch,
+        soft_ttl=META_CACHE_SOFT_TTL,
+        l1_ttl=META_CACHE_L1_TTL,
+    )
     return MetaResponse(**data)
 
 
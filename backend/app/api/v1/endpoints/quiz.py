@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 
+from app.core.cache import bump_generation
 from app.db.session import get_session
 from app.schemas.quiz import QuizGenerateRequest, QuizGenerateResponse, QuizQuestionOut
 from app.services.quiz_service import QuizService
@@ -10,6 +11,7 @@ from app.core.exceptions import InsufficientQuestionsError
 from app.utils.enums import AttemptType, Difficulty, QuizMode, Topic
 from app.repositories.quiz_attempt_repo import QuizAttemptRepository
 from app.repositories.question_repo import QuestionRepository
+from app.services import attempt_service
 from app.services.auth_service import get_current_user
 
 router = APIRouter(prefix="/quiz")
@@ -118,7 +120,8 @@ async def generate_quiz(
             question_ids_str = [str(item.id) for item in response.questions]
             topic_value, meta = _build_meta(topics, question_ids_str)
             if existing:
-                attempt = await attempt_repo.update_attempt(
+                attempt = await attempt_service.save_attempt(
+                    session,
                     existing,
                     {
                         "topic": topic_value,
@@ -133,6 +136,7 @@ async def generate_quiz(
                         "started_at": existing.started_at or datetime.now(timezone.utc),
                     },
                 )
+                await bump_generation(attempt_service.stats_namespace(user.id))
             else:
                 attempt = await attempt_repo.create_attempt(
                     {
@@ -164,7 +168,9 @@ async def generate_quiz(
             attempt = await attempt_repo.get_by_id(attempt_id)
             if not attempt or attempt.user_id != user.id:
                 raise HTTPException(status_code=404, detail="Attempt not found")
-            attempt = await attempt_repo.update_attempt(
+            # Reusing a submitted attempt changes what the stats rollup counted.
+            attempt = await attempt_service.save_attempt(
+                session,
                 attempt,
                 {
                     "topic": topic_value,
@@ -179,6 +185,7 @@ async def generate_quiz(
                     "started_at": attempt.started_at or datetime.now(timezone.utc),
                 },
             )
+            await bump_generation(attempt_service.stats_namespace(user.id))
         else:
             attempt = await attempt_repo.create_attempt(
                 {
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from typing import Any
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.endpoints.jobs import to_job_out
 from app.core.config import get_settings
+from app.core.jobs import enqueue, job_handler, llm_slot
+from app.db import session as db_session
 from app.db.session import get_session
 from pydantic import ValidationError
 
@@ -19,6 +23,7 @@ from app.schemas.recommendations import (
     NextQuizRecommendationGenerateInput,
     NextQuizRecommendationGenerated,
 )
+from app.schemas.jobs import JobOut
 from app.services.auth_service import get_current_user
 from app.utils.rate_limit import ai_coach_rate_limiter
 
@@ -114,12 +119,7 @@ async def get_next_quiz_recommendation(
     )
 
 
-@router.post("/next-quiz/generate", response_model=NextQuizRecommendationGenerated)
-async def generate_next_quiz_recommendation_endpoint(
-    user=Depends(get_current_user),
-    _rate_limiter=Depends(ai_coach_rate_limiter),
-    session: AsyncSession = Depends(get_session),
-) -> NextQuizRecommendationGenerated:
+async def _prepare_next_quiz_payload(user, session: AsyncSession) -> tuple[dict, dict]:
     settings = get_settings()
     if not settings.GROQ_API_KEY:
         raise HTTPException(status_code=503, detail="AI recommendation not configured")
@@ -127,13 +127,20 @@ async def generate_next_quiz_recommendation_endpoint(
     repo = QuizAttemptRepository(session)
     attempts = await repo.list_attempts(user_id=user.id, limit=20, offset=0)
     base, context = _build_base_recommendation(attempts)
-    ai_payload = await generate_next_quiz_recommendation(
-        {
-            **base,
-            "context": context,
-            "allowed_topics": "python_core, big_o, algorithms, data_structures, mixed",
-        }
-    )
+    prompt = {
+        **base,
+        "context": context,
+        "allowed_topics": "python_core, big_o, algorithms, data_structures, mixed",
+    }
+    return base, prompt
+
+
+async def _store_next_quiz_recommendation(
+    session: AsyncSession,
+    user_id,
+    base: dict,
+    ai_payload: dict,
+) -> NextQuizRecommendationGenerated:
     merged = {
         **base,
         "topic": ai_payload.get("topic") or base["topic"],
@@ -162,7 +169,7 @@ async def generate_next_quiz_recommendation_endpoint(
 
     recommendation_repo = AiRecommendationRepository(session)
     stored = await recommendation_repo.create_active(
-        user_id=user.id,
+        user_id=user_id,
         topic=topic,
         difficulty=difficulty,
         size=size,
@@ -184,6 +191,48 @@ async def generate_next_quiz_recommendation_endpoint(
     )
 
 
+@job_handler("next_quiz")
+async def _next_quiz_job(payload: dict) -> dict:
+    async with llm_slot():
+        ai_payload = await generate_next_quiz_recommendation(payload["prompt"])
+    async with db_session.AsyncSessionLocal() as session:
+        generated = await _store_next_quiz_recommendation(
+            session, UUID(payload["user_id"]), payload["base"], ai_payload
+        )
+    return generated.model_dump()
+
+
+@router.post("/next-quiz/generate", response_model=NextQuizRecommendationGenerated)
+async def generate_next_quiz_recommendation_endpoint(
+    user=Depends(get_current_user),
+    _rate_limiter=Depends(ai_coach_rate_limiter),
+    session: AsyncSession = Depends(get_session),
+) -> NextQuizRecommendationGenerated:
+    base, prompt = await _prepare_next_quiz_payload(user, session)
+    # Return the connection to the pool for the LLM call; the session opens a
+    # new one to store the result.
+    await session.close()
+    async with llm_slot():
+        ai_payload = await generate_next_quiz_recommendation(prompt)
+    return await _store_next_quiz_recommendation(session, user.id, base, ai_payload)
+
+
+@router.post("/next-quiz/generate/jobs", response_model=JobOut, status_code=202)
+async def enqueue_next_quiz_recommendation(
+    user=Depends(get_current_user),
+    _rate_limiter=Depends(ai_coach_rate_limiter),
+    session: AsyncSession = Depends(get_session),
+) -> JobOut:
+    """Queue recommendation generation; poll ``GET /jobs/{job_id}`` for the result."""
+    base, prompt = await _prepare_next_quiz_payload(user, session)
+    job = await enqueue(
+        "next_quiz",
+        {"user_id": str(user.id), "base": base, "prompt": prompt},
+        user.id,
+    )
+    return to_job_out(job)
+
+
 @router.post("/{recommendation_id}/start")
 async def start_recommendation_quiz(
     recommendation_id: str,
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from app.api.v1.endpoints.health import router as health_router
 from app.api.v1.endpoints.hints import router as hints_router
+from app.api.v1.endpoints.jobs import router as jobs_router
 from app.api.v1.endpoints.meta import router as meta_router
 from app.api.v1.endpoints.attempts import router as attempts_router
 from app.api.v1.endpoints.auth import router as auth_router
@@ -22,6 +23,7 @@ api_router.include_router(hints_router)
 api_router.include_router(attempts_router)
 api_router.include_router(quiz_router, tags=["quiz"])
 api_router.include_router(recommendations_router)
+api_router.include_router(jobs_router)
 api_router.include_router(admin_question_candidates_router)
 api_router.include_router(admin_questions_router)
 api_router.include_router(admin_router)
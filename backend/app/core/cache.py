@@ -1,47 +1,388 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import secrets
+import time
+from collections import OrderedDict
 from typing import Any, Awaitable, Callable
 
-from app.core.redis_client import get_redis
+from app.core.config import get_settings
+from app.core.redis_client import get_redis, get_redis_real
 
 logger = logging.getLogger(__name__)
 
+LOCK_TTL_SECONDS = 5
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_INTERVAL = 0.05
+INVALIDATION_CHANNEL = "quizstudy:cache:invalidate"
+LISTENER_RETRY_SECONDS = 5
+GENERATION_TTL_SECONDS = 7 * 24 * 3600
+GENERATION_L1_TTL = 30
+
+_CACHED_AT = "__cached_at"
+
+# Deletes the lock only while it still holds our token, so an expired lock
+# that another worker has since taken is left alone.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_MISSING = object()
+
+
+class LocalCache:
+    """Size-bounded LRU kept per worker in front of Redis.
+
+    Entries carry their own expiry so a missed pub/sub invalidation can only
+    leave a value stale for its L1 TTL.  Values are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[Any, float | None, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> tuple[Any, float | None] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, cached_at, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value, cached_at
+
+    def set(self, key: str, value: Any, cached_at: float | None, ttl: int) -> None:
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self._data[key] = (value, cached_at, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def pop_pattern(self, pattern: str) -> None:
+        for key in [k for k in self._data if _match_glob(pattern, k)]:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+_l1: LocalCache | None = None
+_local_caches: list[LocalCache] = []
+_listener_task: asyncio.Task | None = None
+
+_inflight: dict[str, asyncio.Future] = {}
+_refreshing: set[str] = set()
+_background_tasks: set[asyncio.Task] = set()
+_stats: dict[str, int] = {
+    "l1_hits": 0,
+    "hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "stale": 0,
+    "refreshes": 0,
+    "lock_waits": 0,
+    "invalidations_received": 0,
+}
+
+
+def register_local_cache(local: LocalCache) -> LocalCache:
+    """Have ``invalidate`` and pub/sub invalidations also evict from ``local``.
+
+    For per-worker caches kept outside the shared L1, e.g. auth lookups that
+    must not compete with response caches for L1 slots.
+    """
+    if local not in _local_caches:
+        _local_caches.append(local)
+    return local
+
+
+def _get_l1() -> LocalCache:
+    global _l1
+    if _l1 is None:
+        _l1 = register_local_cache(LocalCache(get_settings().CACHE_L1_MAX_ENTRIES))
+    return _l1
+
+
+def cache_stats() -> dict[str, int]:
+    return {**_stats, "l1_size": len(_get_l1())}
+
 
 async def cached(
     key: str,
     ttl: int,
     fetch_fn: Callable[[], Awaitable[Any]],
+    soft_ttl: int | None = None,
+    l1_ttl: int | None = None,
 ) -> Any:
+    """Read-through cache with per-key single-flight.
+
+    Concurrent misses for ``key`` in this worker share one ``fetch_fn`` call, and
+    a short Redis lock keeps other workers from fetching at the same time.  With
+    ``soft_ttl`` the value is kept for ``ttl`` seconds but refreshed in the
+    background once it is older than ``soft_ttl``; stale values are served
+    meanwhile.  ``fetch_fn`` must not depend on request-scoped resources (such as
+    the request's DB session) when ``soft_ttl`` is used.
+
+    With ``l1_ttl`` the decoded value is also kept in this worker's L1 for up to
+    that many seconds, so repeated reads skip Redis entirely.
+    """
+    if l1_ttl is not None:
+        local = _get_l1().get(key)
+        if local is not None:
+            value, cached_at = local
+            _stats["l1_hits"] += 1
+            if _is_stale(cached_at, soft_ttl):
+                _stats["stale"] += 1
+                _schedule_refresh(key, ttl, fetch_fn, soft_ttl, l1_ttl)
+            return value
+
     redis = await get_redis()
-    raw = await redis.get(key)
-    if raw is not None:
+    value, cached_at = _decode(key, await redis.get(key))
+    if value is not _MISSING:
+        if l1_ttl is not None:
+            _get_l1().set(key, value, cached_at, min(l1_ttl, ttl))
+        if _is_stale(cached_at, soft_ttl):
+            _stats["stale"] += 1
+            _schedule_refresh(key, ttl, fetch_fn, soft_ttl, l1_ttl)
+        else:
+            _stats["hits"] += 1
+        return value
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        _stats["coalesced"] += 1
         try:
-            return json.loads(raw)
-        except (json.JSONDecodeError, TypeError):
-            logger.warning("Bad cache payload for key=%s – refetching", key)
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # The leader's request went away. Unless this request is being
+            # cancelled too, start over: the first waiter back becomes leader
+            # and the rest coalesce on it or read what it stored.
+            task = asyncio.current_task()
+            if not pending.cancelled() or (task is not None and task.cancelling()):
+                raise
+        return await cached(key, ttl, fetch_fn, soft_ttl, l1_ttl)
 
-    result = await fetch_fn()
+    _stats["misses"] += 1
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
     try:
-        await redis.set(key, json.dumps(result, default=str), ex=ttl)
+        result = await _load(redis, key, ttl, fetch_fn, soft_ttl, l1_ttl)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+def _is_stale(cached_at: float | None, soft_ttl: int | None) -> bool:
+    if soft_ttl is None or cached_at is None:
+        return False
+    return time.time() - cached_at >= soft_ttl
+
+
+def _decode(key: str, raw: str | bytes | None) -> tuple[Any, float | None]:
+    if raw is None:
+        return _MISSING, None
+    try:
+        payload = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        logger.warning("Bad cache payload for key=%s – refetching", key)
+        return _MISSING, None
+    if isinstance(payload, dict) and set(payload) == {_CACHED_AT, "value"}:
+        return payload["value"], float(payload[_CACHED_AT])
+    return payload, None
+
+
+async def _store(
+    redis,
+    key: str,
+    ttl: int,
+    result: Any,
+    soft_ttl: int | None,
+    l1_ttl: int | None,
+) -> None:
+    cached_at = time.time() if soft_ttl is not None else None
+    payload = {_CACHED_AT: cached_at, "value": result} if soft_ttl is not None else result
+    if l1_ttl is not None:
+        _get_l1().set(key, result, cached_at, min(l1_ttl, ttl))
+    try:
+        await redis.set(key, json.dumps(payload, default=str), ex=ttl)
     except Exception:
         logger.warning("Failed to write cache key=%s", key, exc_info=True)
+
+
+async def _acquire_lock(redis, lock_key: str) -> str | None:
+    token = secrets.token_hex(8)
+    try:
+        acquired = await redis.set(lock_key, token, ex=LOCK_TTL_SECONDS, nx=True)
+    except Exception:
+        logger.warning("Failed to take cache lock=%s", lock_key, exc_info=True)
+        return token
+    return token if acquired else None
+
+
+async def _release_lock(redis, lock_key: str, token: str) -> None:
+    try:
+        if hasattr(redis, "eval"):
+            await redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        elif await redis.get(lock_key) == token:
+            await redis.delete(lock_key)
+    except Exception:
+        logger.warning("Failed to release cache lock=%s", lock_key, exc_info=True)
+
+
+async def _wait_for_peer(redis, key: str) -> Any:
+    """Poll for the value another worker is computing under the lock."""
+    _stats["lock_waits"] += 1
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value, _ = _decode(key, await redis.get(key))
+        if value is not _MISSING:
+            return value
+    return _MISSING
+
+
+async def _load(
+    redis,
+    key: str,
+    ttl: int,
+    fetch_fn: Callable[[], Awaitable[Any]],
+    soft_ttl: int | None,
+    l1_ttl: int | None,
+) -> Any:
+    lock_key = f"{key}:lock"
+    token = await _acquire_lock(redis, lock_key)
+    if token is None:
+        value = await _wait_for_peer(redis, key)
+        if value is not _MISSING:
+            return value
+    try:
+        result = await fetch_fn()
+        await _store(redis, key, ttl, result, soft_ttl, l1_ttl)
+    finally:
+        if token is not None:
+            await _release_lock(redis, lock_key, token)
     return result
 
 
+def _schedule_refresh(
+    key: str,
+    ttl: int,
+    fetch_fn: Callable[[], Awaitable[Any]],
+    soft_ttl: int | None,
+    l1_ttl: int | None,
+) -> None:
+    if key in _refreshing or key in _inflight:
+        return
+    _refreshing.add(key)
+    task = asyncio.create_task(_refresh(key, ttl, fetch_fn, soft_ttl, l1_ttl))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _refresh(
+    key: str,
+    ttl: int,
+    fetch_fn: Callable[[], Awaitable[Any]],
+    soft_ttl: int | None,
+    l1_ttl: int | None,
+) -> None:
+    lock_key = f"{key}:lock"
+    try:
+        redis = await get_redis()
+        token = await _acquire_lock(redis, lock_key)
+        if token is None:
+            return
+        try:
+            result = await fetch_fn()
+            await _store(redis, key, ttl, result, soft_ttl, l1_ttl)
+            _stats["refreshes"] += 1
+        finally:
+            await _release_lock(redis, lock_key, token)
+    except Exception:
+        logger.warning("Background refresh failed for key=%s", key, exc_info=True)
+    finally:
+        _refreshing.discard(key)
+
+
+async def namespaced_key(namespace: str, suffix: str) -> str:
+    """Build a cache key under the namespace's current generation.
+
+    Bumping the generation orphans every key built before it in O(1); the old
+    entries are never deleted and simply expire by their own TTL.
+    """
+    return f"{namespace}:g{await get_generation(namespace)}:{suffix}"
+
+
+async def get_generation(namespace: str) -> int:
+    gen_key = f"{namespace}:gen"
+    local = _get_l1().get(gen_key)
+    if local is not None:
+        return local[0]
+    redis = await get_redis()
+    raw = await redis.get(gen_key)
+    try:
+        generation = int(raw) if raw is not None else 0
+    except (TypeError, ValueError):
+        generation = 0
+    _get_l1().set(gen_key, generation, None, GENERATION_L1_TTL)
+    return generation
+
+
+async def bump_generation(namespace: str) -> int | None:
+    gen_key = f"{namespace}:gen"
+    _get_l1().pop(gen_key)
+    redis = await get_redis()
+    try:
+        generation = await redis.incr(gen_key)
+        # Outlives every entry keyed under it, so a reset to 0 cannot revive one.
+        await redis.expire(gen_key, GENERATION_TTL_SECONDS)
+    except Exception:
+        logger.warning("Failed to bump cache generation=%s", gen_key, exc_info=True)
+        return None
+    await _publish_invalidation({"keys": [gen_key]})
+    return generation
+
+
 async def invalidate(*keys: str) -> None:
     if not keys:
         return
+    for key in keys:
+        for local in _local_caches:
+            local.pop(key)
     redis = await get_redis()
     for key in keys:
         try:
             await redis.delete(key)
         except Exception:
             logger.warning("Failed to invalidate key=%s", key, exc_info=True)
+    await _publish_invalidation({"keys": list(keys)})
 
 
 async def invalidate_pattern(pattern: str) -> None:
+    for local in _local_caches:
+        local.pop_pattern(pattern)
     redis = await get_redis()
 
     if hasattr(redis, "_data"):
@@ -65,6 +406,81 @@ async def invalidate_pattern(pattern: str) -> None:
         logger.warning(
             "Failed to invalidate pattern=%s (deleted %d)", pattern, deleted, exc_info=True,
         )
+    await _publish_invalidation({"pattern": pattern})
+
+
+async def _publish_invalidation(message: dict[str, Any]) -> None:
+    redis = await get_redis()
+    if not hasattr(redis, "publish"):
+        return
+    try:
+        await redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+    except Exception:
+        logger.warning("Failed to publish cache invalidation %s", message, exc_info=True)
+
+
+def _apply_invalidation(raw: str) -> None:
+    try:
+        message = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        logger.warning("Bad cache invalidation message: %r", raw)
+        return
+    _stats["invalidations_received"] += 1
+    pattern = message.get("pattern")
+    for local in _local_caches:
+        for key in message.get("keys") or []:
+            local.pop(key)
+        if pattern:
+            local.pop_pattern(pattern)
+
+
+async def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            redis = await get_redis_real()
+        except Exception:
+            redis = None
+        if redis is None:
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+            continue
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were not subscribed is lost.
+            for local in _local_caches:
+                local.clear()
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _apply_invalidation(message.get("data"))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Cache invalidation listener failed; resubscribing", exc_info=True)
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+async def start_invalidation_listener() -> None:
+    global _listener_task
+    if _listener_task is not None or _get_l1().max_entries <= 0:
+        return
+    _listener_task = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
 
 
 def _match_glob(pattern: str, key: str) -> bool:
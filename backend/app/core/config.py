@@ -20,7 +20,16 @@ class Settings(BaseSettings):
     JWT_PRIVATE_KEY_PATH: str = Field(default="/run/secrets/jwt_private.pem")
     JWT_PUBLIC_KEY_PATH: str = Field(default="/run/secrets/jwt_public.pem")
     ACCESS_TOKEN_EXPIRES_MIN: int = Field(default=15)
+    AUTH_TOKEN_CACHE_SECONDS: int = Field(default=300)
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = Field(default=10000)
+    AUTH_USER_CACHE_SECONDS: int = Field(default=30)
+    AUTH_USER_CACHE_MAX_ENTRIES: int = Field(default=10000)
+    PASSWORD_HASH_WORKERS: int = Field(default=2)
+    PASSWORD_HASH_MAX_QUEUE: int = Field(default=32)
     REFRESH_TOKEN_EXPIRES_DAYS: int = Field(default=14)
+    REFRESH_TOKEN_FLUSH_SECONDS: float = Field(default=1.0)
+    REFRESH_TOKEN_FLUSH_BATCH: int = Field(default=500)
+    REFRESH_TOKEN_COMPACT_SECONDS: int = Field(default=3600)
     ALLOW_CREDENTIALS: bool = Field(default=True)
     REFRESH_COOKIE_NAME: str = Field(default="refresh_token")
     REFRESH_COOKIE_SECURE: bool = Field(default=False)
@@ -29,23 +38,48 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str | None = Field(default=None)
     GOOGLE_REDIRECT_URI: str | None = Field(default=None)
     GOOGLE_API_KEY: str | None = Field(default=None)
+    GEMINI_API_BASE: str | None = Field(default=None)
     GEMINI_QC_MODEL: str = Field(default="gemini-3-flash-preview")
     GEMINI_QC_TEMPERATURE: float = Field(default=0.4)
     GEMINI_QC_MAX_OUTPUT_TOKENS: int = Field(default=12000)
+    GEMINI_QC_BATCH_SIZE: int = Field(default=20)
+    GEMINI_QC_FANOUT: int = Field(default=4)
+    GEMINI_QC_MAX_RETRIES: int = Field(default=3)
+    GEMINI_QC_RETRY_BACKOFF_SECONDS: float = Field(default=1.0)
+    GEMINI_QC_STREAM_FLUSH_ITEMS: int = Field(default=5)
+    GEMINI_QC_STUB: bool = Field(default=False)
+    GEMINI_QC_STUB_LATENCY_SECONDS: float = Field(default=0.5)
     GITHUB_CLIENT_ID: str | None = Field(default=None)
     GITHUB_CLIENT_SECRET: str | None = Field(default=None)
     GITHUB_REDIRECT_URI: str | None = Field(default=None)
     DEFAULT_QUIZ_SIZE: int = Field(default=10)
     MAX_QUESTIONS_PER_QUIZ: int = Field(default=15)
+    QUESTION_BANK_REFRESH_SECONDS: int = Field(default=300)
     REDIS_URL: str = Field(default="redis://redis:6379/0")
+    CACHE_L1_MAX_ENTRIES: int = Field(default=2048)
     GROQ_API_KEY: str | None = Field(default=None)
+    GROQ_API_BASE: str | None = Field(default=None)
     GROQ_MODEL: str = Field(default="openai/gpt-oss-120b")
     GROQ_TEMPERATURE: float = Field(default=0.4)
     GROQ_HINT_MAX_TOKENS: int = Field(default=180)
     GROQ_REVIEW_TEMPERATURE: float = Field(default=0.4)
     GROQ_REVIEW_MAX_TOKENS: int = Field(default=800)
+    HINT_CACHE_VARIANTS: int = Field(default=3)
+    HINT_CACHE_TTL_SECONDS: int = Field(default=7 * 24 * 3600)
+    SIMHASH_NEAR_DUP_DISTANCE: int = Field(default=3)
+    SANDBOX_POOL_SIZE: int = Field(default=4)
+    SANDBOX_MAX_RUNS_PER_WORKER: int = Field(default=1)
+    JOB_WORKERS: int = Field(default=4)
+    JOB_RESULT_TTL_SECONDS: int = Field(default=3600)
+    JOB_TIMEOUT_SECONDS: int = Field(default=300)
+    LLM_MAX_CONCURRENCY: int = Field(default=4)
+    LLM_SLOT_LEASE_SECONDS: int = Field(default=120)
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(default=20)
+    LLM_HTTP_TIMEOUT_SECONDS: float = Field(default=60.0)
     ADMIN_EMAILS: list[str] = Field(default=[])
     TRUSTED_PROXY_IPS: set[str] = Field(default_factory=set)
+    RATE_LIMIT_LOCAL_BATCH: int = Field(default=10)
+    RATE_LIMIT_LOCAL_LEASE_SECONDS: float = Field(default=1.0)
     ENV: str = Field(default="prod")
 
     model_config = SettingsConfigDict(
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.metrics import increment, timed
+from app.core.redis_client import get_redis, get_redis_real
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY_PREFIX = "quizstudy:job:"
+QUEUE_KEY = "quizstudy:jobs:queue"
+PROCESSING_KEY = "quizstudy:jobs:processing"
+POLL_TIMEOUT_SECONDS = 1
+REQUEUE_INTERVAL_SECONDS = 30
+MAX_JOB_RUNS = 3
+LLM_SLOTS_KEY = "quizstudy:llm:slots"
+LLM_SLOT_POLL_SECONDS = 0.05
+# Shown to clients instead of the exception text, which can leak upstream
+# API errors or SQL; the traceback is logged.
+JOB_FAILED_MESSAGE = "The job failed. Please try again."
+
+# KEYS: processing list, queue. ARGV: job id. Moves the job back to the queue
+# unless another worker already did.
+_REQUEUE_SCRIPT = """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 1 then
+  redis.call('RPUSH', KEYS[2], ARGV[1])
+  return 1
+end
+return 0
+"""
+
+# Global LLM slots are leases in a sorted set scored by expiry (Redis clock,
+# ms). KEYS: slots key. ARGV: limit, lease id, lease length (ms).
+_ACQUIRE_SLOT_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# KEYS: slots key. ARGV: lease id, lease length (ms). Extends a held lease.
+_RENEW_SLOT_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+if redis.call('ZADD', KEYS[1], 'XX', 'CH', now + tonumber(ARGV[2]), ARGV[1]) == 1 then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  return 1
+end
+return 0
+"""
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+
+_handlers: dict[str, JobHandler] = {}
+_local_queue: asyncio.Queue[str] | None = None
+_workers: list[asyncio.Task] = []
+_requeue_task: asyncio.Task | None = None
+_llm_semaphore: asyncio.Semaphore | None = None
+
+
+class UnknownJobKind(ValueError):
+    pass
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register ``func`` as the handler for jobs of ``kind``.
+
+    Handlers receive the enqueued payload and return a JSON-serializable
+    result. They must open their own DB sessions.
+    """
+
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def _local_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(get_settings().LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+
+async def _acquire_global_slot(redis, lease_id: str) -> bool:
+    """Wait for a cluster-wide LLM slot; ``False`` if Redis failed meanwhile."""
+    settings = get_settings()
+    lease_ms = settings.LLM_SLOT_LEASE_SECONDS * 1000
+    waited = False
+    while True:
+        try:
+            acquired = await redis.eval(
+                _ACQUIRE_SLOT_SCRIPT,
+                1,
+                LLM_SLOTS_KEY,
+                settings.LLM_MAX_CONCURRENCY,
+                lease_id,
+                lease_ms,
+            )
+        except Exception:
+            logger.warning("Global LLM slot unavailable; using local limit", exc_info=True)
+            increment("jobs.llm_slots.degraded")
+            return False
+        if acquired:
+            return True
+        if not waited:
+            waited = True
+            increment("jobs.llm_waits")
+        await asyncio.sleep(LLM_SLOT_POLL_SECONDS)
+
+
+async def _renew_global_slot(redis, lease_id: str) -> None:
+    lease_seconds = get_settings().LLM_SLOT_LEASE_SECONDS
+    while True:
+        await asyncio.sleep(lease_seconds / 3)
+        try:
+            await redis.eval(
+                _RENEW_SLOT_SCRIPT, 1, LLM_SLOTS_KEY, lease_id, lease_seconds * 1000
+            )
+        except Exception:
+            logger.warning("Failed to renew LLM slot %s", lease_id, exc_info=True)
+
+
+@asynccontextmanager
+async def llm_slot() -> AsyncIterator[None]:
+    """Bound the number of concurrent LLM calls across all workers.
+
+    Each call holds a lease in a Redis sorted set, renewed while held, so a
+    crashed worker's slots expire after ``LLM_SLOT_LEASE_SECONDS``. The
+    per-process semaphore is always taken as well and is the only bound
+    while Redis is unavailable.
+    """
+    semaphore = _local_llm_semaphore()
+    if semaphore.locked():
+        increment("jobs.llm_waits")
+    async with semaphore:
+        redis = await get_redis_real()
+        lease_id = uuid.uuid4().hex
+        held = redis is not None and await _acquire_global_slot(redis, lease_id)
+        renewer = asyncio.create_task(_renew_global_slot(redis, lease_id)) if held else None
+        try:
+            yield
+        finally:
+            if renewer is not None and redis is not None:
+                renewer.cancel()
+                try:
+                    await redis.zrem(LLM_SLOTS_KEY, lease_id)
+                except Exception:
+                    logger.warning("Failed to release LLM slot %s", lease_id, exc_info=True)
+
+
+def _queue() -> asyncio.Queue[str]:
+    global _local_queue
+    if _local_queue is None:
+        _local_queue = asyncio.Queue()
+    return _local_queue
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def _save(job: dict[str, Any]) -> None:
+    redis = await get_redis()
+    await redis.set(
+        _job_key(job["id"]),
+        json.dumps(job, default=str),
+        ex=get_settings().JOB_RESULT_TTL_SECONDS,
+    )
+
+
+async def get_job(job_id: str) -> dict[str, Any] | None:
+    redis = await get_redis()
+    raw = await redis.get(_job_key(job_id))
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+async def enqueue(kind: str, payload: dict[str, Any], user_id) -> dict[str, Any]:
+    if kind not in _handlers:
+        raise UnknownJobKind(kind)
+    job: dict[str, Any] = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "user_id": str(user_id),
+        "status": "queued",
+        "payload": payload,
+        "result": None,
+        "error": None,
+        "created_at": _now(),
+        "finished_at": None,
+    }
+    await _save(job)
+    redis = await get_redis_real()
+    if redis is not None:
+        await redis.rpush(QUEUE_KEY, job["id"])
+    else:
+        await _queue().put(job["id"])
+    increment(f"jobs.{kind}.enqueued")
+    return job
+
+
+async def _run(job_id: str) -> None:
+    job = await get_job(job_id)
+    if job is None:
+        logger.warning("Job %s expired before it ran", job_id)
+        return
+    handler = _handlers.get(job["kind"])
+    job["status"] = "running"
+    job["started_at"] = _now()
+    job["runs"] = job.get("runs", 0) + 1
+    await _save(job)
+    try:
+        if handler is None:
+            raise UnknownJobKind(job["kind"])
+        with timed(f"jobs.{job['kind']}"):
+            result = await handler(job["payload"])
+        job["status"] = "done"
+        job["result"] = result
+        increment(f"jobs.{job['kind']}.done")
+    except Exception:
+        logger.exception("Job %s (%s) failed", job_id, job["kind"])
+        job["status"] = "error"
+        job["error"] = JOB_FAILED_MESSAGE
+        increment(f"jobs.{job['kind']}.failed")
+    job["finished_at"] = _now()
+    await _save(job)
+
+
+async def _next_job_id() -> str | None:
+    queue = _queue()
+    if not queue.empty():
+        return queue.get_nowait()
+    redis = await get_redis_real()
+    if redis is None:
+        try:
+            return await asyncio.wait_for(queue.get(), POLL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return None
+    # The job stays in the processing list until it finishes, so a worker that
+    # dies mid-job leaves it behind for ``requeue_stalled_jobs``.
+    job_id = await redis.blmove(
+        QUEUE_KEY, PROCESSING_KEY, POLL_TIMEOUT_SECONDS, "LEFT", "RIGHT"
+    )
+    if job_id is None:
+        return None
+    return str(job_id)
+
+
+async def _finish(job_id: str) -> None:
+    redis = await get_redis_real()
+    if redis is not None:
+        await redis.lrem(PROCESSING_KEY, 1, job_id)
+
+
+async def _requeue(job_id: str) -> bool:
+    redis = await get_redis_real()
+    if redis is None:
+        return False
+    return bool(await redis.eval(_REQUEUE_SCRIPT, 2, PROCESSING_KEY, QUEUE_KEY, job_id))
+
+
+async def requeue_stalled_jobs() -> int:
+    """Put back jobs whose worker died; returns how many were requeued.
+
+    A job in the processing list is stalled once it has been running (or
+    waiting to start) for longer than ``JOB_TIMEOUT_SECONDS``. Jobs that
+    already ran ``MAX_JOB_RUNS`` times are failed instead of retried.
+    """
+    redis = await get_redis_real()
+    if redis is None:
+        return 0
+    timeout = get_settings().JOB_TIMEOUT_SECONDS
+    now = datetime.now(timezone.utc)
+    requeued = 0
+    for raw_id in await redis.lrange(PROCESSING_KEY, 0, -1):
+        job_id = str(raw_id)
+        job = await get_job(job_id)
+        if job is None or job["status"] in {"done", "error"}:
+            # Expired, or finished by a worker that died before cleaning up.
+            await redis.lrem(PROCESSING_KEY, 1, job_id)
+            continue
+        since = datetime.fromisoformat(job.get("started_at") or job["created_at"])
+        if (now - since).total_seconds() < timeout:
+            continue
+        if job.get("runs", 0) >= MAX_JOB_RUNS:
+            job["status"] = "error"
+            job["error"] = JOB_FAILED_MESSAGE
+            job["finished_at"] = _now()
+            await _save(job)
+            await redis.lrem(PROCESSING_KEY, 1, job_id)
+            increment(f"jobs.{job['kind']}.failed")
+            continue
+        if await _requeue(job_id):
+            requeued += 1
+            increment(f"jobs.{job['kind']}.requeued")
+    return requeued
+
+
+async def _requeue_loop() -> None:
+    while True:
+        try:
+            requeued = await requeue_stalled_jobs()
+            if requeued:
+                logger.warning("Requeued %d stalled jobs", requeued)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Requeueing stalled jobs failed")
+        await asyncio.sleep(REQUEUE_INTERVAL_SECONDS)
+
+
+async def _worker(index: int) -> None:
+    while True:
+        try:
+            job_id = await _next_job_id()
+            if job_id is None:
+                continue
+            try:
+                await _run(job_id)
+            except asyncio.CancelledError:
+                # Shutting down mid-job: hand it to another worker now rather
+                # than after the stall timeout.
+                await _requeue(job_id)
+                raise
+            await _finish(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Job worker %d failed; retrying", index)
+            await asyncio.sleep(POLL_TIMEOUT_SECONDS)
+
+
+async def start_job_workers(count: int | None = None) -> None:
+    global _requeue_task
+    if _workers:
+        return
+    count = get_settings().JOB_WORKERS if count is None else count
+    for index in range(count):
+        _workers.append(asyncio.create_task(_worker(index)))
+    _requeue_task = asyncio.create_task(_requeue_loop())
+    logger.info("Started %d job workers", count)
+
+
+async def stop_job_workers() -> None:
+    global _local_queue, _llm_semaphore, _requeue_task
+    tasks = [*_workers, _requeue_task] if _requeue_task is not None else list(_workers)
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _workers.clear()
+    _requeue_task = None
+    _local_queue = None
+    _llm_semaphore = None
+
+
+def job_stats() -> dict[str, Any]:
+    return {
+        "workers": len(_workers),
+        "local_queue_depth": _local_queue.qsize() if _local_queue is not None else 0,
+        "handlers": sorted(_handlers),
+    }
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+LATENCY_WINDOW = 1024
+
+_latencies: dict[str, deque[float]] = {}
+_counts: dict[str, int] = {}
+_counters: dict[str, int] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def counter_stats() -> dict[str, int]:
+    return dict(_counters)
+
+
+def record_latency(name: str, seconds: float) -> None:
+    samples = _latencies.get(name)
+    if samples is None:
+        samples = _latencies[name] = deque(maxlen=LATENCY_WINDOW)
+    samples.append(seconds)
+    _counts[name] = _counts.get(name, 0) + 1
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record the wall time of the block under ``name``, including failures."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_latency(name, time.perf_counter() - started)
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def latency_stats() -> dict[str, dict]:
+    """Per-name percentiles (milliseconds) over the last ``LATENCY_WINDOW`` samples."""
+    output: dict[str, dict] = {}
+    for name, samples in _latencies.items():
+        ordered = sorted(samples)
+        if not ordered:
+            continue
+        output[name] = {
+            "count": _counts.get(name, 0),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+    return output
+
+
+def reset_metrics() -> None:
+    _latencies.clear()
+    _counts.clear()
+    _counters.clear()
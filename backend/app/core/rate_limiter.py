@@ -0,0 +1,147 @@
+"""GCRA rate limiting on Redis with per-worker token leases.
+
+Each ``RateLimit`` allows ``times`` requests per ``seconds`` using the generic
+cell rate algorithm: Redis keeps one "theoretical arrival time" per identity
+and a single Lua call both checks and advances it, using the Redis clock so
+workers never disagree about time.
+
+For generous limits a worker leases several tokens per Redis call and spends
+them locally, so bursts cost one round trip per lease instead of one per
+request. Leases are small (a tenth of the limit at most) and short-lived, and
+unused leased tokens lapse. A worker therefore only asks for a lease while an
+identity is bursting (its previous grant is still within the lease window);
+spaced requests take one token at a time, so lapsed tokens never eat into the
+limit of a steady client. Strict limits lease one token at a time and behave
+exactly like a shared counter.
+
+If Redis is unavailable the same algorithm runs in process memory. Limits are
+then enforced per worker rather than globally, which is looser but never off.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+
+from app.core.config import get_settings
+from app.core.metrics import increment
+from app.core.redis_client import get_redis_real
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "quizstudy:ratelimit:"
+_SWEEP_EVERY = 1024
+
+# KEYS: limiter key. ARGV: emission interval (ms), period (ms), tokens wanted.
+# Returns {granted, retry_after_ms}; granted is 0 when the limit is reached.
+_GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+  tat = now
+end
+local available = math.floor((now + period - tat) / emission)
+if available < 1 then
+  return {0, math.ceil(tat + emission - period - now)}
+end
+local granted = math.min(wanted, available)
+local new_tat = tat + granted * emission
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {granted, 0}
+"""
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Rate limit exceeded; retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class RateLimit:
+    """``times`` requests per ``seconds`` for each identity, under ``name``."""
+
+    def __init__(self, name: str, times: int, seconds: int) -> None:
+        if times <= 0 or seconds <= 0:
+            raise ValueError("times and seconds must be positive")
+        settings = get_settings()
+        self.name = name
+        self.times = times
+        self.period_ms = seconds * 1000
+        self.emission_ms = self.period_ms / times
+        self.lease_size = max(1, min(settings.RATE_LIMIT_LOCAL_BATCH, times // 10))
+        self.lease_seconds = settings.RATE_LIMIT_LOCAL_LEASE_SECONDS
+        self._leases: dict[str, tuple[int, float]] = {}
+        self._memory_tat: dict[str, float] = {}
+        self._writes = 0
+
+    def _key(self, identity: str) -> str:
+        return f"{KEY_PREFIX}{self.name}:{identity}"
+
+    async def hit(self, identity: str) -> None:
+        """Spend one token for ``identity`` or raise ``RateLimitExceeded``."""
+        now = time.monotonic()
+        remaining, lease_expires = self._leases.get(identity, (0, 0.0))
+        bursting = lease_expires > now
+        if bursting and remaining > 0:
+            self._leases[identity] = (remaining - 1, lease_expires)
+            increment("rate_limit.local")
+            return
+
+        redis = await get_redis_real()
+        if redis is not None:
+            try:
+                granted, retry_ms = await redis.eval(
+                    _GCRA_SCRIPT,
+                    1,
+                    self._key(identity),
+                    str(self.emission_ms),
+                    str(self.period_ms),
+                    str(self.lease_size if bursting else 1),
+                )
+            except Exception:
+                logger.warning("Rate limit check failed; using local limits", exc_info=True)
+            else:
+                self._grant(identity, int(granted), int(retry_ms), now)
+                return
+        increment("rate_limit.degraded")
+        self._memory_hit(identity, now)
+
+    def _grant(self, identity: str, granted: int, retry_ms: int, now: float) -> None:
+        if granted <= 0:
+            self._leases.pop(identity, None)
+            increment(f"rate_limit.{self.name}.rejected")
+            raise RateLimitExceeded(retry_ms / 1000)
+        increment(f"rate_limit.{self.name}.allowed")
+        if self.lease_size > 1:
+            # Kept even when empty: a hit before it lapses is part of a burst.
+            self._leases[identity] = (granted - 1, now + self.lease_seconds)
+            self._sweep(now)
+
+    def _memory_hit(self, identity: str, now: float) -> None:
+        now_ms = now * 1000
+        tat = max(self._memory_tat.get(identity, now_ms), now_ms)
+        if now_ms + self.period_ms - tat < self.emission_ms:
+            increment(f"rate_limit.{self.name}.rejected")
+            raise RateLimitExceeded(
+                math.ceil(tat + self.emission_ms - self.period_ms - now_ms) / 1000
+            )
+        self._memory_tat[identity] = tat + self.emission_ms
+        increment(f"rate_limit.{self.name}.allowed")
+        self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY:
+            return
+        now_ms = now * 1000
+        self._leases = {
+            identity: lease for identity, lease in self._leases.items() if lease[1] > now
+        }
+        self._memory_tat = {
+            identity: tat for identity, tat in self._memory_tat.items() if tat > now_ms
+        }
@@ -33,10 +33,46 @@ class MemoryStore:
                 return None
             return payload
 
-    async def set(self, key: str, value: str, ex: int | None = None) -> None:
+    async def set(
+        self,
+        key: str,
+        value: str,
+        ex: int | None = None,
+        nx: bool = False,
+    ) -> bool | None:
         expires_at = time.monotonic() + ex if ex else None
         async with self._lock:
+            if nx:
+                current = self._data.get(key)
+                if current is not None and (
+                    current[1] is None or current[1] > time.monotonic()
+                ):
+                    return None
             self._data[key] = (value, expires_at)
+            return True
+
+    async def incr(self, key: str) -> int:
+        async with self._lock:
+            current = self._data.get(key)
+            expires_at = None
+            value = 0
+            if current is not None:
+                payload, expires_at = current
+                if expires_at is not None and expires_at <= time.monotonic():
+                    expires_at = None
+                else:
+                    value = int(payload)
+            value += 1
+            self._data[key] = (str(value), expires_at)
+            return value
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        async with self._lock:
+            current = self._data.get(key)
+            if current is None:
+                return False
+            self._data[key] = (current[0], time.monotonic() + seconds)
+            return True
 
     async def delete(self, key: str) -> int:
         async with self._lock:
@@ -4,11 +4,8 @@ import json
 import logging
 from typing import Any
 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
-
 from app.core.config import get_settings
+from app.integrations.llm_registry import get_chain
 
 logger = logging.getLogger(__name__)
 
@@ -199,17 +196,14 @@ def _normalize_review(data: dict[str, Any]) -> dict[str, Any]:
 
 async def generate_ai_review(payload: dict) -> dict[str, Any]:
     settings = get_settings()
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            ("human", HUMAN_PROMPT),
-        ]
-    )
-    llm = ChatGroq(
+    chain = get_chain(
+        "ai_review",
+        system_prompt=SYSTEM_PROMPT,
+        human_prompt=HUMAN_PROMPT,
+        provider="groq",
         model=settings.GROQ_MODEL,
         temperature=settings.GROQ_REVIEW_TEMPERATURE,
         max_tokens=settings.GROQ_REVIEW_MAX_TOKENS,
     )
-    chain = prompt | llm | StrOutputParser()
     text = await chain.ainvoke(payload)
     return _normalize_review(_safe_json_parse(text))
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
+from collections.abc import AsyncIterator
 
 from app.core.config import get_settings
+from app.integrations.llm_registry import get_chain
 
 SYSTEM_PROMPT = """
 You are a helpful tutor.
@@ -34,18 +33,24 @@ Hint Level: {level}
 """.strip()
 
 
-async def generate_hint(payload: dict) -> str:
+def _chain():
     settings = get_settings()
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            ("human", HUMAN_PROMPT),
-        ]
-    )
-    llm = ChatGroq(
+    return get_chain(
+        "hint",
+        system_prompt=SYSTEM_PROMPT,
+        human_prompt=HUMAN_PROMPT,
+        provider="groq",
         model=settings.GROQ_MODEL,
         temperature=settings.GROQ_TEMPERATURE,
         max_tokens=settings.GROQ_HINT_MAX_TOKENS,
     )
-    chain = prompt | llm | StrOutputParser()
-    return await chain.ainvoke(payload)
+
+
+async def generate_hint(payload: dict) -> str:
+    return await _chain().ainvoke(payload)
+
+
+async def stream_hint(payload: dict) -> AsyncIterator[str]:
+    async for chunk in _chain().astream(payload):
+        if chunk:
+            yield chunk
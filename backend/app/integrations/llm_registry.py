@@ -0,0 +1,214 @@
+"""Per-worker registry of compiled LLM chains and pooled provider clients.
+
+Chains are built once and reused for as long as the settings that shape them
+(provider, model, sampling options, API base and key) stay the same. Groq
+chains share one ``httpx.AsyncClient`` so keep-alive connections and TLS
+sessions survive between calls; Gemini models own their SDK client, which is
+kept alive by caching the model itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Hashable
+from typing import Any
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import LLMResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+
+from app.core.config import get_settings
+from app.core.metrics import increment, record_latency
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("groq", "gemini")
+
+_http_clients: dict[str, httpx.AsyncClient] = {}
+_chains: dict[tuple[Hashable, ...], Runnable] = {}
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+class ChainMetricsHandler(AsyncCallbackHandler):
+    """Record latency, call, error and token counters under ``llm.<name>``."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._started: dict[UUID, float] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            record_latency(f"llm.{self.name}", time.perf_counter() - started)
+        increment(f"llm.{self.name}.calls")
+        input_tokens, output_tokens = _token_usage(response)
+        if input_tokens:
+            increment(f"llm.{self.name}.input_tokens", input_tokens)
+        if output_tokens:
+            increment(f"llm.{self.name}.output_tokens", output_tokens)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            record_latency(f"llm.{self.name}", time.perf_counter() - started)
+        increment(f"llm.{self.name}.errors")
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def _check_loop() -> None:
+    """Drop cached clients when called from a different event loop.
+
+    Connections are bound to the loop that opened them. A worker has a single
+    loop, so this only triggers in tests that run each case on a fresh loop.
+    """
+    global _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop:
+        return
+    if _loop is not None:
+        _http_clients.clear()
+        _chains.clear()
+    _loop = loop
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """Return the pooled HTTP client shared by every chain of ``provider``."""
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    _check_loop()
+    client = _http_clients.get(provider)
+    if client is None:
+        settings = get_settings()
+        client = httpx.AsyncClient(
+            timeout=settings.LLM_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        _http_clients[provider] = client
+    return client
+
+
+def _secret_fingerprint(value: str | None) -> str | None:
+    # Keys are part of the cache key so a rotated key rebuilds the chain; only
+    # a digest is kept in memory alongside the chain.
+    if not value:
+        return None
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+def _build_llm(provider: str, model: str, temperature: float, max_tokens: int):
+    settings = get_settings()
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+
+        options: dict[str, Any] = {}
+        if settings.GROQ_API_KEY:
+            options["api_key"] = settings.GROQ_API_KEY
+        if settings.GROQ_API_BASE:
+            options["base_url"] = settings.GROQ_API_BASE
+        return ChatGroq(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            http_async_client=get_http_client("groq"),
+            **options,
+        )
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        if not settings.GOOGLE_API_KEY:
+            raise RuntimeError("GOOGLE_API_KEY is required for Gemini chains")
+        options = {}
+        if settings.GEMINI_API_BASE:
+            options["base_url"] = settings.GEMINI_API_BASE
+        return ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            google_api_key=settings.GOOGLE_API_KEY,
+            **options,
+        )
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def get_chain(
+    name: str,
+    *,
+    system_prompt: str,
+    human_prompt: str,
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> Runnable:
+    """Return the compiled ``prompt | llm | StrOutputParser()`` chain for ``name``.
+
+    The chain is built on first use and rebuilt only when one of the inputs
+    or the provider's base URL / API key changes.
+    """
+    _check_loop()
+    settings = get_settings()
+    if provider == "groq":
+        endpoint = (settings.GROQ_API_BASE, _secret_fingerprint(settings.GROQ_API_KEY))
+    else:
+        endpoint = (settings.GEMINI_API_BASE, _secret_fingerprint(settings.GOOGLE_API_KEY))
+    key = (name, provider, model, temperature, max_tokens, *endpoint)
+    chain = _chains.get(key)
+    if chain is not None:
+        return chain
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            ("human", human_prompt),
+        ]
+    )
+    llm = _build_llm(provider, model, temperature, max_tokens)
+    chain = (prompt | llm | StrOutputParser()).with_config(
+        run_name=name, callbacks=[ChainMetricsHandler(name)]
+    )
+    # Settings changed for this chain: forget the stale build.
+    for stale in [cached for cached in _chains if cached[0] == name]:
+        del _chains[stale]
+    _chains[key] = chain
+    increment("llm_registry.builds")
+    logger.info("Built LLM chain %s (%s/%s)", name, provider, model)
+    return chain
+
+
+def llm_registry_stats() -> dict[str, Any]:
+    return {
+        "chains": sorted(key[0] for key in _chains),
+        "http_clients": sorted(_http_clients),
+    }
+
+
+async def close_llm_clients() -> None:
+    global _loop
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    _chains.clear()
+    _loop = None
+    for client in clients:
+        await client.aclose()
@@ -4,11 +4,8 @@ import json
 import logging
 from typing import Any
 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
-
 from app.core.config import get_settings
+from app.integrations.llm_registry import get_chain
 
 logger = logging.getLogger(__name__)
 
@@ -125,17 +122,14 @@ def _normalize_recommendation(data: dict[str, Any]) -> dict[str, Any]:
 
 async def generate_next_quiz_recommendation(payload: dict[str, Any]) -> dict[str, Any]:
     settings = get_settings()
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            ("human", HUMAN_PROMPT),
-        ]
-    )
-    llm = ChatGroq(
+    chain = get_chain(
+        "next_quiz_recommendation",
+        system_prompt=SYSTEM_PROMPT,
+        human_prompt=HUMAN_PROMPT,
+        provider="groq",
         model=settings.GROQ_MODEL,
         temperature=settings.GROQ_REVIEW_TEMPERATURE,
         max_tokens=300,
     )
-    chain = prompt | llm | StrOutputParser()
     text = await chain.ainvoke(payload)
     return _normalize_recommendation(_safe_json_parse(text))
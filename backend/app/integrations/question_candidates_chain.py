@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
+import re
+from collections.abc import AsyncGenerator, Awaitable, Callable
 from typing import Any
 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-
 from app.core.config import get_settings
+from app.core.jobs import llm_slot
+from app.core.metrics import increment
+from app.integrations.llm_registry import get_chain
 
 SYSTEM_PROMPT = """
 You are generating interview-grade Python quiz questions.
@@ -85,102 +88,136 @@ Rubric:
 """.strip()
 
 
-def _escape_newlines_in_strings(text: str) -> str:
-    output: list[str] = []
-    in_string = False
-    escape = False
-    for ch in text:
-        if escape:
-            output.append(ch)
-            escape = False
-            continue
-        if ch == "\\":
-            output.append(ch)
-            escape = True
-            continue
-        if ch == '"':
-            in_string = not in_string
-            output.append(ch)
-            continue
-        if in_string and ch in {"\n", "\r"}:
-            output.append("\\n")
-            continue
-        output.append(ch)
-    return "".join(output)
-
-
-def _extract_array(data: Any) -> list[dict[str, Any]] | None:
-    if isinstance(data, list):
-        return data
-    if isinstance(data, dict):
-        for key in ("questions", "items", "data", "results"):
-            value = data.get(key)
-            if isinstance(value, list):
-                return value
-        for value in data.values():
-            if isinstance(value, list):
-                return value
-    return None
-
-
-def _try_parse_json(text: str) -> list[dict[str, Any]] | None:
-    try:
-        data = json.loads(text)
-    except json.JSONDecodeError:
-        return None
-    return _extract_array(data)
-
-
-def parse_candidates_json(raw: str) -> list[dict[str, Any]]:
-    cleaned = (raw or "").strip()
-    if cleaned.startswith("```"):
-        cleaned = cleaned.strip("`").strip()
-    snippet = cleaned
-    if "[" in cleaned and "]" in cleaned:
-        start = cleaned.find("[")
-        end = cleaned.rfind("]")
-        snippet = cleaned[start : end + 1]
-
-    for candidate in (snippet, cleaned):
-        parsed = _try_parse_json(candidate)
-        if parsed is not None:
-            return parsed
-        parsed = _try_parse_json(_escape_newlines_in_strings(candidate))
-        if parsed is not None:
-            return parsed
-
-    start = cleaned.find("[")
-    if start != -1:
-        depth = 0
-        in_string = False
-        escape = False
-        for idx in range(start, len(cleaned)):
-            ch = cleaned[idx]
-            if escape:
-                escape = False
+_STRUCTURAL_RE = re.compile(r'["\[\]{}]')
+_STRING_END_RE = re.compile(r'["\\]')
+# How much of the raw output a parser keeps for failure reports.
+_RAW_TAIL_CHARS = 8000
+
+
+class CandidateStreamParser:
+    """Incremental parser for the JSON array of questions in LLM output.
+
+    ``feed`` takes raw text chunks as they stream in and returns every question
+    object whose closing brace has arrived. Only the unfinished object is kept
+    in the buffer, and each character is scanned once. Anything before the
+    first ``[`` (markdown fences, a ``{"questions": ...}`` wrapper, prose) is
+    skipped; a truncated tail simply never yields its last object. Raw newlines
+    inside strings are accepted. Only the last ``_RAW_TAIL_CHARS`` characters
+    of the raw output are kept for error reporting.
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: int | None = None
+        self._array_items = 0
+        self._array_blank = True
+        self._raw_tail = ""
+        self.started = False
+        self.closed = False
+        self.items = 0
+        self.invalid_items = 0
+
+    @property
+    def raw_output(self) -> str:
+        return self._raw_tail
+
+    @property
+    def truncated(self) -> bool:
+        return self.started and not self.closed
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        self._raw_tail = (self._raw_tail + chunk)[-_RAW_TAIL_CHARS:]
+        if self.closed or not chunk:
+            return []
+        buf = self._buf + chunk
+        pos = self._pos
+        items: list[dict[str, Any]] = []
+        while pos < len(buf) and not self.closed:
+            if self._depth == 0:
+                start = buf.find("[", pos)
+                if start == -1:
+                    pos = len(buf)
+                    break
+                self._depth = 1
+                self._array_items = 0
+                self._array_blank = True
+                self.started = True
+                pos = start + 1
                 continue
-            if ch == "\\":
-                escape = True
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_END_RE.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
                 continue
+            match = _STRUCTURAL_RE.search(buf, pos)
+            index = len(buf) if match is None else match.start()
+            if self._depth == 1 and buf[pos:index].strip():
+                self._array_blank = False
+            if match is None:
+                pos = len(buf)
+                break
+            ch = match.group()
+            pos = match.end()
+            if ch != "]" or self._depth > 1:
+                self._array_blank = False
             if ch == '"':
-                in_string = not in_string
-                continue
-            if in_string:
-                continue
-            if ch == "[":
-                depth += 1
-            elif ch == "]":
-                depth -= 1
-                if depth == 0:
-                    fragment = cleaned[start : idx + 1]
-                    parsed = _try_parse_json(fragment)
-                    if parsed is not None:
-                        return parsed
-                    parsed = _try_parse_json(_escape_newlines_in_strings(fragment))
-                    if parsed is not None:
-                        return parsed
-                    break
-    raise ValueError("AI output must be a JSON array")
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+                if self._depth == 2 and ch == "{":
+                    self._item_start = index
+            else:
+                self._depth -= 1
+                if self._depth == 1 and self._item_start is not None:
+                    item = self._parse_item(buf[self._item_start : pos])
+                    self._item_start = None
+                    if item is not None:
+                        items.append(item)
+                        self._array_items += 1
+                elif self._depth == 0 and (self._array_items or self._array_blank):
+                    self.closed = True
+                # A non-empty array without objects (e.g. "[20] questions") is
+                # skipped; scanning resumes at the next "[".
+
+        if self._item_start is None:
+            self._buf = ""
+            self._pos = 0
+        else:
+            self._buf = buf[self._item_start :]
+            self._pos = pos - self._item_start
+            self._item_start = 0
+        self.items += len(items)
+        return items
+
+    def _parse_item(self, text: str) -> dict[str, Any] | None:
+        try:
+            item = json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            self.invalid_items += 1
+            return None
+        return item if isinstance(item, dict) else None
+
+
+def parse_candidates_json(raw: str) -> list[dict[str, Any]]:
+    parser = CandidateStreamParser()
+    items = parser.feed(raw or "")
+    if not items and not parser.closed:
+        raise ValueError("AI output contained no complete JSON array of questions")
+    return items
 
 
 class CandidateParseError(ValueError):
@@ -189,47 +226,213 @@ class CandidateParseError(ValueError):
         self.raw_output = raw_output
 
 
-async def generate_question_candidates(payload: dict[str, Any]) -> str:
+_stub_serial = itertools.count(1)
+_STUB_CHUNK_CHARS = 256
+
+
+async def stub_generate_question_candidates(payload: dict[str, Any]) -> str:
+    """Offline stand-in for Gemini that returns ``count`` well-formed questions.
+
+    Enabled with ``GEMINI_QC_STUB``; sleeps ``GEMINI_QC_STUB_LATENCY_SECONDS``
+    per call so batching and concurrency can be benchmarked without an API key.
+    """
+    settings = get_settings()
+    await asyncio.sleep(settings.GEMINI_QC_STUB_LATENCY_SECONDS)
+    count = int(payload.get("count") or 0)
+    topic = payload.get("topic") or "python_core"
+    if topic == "random":
+        topic = "python_core"
+    difficulty = payload.get("difficulty") or "junior"
+    qtype = payload.get("qtype")
+    items = []
+    for _ in range(count):
+        serial = next(_stub_serial)
+        if qtype == "code_output" or (qtype != "mcq" and serial % 2):
+            items.append(
+                {
+                    "topic": topic,
+                    "difficulty": difficulty,
+                    "type": "code_output",
+                    "prompt": f"What does this snippet print? (stub #{serial})",
+                    "code": f"values = list(range({serial % 7 + 2}))\nprint(sum(values))",
+                    "expected_output": str(sum(range(serial % 7 + 2))),
+                    "explanation": "sum() adds every value produced by range().",
+                }
+            )
+        else:
+            items.append(
+                {
+                    "topic": topic,
+                    "difficulty": difficulty,
+                    "type": "mcq",
+                    "prompt": f"What is len(range({serial}))? (stub #{serial})",
+                    "choices": [
+                        {"key": "A", "text": str(serial)},
+                        {"key": "B", "text": str(serial + 1)},
+                        {"key": "C", "text": str(serial - 1)},
+                        {"key": "D", "text": "0"},
+                    ],
+                    "answer": "A",
+                    "explanation": "range(n) yields exactly n integers.",
+                }
+            )
+    return json.dumps(items)
+
+
+def _chain():
     settings = get_settings()
     if not settings.GOOGLE_API_KEY:
         raise RuntimeError("GOOGLE_API_KEY is required for Gemini question candidates")
-    llm = ChatGoogleGenerativeAI(
+    return get_chain(
+        "question_candidates",
+        system_prompt=SYSTEM_PROMPT,
+        human_prompt=HUMAN_PROMPT,
+        provider="gemini",
         model=settings.GEMINI_QC_MODEL,
         temperature=settings.GEMINI_QC_TEMPERATURE,
-        max_output_tokens=settings.GEMINI_QC_MAX_OUTPUT_TOKENS,
-        google_api_key=settings.GOOGLE_API_KEY,
+        max_tokens=settings.GEMINI_QC_MAX_OUTPUT_TOKENS,
     )
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            ("human", HUMAN_PROMPT),
-        ]
-    )
-    chain = prompt | llm | StrOutputParser()
-    return await chain.ainvoke(payload)
+
+
+async def generate_question_candidates(payload: dict[str, Any]) -> str:
+    if get_settings().GEMINI_QC_STUB:
+        return await stub_generate_question_candidates(payload)
+    return await _chain().ainvoke(payload)
+
+
+async def stream_question_candidates(payload: dict[str, Any]) -> AsyncGenerator[str, None]:
+    if get_settings().GEMINI_QC_STUB:
+        raw = await stub_generate_question_candidates(payload)
+        for start in range(0, len(raw), _STUB_CHUNK_CHARS):
+            yield raw[start : start + _STUB_CHUNK_CHARS]
+        return
+    async for chunk in _chain().astream(payload):
+        yield chunk
+
+
+MIN_BATCH_SIZE = 5
+
+BatchCallback = Callable[[list[dict[str, Any]]], Awaitable[None]]
 
 
 async def generate_question_candidates_items(
     payload: dict[str, Any],
-    batch_size: int = 20,
+    batch_size: int | None = None,
+    fanout: int | None = None,
+    on_batch: BatchCallback | None = None,
 ) -> list[dict[str, Any]]:
+    """Generate ``payload["count"]`` items with up to ``fanout`` batches in flight.
+
+    Every LLM call also holds an ``llm_slot``, so the process-wide
+    ``LLM_MAX_CONCURRENCY`` cap applies across requests. Output is parsed while
+    it streams; finished questions go to ``on_batch`` (one call at a time) in
+    groups of ``GEMINI_QC_STREAM_FLUSH_ITEMS``, outside the LLM slot. A truncated or failed stream
+    keeps what it produced and re-asks for the rest; a batch that yields nothing
+    is split in half (down to ``MIN_BATCH_SIZE``) and retried with exponential
+    backoff while other batches keep going. If a batch still fails after
+    ``GEMINI_QC_MAX_RETRIES`` retries, the last error is raised once the
+    remaining batches have finished. An exception from ``on_batch`` is not
+    retried: it cancels the other batches and is raised immediately.
+    """
+    settings = get_settings()
     target = int(payload.get("count") or 0)
     if target <= 0:
         return []
+    batch_size = max(1, batch_size or settings.GEMINI_QC_BATCH_SIZE)
+    fanout = max(1, fanout or settings.GEMINI_QC_FANOUT)
 
     results: list[dict[str, Any]] = []
-    current_batch = min(batch_size, target)
-
-    while len(results) < target:
-        ask = min(current_batch, target - len(results))
-        raw_output = await generate_question_candidates({**payload, "count": ask})
+    errors: list[Exception] = []
+    slots = asyncio.Semaphore(fanout)
+    deliver_lock = asyncio.Lock()
+
+    async def deliver(items: list[dict[str, Any]]) -> None:
+        async with deliver_lock:
+            results.extend(items)
+            if on_batch is not None:
+                await on_batch(items)
+
+    async def run_batch(ask: int, attempt: int) -> list[tuple[int, int]]:
+        if attempt:
+            await asyncio.sleep(settings.GEMINI_QC_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        parser = CandidateStreamParser()
+        buffered: list[dict[str, Any]] = []
+        delivered = 0
+        error: Exception | None = None
+        # Groups are persisted by a separate task so the LLM slot is never
+        # held while waiting on the database.
+        groups: asyncio.Queue[list[dict[str, Any]] | None] = asyncio.Queue()
+
+        async def persist() -> None:
+            while (items := await groups.get()) is not None:
+                await deliver(items)
+
+        persister = asyncio.create_task(persist())
         try:
-            items = parse_candidates_json(raw_output)
-        except (json.JSONDecodeError, ValueError) as exc:
-            if ask > 5:
-                current_batch = max(5, ask // 2)
-                continue
-            raise CandidateParseError(str(exc), raw_output) from exc
-        results.extend(items)
+            async with slots, llm_slot():
+                chunks = stream_question_candidates({**payload, "count": ask})
+                try:
+                    # A failed persister stops the stream; its error is raised
+                    # below and, unlike stream failures, is not retried.
+                    while delivered + len(buffered) < ask and not persister.done():
+                        try:
+                            chunk = await anext(chunks)
+                        except StopAsyncIteration:
+                            break
+                        except Exception as exc:
+                            error = exc
+                            break
+                        buffered.extend(parser.feed(chunk))
+                        buffered = buffered[: ask - delivered]
+                        if len(buffered) >= settings.GEMINI_QC_STREAM_FLUSH_ITEMS:
+                            groups.put_nowait(buffered)
+                            delivered += len(buffered)
+                            buffered = []
+                finally:
+                    await chunks.aclose()
+            if buffered:
+                groups.put_nowait(buffered)
+                delivered += len(buffered)
+            groups.put_nowait(None)
+            await persister
+        finally:
+            persister.cancel()
+        if parser.truncated:
+            increment("question_candidates.truncated_outputs")
+
+        if delivered == 0:
+            increment("question_candidates.batch_retries")
+            if attempt >= settings.GEMINI_QC_MAX_RETRIES:
+                if error is None:
+                    error = CandidateParseError(
+                        "AI output contained no complete questions", parser.raw_output
+                    )
+                errors.append(error)
+                return []
+            if ask > MIN_BATCH_SIZE:
+                half = max(MIN_BATCH_SIZE, ask // 2)
+                return [(half, attempt + 1), (ask - half, attempt + 1)]
+            return [(ask, attempt + 1)]
+        if delivered < ask:
+            # Keep what arrived and ask again only for the missing tail.
+            return [(ask - delivered, attempt + (1 if error or parser.truncated else 0))]
+        return []
 
-    return results[:target]
+    pending = {
+        asyncio.create_task(run_batch(min(batch_size, target - start), 0))
+        for start in range(0, target, batch_size)
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for ask, attempt in task.result():
+                    if ask > 0:
+                        pending.add(asyncio.create_task(run_batch(ask, attempt)))
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if errors:
+        raise errors[-1]
+    return results
@@ -1,4 +1,3 @@
-import importlib
 import logging
 from contextlib import asynccontextmanager
 
@@ -10,41 +9,34 @@ from fastapi.routing import APIRoute
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.v1.router import api_router
+from app.core.cache import start_invalidation_listener, stop_invalidation_listener
 from app.core.config import get_settings
+from app.core.jobs import start_job_workers, stop_job_workers
 from app.core.redis_client import close_redis, get_redis_real
 from app.core.logging import configure_logging
+from app.core.rate_limiter import RateLimitExceeded
+from app.integrations.llm_registry import close_llm_clients
 from app.seed.seed_questions import seed_if_empty
+from app.services.code_sandbox import shutdown_sandbox_pool
+from app.services.password_hashing import shutdown_password_hasher
+from app.services.refresh_token_store import (
+    start_refresh_token_tasks,
+    stop_refresh_token_tasks,
+)
+from app.services.question_bank import load_question_bank
+from app.utils.rate_limit import rate_limit_response
 
 settings = get_settings()
 configure_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
-def _load_fastapi_limiter():
-    module = importlib.import_module("fastapi_limiter")
-    if hasattr(module, "FastAPILimiter"):
-        return module.FastAPILimiter
-    for name in ("fastapi_limiter.limiter", "fastapi_limiter.fastapi_limiter"):
-        try:
-            sub = importlib.import_module(name)
-        except ModuleNotFoundError:
-            continue
-        if hasattr(sub, "FastAPILimiter"):
-            return sub.FastAPILimiter
-    raise ImportError("FastAPILimiter not found in fastapi_limiter")
-
-
-FastAPILimiter = _load_fastapi_limiter()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    redis = await get_redis_real()
-    if redis is None:
-        app.state.rate_limit_enabled = False
-        logger.warning("Redis unavailable; rate limiting disabled")
-    else:
-        app.state.rate_limit_enabled = True
-        await FastAPILimiter.init(redis)
+    app.state.rate_limit_enabled = True
+    if await get_redis_real() is None:
+        logger.warning("Redis unavailable; rate limits are enforced per worker")
+    await start_invalidation_listener()
 
     # Startup events
     logger.info("CORS origins: %s", settings.CORS_ORIGINS)
@@ -55,10 +47,19 @@ async def lifespan(app: FastAPI):
     ]
     logger.info("Hint routes: %s", hint_routes)
     await seed_if_empty()
+    await load_question_bank()
+    await start_job_workers()
+    await start_refresh_token_tasks()
     logger.info("Application startup complete")
     
     yield
     
+    await stop_job_workers()
+    await stop_refresh_token_tasks()
+    shutdown_sandbox_pool()
+    shutdown_password_hasher()
+    await close_llm_clients()
+    await stop_invalidation_listener()
     await close_redis()
     logger.info("Application shutting down")
 
@@ -110,6 +111,11 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException)
     )
 
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exception_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    return rate_limit_response(exc)
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
     request: Request,
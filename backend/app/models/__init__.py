@@ -8,3 +8,5 @@ from app.models.question_favorite import QuestionFavorite  # noqa: F401
 from app.models.ai_recommendation import AiRecommendation  # noqa: F401
 from app.models.attempt_answer import AttemptAnswer  # noqa: F401
 from app.models.question_candidate import QuestionCandidate  # noqa: F401
+from app.models.user_stats_rollup import UserStatsRollup  # noqa: F401
+from app.models.user_question_state import UserQuestionState  # noqa: F401
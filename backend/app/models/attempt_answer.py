@@ -27,4 +27,10 @@ class AttemptAnswer(Base):
         Index("ix_attempt_answers_is_correct", "is_correct"),
         Index("ix_attempt_answers_created_at", "created_at"),
         Index("ix_attempt_answers_user_question", "user_id", "question_id"),
+        Index(
+            "uq_attempt_answers_attempt_question",
+            "attempt_id",
+            "question_id",
+            unique=True,
+        ),
     )
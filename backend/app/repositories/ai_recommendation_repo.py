@@ -66,7 +66,12 @@ class AiRecommendationRepository:
         await self.session.execute(stmt)
         await self.session.commit()
 
-    async def complete_by_attempt(self, user_id: UUID, attempt_id: UUID) -> bool:
+    async def complete_by_attempt(
+        self,
+        user_id: UUID,
+        attempt_id: UUID,
+        commit: bool = True,
+    ) -> bool:
         stmt = (
             update(AiRecommendation)
             .where(
@@ -77,5 +82,6 @@ class AiRecommendationRepository:
             .values(status="completed")
         )
         result = await self.session.execute(stmt)
-        await self.session.commit()
+        if commit:
+            await self.session.commit()
         return (result.rowcount or 0) > 0
@@ -1,11 +1,15 @@
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import Boolean, delete, func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import distinct_on, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import increment
 from app.models.attempt_answer import AttemptAnswer
 from app.models.question import Question
+from app.models.quiz_attempt import QuizAttempt
+from app.models.user_question_state import UserQuestionState
 from app.utils.enums import Difficulty, Topic
 
 
@@ -18,29 +22,147 @@ class AttemptAnswerRepository:
         attempt_id: UUID,
         user_id: UUID,
         answers: list[dict],
-    ) -> None:
-        await self.session.execute(
-            delete(AttemptAnswer).where(AttemptAnswer.attempt_id == attempt_id)
-        )
-        rows = []
+        commit: bool = True,
+    ) -> dict[str, int]:
+        """Make the stored answers for ``attempt_id`` match ``answers``.
+
+        Rows are upserted on ``(attempt_id, question_id)`` and only written when
+        ``is_correct`` or ``selected_answer`` changed; rows for questions no
+        longer present are deleted. Returns the number of rows inserted,
+        updated and deleted.
+        """
+        latest: dict[UUID, dict] = {}
         for item in answers:
             question_id = item.get("question_id")
             if not question_id:
                 continue
-            rows.append(
-                {
-                    "attempt_id": attempt_id,
-                    "user_id": user_id,
-                    "question_id": UUID(str(question_id)),
-                    "is_correct": bool(item.get("is_correct", False)),
-                    "selected_answer": item.get("selected_answer")
-                    or item.get("user_answer")
-                    or None,
-                }
+            question_id = UUID(str(question_id))
+            latest[question_id] = {
+                "attempt_id": attempt_id,
+                "user_id": user_id,
+                "question_id": question_id,
+                "is_correct": bool(item.get("is_correct", False)),
+                "selected_answer": item.get("selected_answer")
+                or item.get("user_answer")
+                or None,
+            }
+
+        delete_stmt = delete(AttemptAnswer).where(AttemptAnswer.attempt_id == attempt_id)
+        if latest:
+            delete_stmt = delete_stmt.where(AttemptAnswer.question_id.not_in(list(latest)))
+        removed = (
+            await self.session.execute(
+                delete_stmt.returning(AttemptAnswer.question_id).execution_options(
+                    synchronize_session=False
+                )
+            )
+        ).scalars().all()
+        deleted = len(removed)
+
+        touched: list = []
+        if latest:
+            stmt = insert(AttemptAnswer).values(list(latest.values()))
+            upsert = stmt.on_conflict_do_update(
+                index_elements=[AttemptAnswer.attempt_id, AttemptAnswer.question_id],
+                set_={
+                    "is_correct": stmt.excluded.is_correct,
+                    "selected_answer": stmt.excluded.selected_answer,
+                    "created_at": func.now(),
+                },
+                where=tuple_(
+                    AttemptAnswer.is_correct, AttemptAnswer.selected_answer
+                ).is_distinct_from(
+                    tuple_(stmt.excluded.is_correct, stmt.excluded.selected_answer)
+                ),
+            )
+            result = await self.session.execute(
+                upsert.returning(
+                    AttemptAnswer.question_id,
+                    literal_column("xmax = 0", Boolean).label("inserted"),
+                )
+            )
+            touched = list(result.all())
+        inserted = sum(1 for _, was_inserted in touched if was_inserted)
+        updated = len(touched) - inserted
+        changed = [question_id for question_id, _ in touched] + list(removed)
+        if changed:
+            await self._refresh_question_state(user_id, changed)
+        if commit:
+            await self.session.commit()
+
+        counts = {"inserted": inserted, "updated": updated, "deleted": deleted}
+        for name, value in counts.items():
+            increment(f"attempt_answers.{name}", value)
+        increment("attempt_answers.unchanged", len(latest) - inserted - updated)
+        return counts
+
+    async def _refresh_question_state(self, user_id: UUID, question_ids: list[UUID]) -> None:
+        """Recompute ``user_question_state`` for ``question_ids`` from the answer rows.
+
+        The latest answer is the one from the most recent attempt, so re-saving
+        an older attempt cannot overwrite a newer result, and answers removed
+        from an attempt stop counting.
+        """
+        answers = (
+            select(
+                AttemptAnswer.user_id,
+                AttemptAnswer.question_id,
+                AttemptAnswer.is_correct,
+                func.count()
+                .filter(AttemptAnswer.is_correct.is_(False))
+                .over(partition_by=AttemptAnswer.question_id),
+                AttemptAnswer.attempt_id,
+                func.max(AttemptAnswer.created_at).over(
+                    partition_by=AttemptAnswer.question_id
+                ),
+            )
+            .join(QuizAttempt, QuizAttempt.id == AttemptAnswer.attempt_id)
+            .where(
+                AttemptAnswer.user_id == user_id,
+                AttemptAnswer.question_id.in_(question_ids),
             )
-        if rows:
-            await self.session.execute(AttemptAnswer.__table__.insert(), rows)
-        await self.session.commit()
+            .ext(distinct_on(AttemptAnswer.question_id))
+            .order_by(
+                AttemptAnswer.question_id,
+                QuizAttempt.created_at.desc(),
+                AttemptAnswer.created_at.desc(),
+            )
+        )
+        stmt = insert(UserQuestionState).from_select(
+            [
+                "user_id",
+                "question_id",
+                "is_correct",
+                "wrong_count",
+                "last_attempt_id",
+                "last_seen_at",
+            ],
+            answers,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserQuestionState.user_id, UserQuestionState.question_id],
+            set_={
+                "is_correct": stmt.excluded.is_correct,
+                "wrong_count": stmt.excluded.wrong_count,
+                "last_attempt_id": stmt.excluded.last_attempt_id,
+                "last_seen_at": stmt.excluded.last_seen_at,
+            },
+        )
+        await self.session.execute(stmt)
+        await self.session.execute(
+            delete(UserQuestionState)
+            .where(
+                UserQuestionState.user_id == user_id,
+                UserQuestionState.question_id.in_(question_ids),
+                ~select(AttemptAnswer.id)
+                .where(
+                    AttemptAnswer.user_id == user_id,
+                    AttemptAnswer.question_id == UserQuestionState.question_id,
+                )
+                .exists(),
+            )
+            .execution_options(synchronize_session=False)
+        )
 
     async def list_for_attempt(
         self,
@@ -55,36 +177,16 @@ class AttemptAnswerRepository:
         return result.scalars().all()
 
     async def mistake_stats(self, user_id: UUID) -> dict:
-        latest_subq = (
-            select(
-                AttemptAnswer.question_id,
-                AttemptAnswer.is_correct,
-                AttemptAnswer.created_at,
-                func.row_number()
-                .over(
-                    partition_by=AttemptAnswer.question_id,
-                    order_by=AttemptAnswer.created_at.desc(),
-                )
-                .label("rn"),
-            )
-            .where(AttemptAnswer.user_id == user_id)
-            .subquery()
-        )
-
         total_wrong_stmt = select(func.count()).where(
-            latest_subq.c.rn == 1,
-            latest_subq.c.is_correct.is_(False),
+            UserQuestionState.user_id == user_id,
+            UserQuestionState.is_correct.is_(False),
         )
         total_wrong = (await self.session.execute(total_wrong_stmt)).scalar_one() or 0
 
         unique_wrong = total_wrong
 
         since = datetime.now(timezone.utc) - timedelta(days=30)
-        recent_wrong_stmt = select(func.count()).where(
-            latest_subq.c.rn == 1,
-            latest_subq.c.is_correct.is_(False),
-            latest_subq.c.created_at >= since,
-        )
+        recent_wrong_stmt = total_wrong_stmt.where(UserQuestionState.last_seen_at >= since)
         recent_wrong = (await self.session.execute(recent_wrong_stmt)).scalar_one() or 0
 
         recent_unique = recent_wrong
@@ -103,49 +205,16 @@ class AttemptAnswerRepository:
         difficulty: Difficulty | None = None,
         days: int = 30,
     ) -> list[tuple[UUID, int]]:
+        """Questions whose latest answer is wrong, weighted by how often they were missed."""
         since = datetime.now(timezone.utc) - timedelta(days=days)
 
-        latest_subq = (
-            select(
-                AttemptAnswer.question_id,
-                AttemptAnswer.is_correct,
-                func.row_number()
-                .over(
-                    partition_by=AttemptAnswer.question_id,
-                    order_by=AttemptAnswer.created_at.desc(),
-                )
-                .label("rn"),
-            )
-            .where(
-                AttemptAnswer.user_id == user_id,
-                AttemptAnswer.created_at >= since,
-            )
-            .subquery()
-        )
-
-        still_wrong = (
-            select(latest_subq.c.question_id)
-            .where(
-                latest_subq.c.rn == 1,
-                latest_subq.c.is_correct.is_(False),
-            )
-        )
-
-        stmt = (
-            select(
-                AttemptAnswer.question_id,
-                func.count().label("wrong_count"),
-            )
-            .where(
-                AttemptAnswer.user_id == user_id,
-                AttemptAnswer.is_correct.is_(False),
-                AttemptAnswer.created_at >= since,
-                AttemptAnswer.question_id.in_(still_wrong),
-            )
-            .group_by(AttemptAnswer.question_id)
+        stmt = select(UserQuestionState.question_id, UserQuestionState.wrong_count).where(
+            UserQuestionState.user_id == user_id,
+            UserQuestionState.is_correct.is_(False),
+            UserQuestionState.last_seen_at >= since,
         )
         if topic is not None or difficulty is not None:
-            stmt = stmt.join(Question, Question.id == AttemptAnswer.question_id)
+            stmt = stmt.join(Question, Question.id == UserQuestionState.question_id)
             if topic is not None:
                 stmt = stmt.where(Question.topic == topic)
             if difficulty is not None:
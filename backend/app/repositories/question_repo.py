@@ -53,26 +53,6 @@ class QuestionRepository:
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
-    async def count_questions(
-        self,
-        topic: Topic | None = None,
-        topics: list[Topic] | None = None,
-        difficulty: Difficulty | None = None,
-        qtype: QuestionType | None = None,
-    ) -> int:
-        stmt = select(func.count(Question.id))
-        if topics:
-            stmt = stmt.where(Question.topic.in_(topics))
-        elif topic is not None:
-            stmt = stmt.where(Question.topic == topic)
-        if difficulty is not None:
-            stmt = stmt.where(Question.difficulty == difficulty)
-        if qtype is not None:
-            stmt = stmt.where(Question.type == qtype)
-
-        result = await self.session.execute(stmt)
-        return int(result.scalar_one())
-    
     async def get_by_id(self, question_id: UUID) -> Question | None:
         return await self.session.get(Question, question_id)
 
@@ -84,29 +64,6 @@ class QuestionRepository:
         )
         return result.scalars().all()
     
-    async def get_random_questions(
-        self,
-        topic: Topic | None,
-        topics: list[Topic] | None,
-        difficulty: Difficulty | None,
-        qtype: QuestionType | None,
-        limit: int,
-    ) -> list[Question]:
-        id_subq = select(Question.id)
-        if topics:
-            id_subq = id_subq.where(Question.topic.in_(topics))
-        elif topic is not None:
-            id_subq = id_subq.where(Question.topic == topic)
-        if difficulty is not None:
-            id_subq = id_subq.where(Question.difficulty == difficulty)
-        if qtype is not None:
-            id_subq = id_subq.where(Question.type == qtype)
-
-        id_subq = id_subq.order_by(func.random()).limit(limit)
-        stmt = select(Question).where(Question.id.in_(id_subq))
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
-
     async def upsert_questions_by_seed_key(self, items: list[QuestionCreateInternal]) -> int:
         if not items:
             return 0
@@ -7,28 +7,54 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.quiz_attempt import QuizAttempt
 
 
+def attempt_topics(topic: str | None, meta) -> list[str]:
+    """Topics an attempt counts towards in per-topic stats.
+
+    Mixed quizzes are attributed to each topic listed in ``meta["topics"]``.
+    """
+    if topic == "mix":
+        meta_topics = meta.get("topics") if isinstance(meta, dict) else None
+        return [item for item in meta_topics or [] if item and item != "random"]
+    if not topic:
+        return []
+    return [topic]
+
+
 class QuizAttemptRepository:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    async def create_attempt(self, data: dict) -> QuizAttempt:
+    async def create_attempt(self, data: dict, commit: bool = True) -> QuizAttempt:
         total = int(data.get("total_count", 0) or 0)
         correct = int(data.get("correct_count", 0) or 0)
         score_percent = round((correct / total) * 100) if total else 0
         data = {**data, "score_percent": score_percent}
         attempt = QuizAttempt(**data)
         self.session.add(attempt)
-        await self.session.commit()
+        if commit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
+        # created_at is a server default.
         await self.session.refresh(attempt)
         return attempt
 
-    async def update_attempt(self, attempt: QuizAttempt, data: dict) -> QuizAttempt:
+    async def update_attempt(
+        self,
+        attempt: QuizAttempt,
+        data: dict,
+        commit: bool = True,
+    ) -> QuizAttempt:
         total = int(data.get("total_count", 0) or 0)
         correct = int(data.get("correct_count", 0) or 0)
         score_percent = round((correct / total) * 100) if total else 0
         for key, value in data.items():
             setattr(attempt, key, value)
         attempt.score_percent = score_percent
+        if not commit:
+            # Every column was just assigned, so there is nothing to refresh.
+            await self.session.flush()
+            return attempt
         await self.session.commit()
         await self.session.refresh(attempt)
         return attempt
@@ -128,25 +154,10 @@ class QuizAttemptRepository:
         attempts_result = await self.session.execute(attempts_stmt)
         bucket: dict[str, dict[str, int]] = {}
         for topic, score_percent, meta in attempts_result.all():
-            meta_topics = []
-            if topic == "mix" and isinstance(meta, dict):
-                meta_topics = meta.get("topics") or []
-
-            if topic == "mix" and meta_topics:
-                for item in meta_topics:
-                    if not item or item == "random":
-                        continue
-                    bucket.setdefault(item, {"attempts": 0, "score_sum": 0})
-                    bucket[item]["attempts"] += 1
-                    bucket[item]["score_sum"] += int(score_percent or 0)
-                continue
-
-            if not topic or topic == "mix":
-                continue
-
-            bucket.setdefault(topic, {"attempts": 0, "score_sum": 0})
-            bucket[topic]["attempts"] += 1
-            bucket[topic]["score_sum"] += int(score_percent or 0)
+            for item in attempt_topics(topic, meta):
+                bucket.setdefault(item, {"attempts": 0, "score_sum": 0})
+                bucket[item]["attempts"] += 1
+                bucket[item]["score_sum"] += int(score_percent or 0)
 
         by_topic = []
         for topic, stats in bucket.items():
@@ -1,5 +1,7 @@
 from datetime import datetime
-from sqlalchemy import select, update
+from typing import cast
+
+from sqlalchemy import CursorResult, delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.refresh_token import RefreshToken
@@ -34,3 +36,42 @@ class RefreshTokenRepository:
         )
         await self.session.execute(stmt)
         await self.session.commit()
+
+    async def create_many(self, rows: list[dict], commit: bool = True) -> None:
+        if rows:
+            await self.session.execute(insert(RefreshToken), rows)
+        if commit:
+            await self.session.commit()
+
+    async def existing_hashes(self, token_hashes: list[str]) -> set[str]:
+        if not token_hashes:
+            return set()
+        result = await self.session.execute(
+            select(RefreshToken.token_hash).where(RefreshToken.token_hash.in_(token_hashes))
+        )
+        return set(result.scalars().all())
+
+    async def revoke_by_hashes(self, token_hashes: list[str], commit: bool = True) -> None:
+        if token_hashes:
+            stmt = (
+                update(RefreshToken)
+                .where(RefreshToken.token_hash.in_(token_hashes))
+                .values(revoked=True)
+            )
+            await self.session.execute(stmt)
+        if commit:
+            await self.session.commit()
+
+    async def delete_expired(self, before: datetime, limit: int) -> int:
+        expired_ids = (
+            select(RefreshToken.id)
+            .where(RefreshToken.expires_at < before)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        result = cast(
+            CursorResult,
+            await self.session.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired_ids))),
+        )
+        await self.session.commit()
+        return result.rowcount or 0
@@ -24,3 +24,9 @@ class UserRepository:
         await self.session.commit()
         await self.session.refresh(user)
         return user
+
+    async def existing_ids(self, user_ids) -> set:
+        if not user_ids:
+            return set()
+        result = await self.session.execute(select(User.id).where(User.id.in_(set(user_ids))))
+        return set(result.scalars().all())
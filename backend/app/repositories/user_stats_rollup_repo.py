@@ -0,0 +1,303 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.quiz_attempt import QuizAttempt
+from app.models.user_stats_rollup import OVERALL_TOPIC, UserStatsRollup
+from app.repositories.quiz_attempt_repo import attempt_topics
+
+RECENT_ATTEMPTS_LIMIT = 20
+MIN_TOPIC_ATTEMPTS = 5
+# First key of the two-key advisory lock that serializes rollup writes per user.
+ROLLUP_LOCK_CLASS = 5001
+
+
+def _attempt_date(created_at: datetime) -> date:
+    if created_at.tzinfo is None:
+        return created_at.date()
+    return created_at.astimezone(timezone.utc).date()
+
+
+def _recent_entry(attempt_id, score_percent, created_at: datetime, mode) -> dict:
+    return {
+        "id": str(attempt_id),
+        "score_percent": int(score_percent or 0),
+        "created_at": created_at.isoformat(),
+        "mode": mode,
+    }
+
+
+def _recent_sort_key(entry: dict) -> tuple[datetime, UUID]:
+    return datetime.fromisoformat(entry["created_at"]), UUID(entry["id"])
+
+
+class UserStatsRollupRepository:
+    """Per-user totals behind the unfiltered ``GET /attempts/stats``.
+
+    One overall row (``topic == OVERALL_TOPIC``) plus one row per topic, updated
+    in the same transaction that submits an attempt. Missing rollups are rebuilt
+    from ``quiz_attempts`` on first read.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def _lock_user(self, user_id) -> None:
+        """Serialize rollup writes for ``user_id`` until the transaction ends.
+
+        A row lock is not enough: before the first rollup exists there is no
+        row to lock, and two first submissions would each rebuild without the
+        other's attempt.
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(ROLLUP_LOCK_CLASS, func.hashtext(str(user_id))))
+        )
+
+    async def record_attempt(
+        self,
+        attempt: QuizAttempt,
+        previously_counted: bool = False,
+    ) -> None:
+        """Fold a freshly submitted attempt into the rollup without committing."""
+        if attempt.user_id is None:
+            return
+        if attempt.submitted_at is None:
+            # An attempt that was counted and is now unsubmitted drops out.
+            if previously_counted:
+                await self.rebuild(attempt.user_id)
+            return
+        await self._lock_user(attempt.user_id)
+        overall = (
+            await self.session.execute(
+                select(UserStatsRollup)
+                .where(
+                    UserStatsRollup.user_id == attempt.user_id,
+                    UserStatsRollup.topic == OVERALL_TOPIC,
+                )
+                .execution_options(populate_existing=True)
+            )
+        ).scalar_one_or_none()
+        attempt_day = _attempt_date(attempt.created_at)
+        if (
+            overall is None
+            or previously_counted
+            or (overall.last_attempt_date is not None and attempt_day < overall.last_attempt_date)
+        ):
+            # Re-submissions and out-of-order dates cannot be applied as deltas.
+            await self.rebuild(attempt.user_id)
+            return
+
+        score = int(attempt.score_percent or 0)
+        last_day = overall.last_attempt_date
+        if last_day == attempt_day:
+            streak = overall.current_streak
+        elif last_day is not None and last_day == attempt_day - timedelta(days=1):
+            streak = overall.current_streak + 1
+        else:
+            streak = 1
+
+        recent = list(overall.recent_attempts or [])
+        recent.append(
+            _recent_entry(attempt.id, score, attempt.created_at, attempt.mode)
+        )
+        recent.sort(key=_recent_sort_key)
+
+        overall.attempts += 1
+        overall.score_sum += score
+        overall.best_score = max(overall.best_score, score)
+        if overall.last_attempt_at is None or attempt.created_at > overall.last_attempt_at:
+            overall.last_attempt_at = attempt.created_at
+        overall.last_attempt_date = attempt_day
+        overall.current_streak = streak
+        overall.recent_attempts = recent[-RECENT_ATTEMPTS_LIMIT:]
+
+        for topic in attempt_topics(attempt.topic, attempt.meta):
+            stmt = insert(UserStatsRollup).values(
+                user_id=attempt.user_id,
+                topic=topic,
+                attempts=1,
+                score_sum=score,
+                best_score=score,
+                current_streak=0,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserStatsRollup.user_id, UserStatsRollup.topic],
+                set_={
+                    "attempts": UserStatsRollup.attempts + 1,
+                    "score_sum": UserStatsRollup.score_sum + score,
+                    "best_score": func.greatest(UserStatsRollup.best_score, score),
+                },
+            )
+            await self.session.execute(stmt)
+        await self.session.flush()
+
+    async def rebuild(self, user_id) -> None:
+        """Recompute every rollup row for ``user_id`` from ``quiz_attempts``."""
+        await self._lock_user(user_id)
+        result = await self.session.execute(
+            select(
+                QuizAttempt.id,
+                QuizAttempt.topic,
+                QuizAttempt.score_percent,
+                QuizAttempt.meta,
+                QuizAttempt.mode,
+                QuizAttempt.created_at,
+            ).where(
+                QuizAttempt.user_id == user_id,
+                QuizAttempt.submitted_at.is_not(None),
+            )
+        )
+        attempts = 0
+        score_sum = 0
+        best_score = 0
+        last_attempt_at: datetime | None = None
+        topics: dict[str, dict[str, int]] = {}
+        dates: set[date] = set()
+        recent: list[dict] = []
+        for attempt_id, topic, score_percent, meta, mode, created_at in result.all():
+            score = int(score_percent or 0)
+            attempts += 1
+            score_sum += score
+            best_score = max(best_score, score)
+            if last_attempt_at is None or created_at > last_attempt_at:
+                last_attempt_at = created_at
+            dates.add(_attempt_date(created_at))
+            recent.append(_recent_entry(attempt_id, score, created_at, mode))
+            for item in attempt_topics(topic, meta):
+                bucket = topics.setdefault(
+                    item, {"attempts": 0, "score_sum": 0, "best_score": 0}
+                )
+                bucket["attempts"] += 1
+                bucket["score_sum"] += score
+                bucket["best_score"] = max(bucket["best_score"], score)
+
+        last_day = max(dates) if dates else None
+        streak = 0
+        cursor = last_day
+        while cursor is not None and cursor in dates:
+            streak += 1
+            cursor = cursor - timedelta(days=1)
+        recent.sort(key=_recent_sort_key)
+
+        await self.session.execute(
+            delete(UserStatsRollup)
+            .where(UserStatsRollup.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        rows = [
+            {
+                "user_id": user_id,
+                "topic": OVERALL_TOPIC,
+                "last_attempt_date": last_day,
+                "current_streak": streak,
+                "recent_attempts": recent[-RECENT_ATTEMPTS_LIMIT:],
+                "attempts": attempts,
+                "score_sum": score_sum,
+                "best_score": best_score,
+                "last_attempt_at": last_attempt_at,
+            }
+        ]
+        rows.extend(
+            {
+                "user_id": user_id,
+                "topic": topic,
+                "last_attempt_date": None,
+                "current_streak": 0,
+                "recent_attempts": None,
+                "last_attempt_at": None,
+                **values,
+            }
+            for topic, values in topics.items()
+        )
+        stmt = insert(UserStatsRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStatsRollup.user_id, UserStatsRollup.topic],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "attempts",
+                    "score_sum",
+                    "best_score",
+                    "last_attempt_at",
+                    "last_attempt_date",
+                    "current_streak",
+                    "recent_attempts",
+                )
+            }
+            | {"updated_at": func.now()},
+        )
+        await self.session.execute(stmt, rows)
+
+    async def _load(self, user_id) -> list[UserStatsRollup]:
+        result = await self.session.execute(
+            select(UserStatsRollup)
+            .where(UserStatsRollup.user_id == user_id)
+            .execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    async def stats(self, user_id) -> dict:
+        """Return the same payload as ``QuizAttemptRepository.stats`` without filters."""
+        rows = await self._load(user_id)
+        if not any(row.topic == OVERALL_TOPIC for row in rows):
+            await self.rebuild(user_id)
+            await self.session.commit()
+            rows = await self._load(user_id)
+
+        overall = next(row for row in rows if row.topic == OVERALL_TOPIC)
+        by_topic: list[dict[str, Any]] = [
+            {
+                "topic": row.topic,
+                "attempts": row.attempts,
+                "avg_score_percent": int(round(row.score_sum / row.attempts)),
+            }
+            for row in rows
+            if row.topic != OVERALL_TOPIC and row.attempts
+        ]
+        by_topic.sort(key=lambda item: item["attempts"], reverse=True)
+
+        current_streak = 0
+        if overall.last_attempt_date is not None:
+            today = datetime.now(timezone.utc).date()
+            if overall.last_attempt_date >= today - timedelta(days=1):
+                current_streak = overall.current_streak
+
+        eligible_topics = [
+            item for item in by_topic if item["attempts"] >= MIN_TOPIC_ATTEMPTS
+        ]
+        strongest_topic = None
+        weakest_topic = None
+        if eligible_topics:
+            strongest_topic = max(
+                eligible_topics, key=lambda item: item["avg_score_percent"]
+            )["topic"]
+            weakest_topic = min(
+                eligible_topics, key=lambda item: item["avg_score_percent"]
+            )["topic"]
+
+        recent_attempts = [
+            {
+                "score_percent": item["score_percent"],
+                "created_at": datetime.fromisoformat(item["created_at"]),
+                "mode": item["mode"],
+            }
+            for item in overall.recent_attempts or []
+        ]
+        avg_score = overall.score_sum / overall.attempts if overall.attempts else 0
+
+        return {
+            "total_attempts": overall.attempts,
+            "avg_score_percent": int(round(avg_score)),
+            "best_score_percent": overall.best_score,
+            "last_attempt_at": overall.last_attempt_at,
+            "by_topic": by_topic,
+            "current_streak_days": current_streak,
+            "strongest_topic": strongest_topic,
+            "weakest_topic": weakest_topic,
+            "recent_scores": [item["score_percent"] for item in recent_attempts],
+            "recent_attempts": recent_attempts,
+        }
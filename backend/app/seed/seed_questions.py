@@ -8,6 +8,7 @@ from pathlib import Path
 from app.db.session import AsyncSessionLocal
 from app.repositories.question_repo import QuestionRepository
 from app.schemas.question import QuestionCreateInternal
+from app.services.question_bank import answer_keys, question_bank
 from app.utils.enums import Difficulty, QuestionType, Topic
 
 SEED_FILE = Path(__file__).with_name("questions.seed.json")
@@ -122,6 +123,10 @@ async def seed_if_empty() -> bool:
                 type(questions[0].choices).__name__,
             )
         affected = await repo.upsert_questions_by_seed_key(questions)
+        if affected:
+            answer_keys.clear()
+            if question_bank.loaded:
+                await question_bank.reload(session)
         return affected > 0
 
 
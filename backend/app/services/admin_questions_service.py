@@ -6,6 +6,8 @@ from sqlalchemy import Select, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.question import Question
+from app.services.hint_cache import invalidate_hints
+from app.services.question_bank import answer_keys, question_bank
 
 
 def _apply_filters(
@@ -75,4 +77,7 @@ async def archive_question(session: AsyncSession, question: Question) -> Questio
         question.archived_at = datetime.now(timezone.utc)
         await session.commit()
         await session.refresh(question)
+    question_bank.remove(question.id)
+    answer_keys.discard(question.id)
+    await invalidate_hints(question.id)
     return question
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import timed
+from app.models.quiz_attempt import QuizAttempt
+from app.repositories.ai_recommendation_repo import AiRecommendationRepository
+from app.repositories.attempt_answer_repo import AttemptAnswerRepository
+from app.repositories.quiz_attempt_repo import QuizAttemptRepository
+from app.repositories.user_stats_rollup_repo import UserStatsRollupRepository
+
+
+def stats_namespace(user_id) -> str:
+    """Cache namespace for a user's stats; bump it after attempts change."""
+    return f"quizstudy:user:{user_id}:stats"
+
+
+def _owner_id(attempt: QuizAttempt) -> uuid.UUID:
+    if attempt.user_id is None:
+        raise ValueError(f"Attempt {attempt.id} has no owner")
+    return attempt.user_id
+
+
+def _answer_rows(attempt: QuizAttempt) -> list[dict]:
+    answers = attempt.answers
+    return [item for item in answers if isinstance(item, dict)] if isinstance(answers, list) else []
+
+
+async def submit_attempt(
+    session: AsyncSession,
+    attempt: QuizAttempt,
+    data: dict,
+) -> QuizAttempt:
+    """Write the submitted attempt, its answer rows, the stats rollup and the
+    recommendation completion in a single transaction.
+
+    Callers invalidate caches after this returns, i.e. after the commit.
+    """
+    with timed("attempts.submit.db"):
+        try:
+            attempt = await QuizAttemptRepository(session).update_attempt(
+                attempt, data, commit=False
+            )
+            await UserStatsRollupRepository(session).record_attempt(attempt)
+            user_id = _owner_id(attempt)
+            await AttemptAnswerRepository(session).replace_for_attempt(
+                attempt.id, user_id, _answer_rows(attempt), commit=False
+            )
+            await AiRecommendationRepository(session).complete_by_attempt(
+                user_id, attempt.id, commit=False
+            )
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+    return attempt
+
+
+async def save_attempt(
+    session: AsyncSession,
+    attempt: QuizAttempt | None,
+    data: dict,
+) -> QuizAttempt:
+    """Create an attempt, or overwrite ``attempt``, together with its answer rows."""
+    repo = QuizAttemptRepository(session)
+    rollup_repo = UserStatsRollupRepository(session)
+    with timed("attempts.save.db"):
+        try:
+            if attempt is None:
+                attempt = await repo.create_attempt(data, commit=False)
+                if attempt.submitted_at is not None:
+                    await rollup_repo.record_attempt(attempt)
+            else:
+                previously_counted = attempt.submitted_at is not None
+                attempt = await repo.update_attempt(attempt, data, commit=False)
+                if attempt.submitted_at is not None or previously_counted:
+                    await rollup_repo.record_attempt(
+                        attempt, previously_counted=previously_counted
+                    )
+            await AttemptAnswerRepository(session).replace_for_attempt(
+                attempt.id, _owner_id(attempt), _answer_rows(attempt), commit=False
+            )
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+    return attempt
@@ -5,24 +5,39 @@ from functools import lru_cache
 from hashlib import sha256
 from pathlib import Path
 import secrets
+import time
 import uuid
 import json
 
 import jwt
-from fastapi import Depends, HTTPException, Response
+from fastapi import Depends, HTTPException, Request, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.security.utils import get_authorization_scheme_param
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.cache import LocalCache, invalidate, register_local_cache
 from app.core.config import get_settings
-from app.core.redis_client import get_redis
+from app.core.metrics import increment
+from app.core.redis_client import get_redis, get_redis_real
 from app.db.session import get_session
+from app.models.user import User
 from app.repositories.refresh_token_repo import RefreshTokenRepository
 from app.repositories.user_repo import UserRepository
 from app.schemas.auth import UserOut
+from app.services import refresh_token_store
 
 settings = get_settings()
 http_bearer = HTTPBearer(auto_error=False)
 
+# Verified access-token payloads keyed by token digest. Entries never outlive
+# the token's ``exp``, so an expired token is always re-verified and rejected.
+_token_cache = LocalCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
+# Column snapshots of authenticated users; evicted on role/admin changes
+# through the shared cache invalidation channel.
+_user_cache = register_local_cache(LocalCache(settings.AUTH_USER_CACHE_MAX_ENTRIES))
+_USER_COLUMNS = ("id", "email", "password_hash", "is_admin", "role", "created_at")
+
 
 def hash_refresh_token(token: str) -> str:
     return sha256(token.encode("utf-8")).hexdigest()
@@ -55,12 +70,77 @@ def create_access_token(user_id: str, email: str) -> str:
 
 
 def decode_access_token(token: str) -> dict:
+    """Verify ``token`` and return its claims.
+
+    Verified payloads are cached per worker until ``exp`` (capped at
+    ``AUTH_TOKEN_CACHE_SECONDS``); the returned dict is shared and read-only.
+    """
+    key = sha256(token.encode("utf-8")).hexdigest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        increment("auth.token_cache.hits")
+        return cached[0]
+    increment("auth.token_cache.misses")
     try:
-        return jwt.decode(token, _load_public_key(), algorithms=[settings.JWT_ALG])
+        payload = jwt.decode(token, _load_public_key(), algorithms=[settings.JWT_ALG])
     except jwt.ExpiredSignatureError as exc:
         raise HTTPException(status_code=401, detail="Access token expired") from exc
     except jwt.InvalidTokenError as exc:
         raise HTTPException(status_code=401, detail="Invalid access token") from exc
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(settings.AUTH_TOKEN_CACHE_SECONDS, int(exp - time.time()))
+        _token_cache.set(key, payload, None, ttl)
+    return payload
+
+
+def request_token_payload(request: Request) -> dict | None:
+    """Claims of the request's bearer token, verified at most once per request.
+
+    Returns ``None`` when the header is missing or the token is invalid.
+    """
+    if hasattr(request.state, "access_token_payload"):
+        return request.state.access_token_payload
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    payload = None
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = decode_access_token(token)
+        except HTTPException:
+            payload = None
+    request.state.access_token_payload = payload
+    return payload
+
+
+def _user_cache_key(user_id) -> str:
+    return f"quizstudy:auth:user:{user_id}"
+
+
+async def get_user_cached(session: AsyncSession, user_id: uuid.UUID) -> User | None:
+    key = _user_cache_key(user_id)
+    cached = _user_cache.get(key)
+    if cached is not None:
+        increment("auth.user_cache.hits")
+        # A fresh detached instance per request; nothing is shared between
+        # sessions and the row is never re-inserted if added to one.
+        user: User | None = User(**cached[0])
+        make_transient_to_detached(user)
+        return user
+    increment("auth.user_cache.misses")
+    user = await UserRepository(session).get_by_id(user_id)
+    if user is not None:
+        _user_cache.set(
+            key,
+            {column: getattr(user, column) for column in _USER_COLUMNS},
+            None,
+            settings.AUTH_USER_CACHE_SECONDS,
+        )
+    return user
+
+
+async def invalidate_cached_user(user_id) -> None:
+    """Drop the cached user record in every worker, e.g. after a role change."""
+    await invalidate(_user_cache_key(user_id))
 
 
 async def create_oauth_state(payload: dict) -> str:
@@ -89,6 +169,7 @@ async def verify_oauth_state(state: str) -> dict:
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials | None = Depends(http_bearer),
     session: AsyncSession = Depends(get_session),
 ):
@@ -96,6 +177,7 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Missing access token")
 
     payload = decode_access_token(credentials.credentials)
+    request.state.access_token_payload = payload
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid access token")
@@ -105,8 +187,7 @@ async def get_current_user(
     except (ValueError, TypeError) as exc:
         raise HTTPException(status_code=401, detail="Invalid access token") from exc
 
-    repo = UserRepository(session)
-    user = await repo.get_by_id(user_uuid)
+    user = await get_user_cached(session, user_uuid)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
@@ -163,12 +244,18 @@ async def issue_refresh_token(session: AsyncSession, user_id) -> str:
     token = secrets.token_urlsafe(48)
     token_hash = hash_refresh_token(token)
     expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRES_DAYS)
+    redis = await get_redis_real()
+    if redis is not None:
+        # The row is written behind by the refresh token flusher.
+        await refresh_token_store.store_token(redis, user_id, token_hash, expires_at)
+        return token
+
     repo = RefreshTokenRepository(session)
     await repo.create(user_id=user_id, token_hash=token_hash, expires_at=expires_at)
-    redis = await get_redis()
+    memory = await get_redis()
     ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
-    await redis.set(
-        f"quizstudy:refresh:{token_hash}",
+    await memory.set(
+        refresh_token_store.refresh_key(token_hash),
         str(user_id),
         ex=max(ttl, 1),
     )
@@ -176,25 +263,55 @@ async def issue_refresh_token(session: AsyncSession, user_id) -> str:
 
 
 async def rotate_refresh_token(session: AsyncSession, token: str):
+    """Consume ``token`` and issue its successor.
+
+    With Redis available a live token is validated and revoked from Redis
+    alone. The database is only consulted for tokens Redis no longer holds,
+    and a token that was already rotated is rejected either way.
+    """
     token_hash = hash_refresh_token(token)
-    redis = await get_redis()
-    cached_user_id = await redis.get(f"quizstudy:refresh:{token_hash}")
+    redis = await get_redis_real()
+    if redis is not None:
+        user_id = await refresh_token_store.claim_token(redis, token_hash)
+        if user_id is not None:
+            increment("auth.refresh.fast")
+            return await issue_refresh_token(session, user_id), user_id
+        if await refresh_token_store.was_used(redis, token_hash):
+            increment("auth.refresh.reuse_detected")
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    increment("auth.refresh.slow")
     repo = RefreshTokenRepository(session)
     stored = await repo.get_by_hash(token_hash)
     if not stored or stored.revoked:
+        if stored:
+            increment("auth.refresh.reuse_detected")
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     if stored.expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=401, detail="Refresh token expired")
 
-    if cached_user_id is None:
-        ttl = int((stored.expires_at - datetime.now(timezone.utc)).total_seconds())
-        await redis.set(
-            f"quizstudy:refresh:{token_hash}",
-            str(stored.user_id),
-            ex=max(ttl, 1),
-        )
-
     await repo.revoke(stored.id)
-    await redis.delete(f"quizstudy:refresh:{token_hash}")
+    if redis is not None:
+        await refresh_token_store.mark_used(redis, token_hash, stored.expires_at)
+    else:
+        memory = await get_redis()
+        await memory.delete(refresh_token_store.refresh_key(token_hash))
     new_token = await issue_refresh_token(session, stored.user_id)
     return new_token, stored.user_id
+
+
+async def revoke_refresh_token(session: AsyncSession, token: str) -> None:
+    token_hash = hash_refresh_token(token)
+    redis = await get_redis_real()
+    if redis is not None:
+        if await refresh_token_store.claim_token(redis, token_hash) is None:
+            # Not live in Redis; the row may still exist in the database.
+            await refresh_token_store.queue_revoke(redis, token_hash)
+        return
+
+    repo = RefreshTokenRepository(session)
+    stored = await repo.get_by_hash(token_hash)
+    if stored:
+        await repo.revoke(stored.id)
+    memory = await get_redis()
+    await memory.delete(refresh_token_store.refresh_key(token_hash))
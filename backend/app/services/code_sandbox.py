@@ -0,0 +1,250 @@
+"""Warm pool of sandbox processes for candidate ``code_output`` checks.
+
+This module is imported by every sandbox child (``spawn`` start method), so it
+must stay stdlib-only at import time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import Connection
+from typing import Any
+
+from app.core.metrics import increment
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_TIMEOUT_SECONDS = 2
+_OUTPUT_LIMIT = 10000
+
+_SAFE_BUILTINS = {
+    "abs": abs, "all": all, "any": any, "bin": bin, "bool": bool,
+    "bytes": bytes, "chr": chr, "dict": dict, "divmod": divmod,
+    "enumerate": enumerate, "filter": filter, "float": float,
+    "format": format, "frozenset": frozenset, "hash": hash, "hex": hex,
+    "int": int, "iter": iter, "len": len, "list": list, "map": map,
+    "max": max, "min": min, "next": next, "oct": oct, "ord": ord,
+    "pow": pow, "print": print, "range": range, "repr": repr,
+    "reversed": reversed, "round": round, "set": set, "slice": slice,
+    "sorted": sorted, "str": str, "sum": sum, "tuple": tuple, "zip": zip,
+    "True": True, "False": False, "None": None,
+}
+"""Soft guardrail only — restricts direct builtin access but cannot prevent
+attribute traversal escapes.  Real isolation comes from process-level
+mitigations applied by _apply_isolation."""
+
+
+def _apply_isolation(keep_fds: set[int]) -> None:
+    """Clear the environment, close inherited file descriptors and apply
+    resource limits so a malicious snippet cannot exfiltrate secrets or
+    exhaust host resources.  Runs once, before the worker accepts any code."""
+    import os
+    import resource as _resource
+
+    os.environ.clear()
+
+    for fd in range(3, 256):
+        if fd in keep_fds:
+            continue
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+    try:
+        _resource.setrlimit(_resource.RLIMIT_CPU, (2, 3))
+    except (ValueError, OSError):
+        pass
+    try:
+        _resource.setrlimit(_resource.RLIMIT_AS, (256 * 1024 * 1024, 256 * 1024 * 1024))
+    except (ValueError, OSError):
+        pass
+    try:
+        _resource.setrlimit(_resource.RLIMIT_FSIZE, (0, 0))
+    except (ValueError, OSError):
+        pass
+
+
+def _exec_snippet(code: str) -> dict[str, Any]:
+    result: dict[str, Any] = {"exit_code": None, "stdout": "", "stderr": "", "timeout": False}
+    stdout_capture = io.StringIO()
+    restricted_globals = {"__builtins__": _SAFE_BUILTINS.copy()}
+    restricted_globals["__builtins__"]["print"] = (
+        lambda *args, **kwargs: print(
+            *args, **{**kwargs, "file": stdout_capture}
+        )
+    )
+    try:
+        exec(code, restricted_globals)  # noqa: S102
+        result["exit_code"] = 0
+    except Exception as exc:
+        result["exit_code"] = 1
+        result["stderr"] = str(exc)[:_OUTPUT_LIMIT]
+    finally:
+        result["stdout"] = stdout_capture.getvalue()[:_OUTPUT_LIMIT]
+    return result
+
+
+def _sandbox_main(conn: Connection, max_runs: int) -> None:
+    """Child entry point: isolate, then execute up to ``max_runs`` snippets.
+
+    RLIMIT_CPU is per process, so every run after the first shares the
+    remaining CPU budget; keep ``max_runs`` at 1 unless snippets are trivial.
+    """
+    _apply_isolation({conn.fileno()})
+    for _ in range(max_runs):
+        try:
+            code = conn.recv()
+        except EOFError:
+            return
+        conn.send(_exec_snippet(code))
+    conn.close()
+
+
+class _SandboxWorker:
+    def __init__(self, ctx, max_runs: int) -> None:
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_sandbox_main, args=(child_conn, max_runs), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.runs_left = max_runs
+
+    def discard(self) -> None:
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+class SandboxPool:
+    """Pre-started sandbox processes fed over a pipe.
+
+    Each worker runs ``max_runs`` snippets and is then replaced in the
+    background, so callers normally never pay the interpreter start-up cost.
+    At most ``size`` snippets execute at once.
+    """
+
+    def __init__(self, size: int, max_runs: int = 1) -> None:
+        self.size = size
+        self.max_runs = max_runs
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.SimpleQueue[_SandboxWorker] = queue.SimpleQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._replenish()
+
+    def _spawn_idle(self) -> None:
+        try:
+            worker = _SandboxWorker(self._ctx, self.max_runs)
+        except Exception:
+            logger.exception("Failed to start sandbox worker")
+            return
+        if self._closed:
+            worker.discard()
+            return
+        self._idle.put(worker)
+
+    def _replenish(self) -> None:
+        threading.Thread(target=self._spawn_idle, daemon=True).start()
+
+    def _acquire(self) -> _SandboxWorker:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                increment("sandbox.cold_starts")
+                return _SandboxWorker(self._ctx, self.max_runs)
+            if worker.process.is_alive():
+                return worker
+            worker.discard()
+            self._replenish()
+
+    def run(self, code: str, timeout: float = SANDBOX_TIMEOUT_SECONDS) -> dict[str, Any]:
+        """Execute ``code`` in a sandbox worker. Blocking; call from a thread."""
+        self.start()
+        with self._slots:
+            worker = self._acquire()
+            reusable = False
+            try:
+                worker.conn.send(code)
+                if worker.conn.poll(timeout):
+                    result = worker.conn.recv()
+                    worker.runs_left -= 1
+                    reusable = worker.runs_left > 0
+                else:
+                    increment("sandbox.timeouts")
+                    result = {"exit_code": None, "stdout": "", "stderr": "", "timeout": True}
+            except (EOFError, OSError):
+                # Killed by a resource limit (SIGXCPU, MemoryError at exit, ...).
+                result = {
+                    "exit_code": 1,
+                    "stdout": "",
+                    "stderr": "sandbox worker exited",
+                    "timeout": False,
+                }
+            increment("sandbox.runs")
+            if reusable and not self._closed:
+                self._idle.put(worker)
+            else:
+                worker.discard()
+                if not self._closed:
+                    self._replenish()
+            return result
+
+    def shutdown(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().discard()
+            except queue.Empty:
+                break
+
+
+_pool: SandboxPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from app.core.config import get_settings
+
+            settings = get_settings()
+            _pool = SandboxPool(
+                settings.SANDBOX_POOL_SIZE,
+                max_runs=settings.SANDBOX_MAX_RUNS_PER_WORKER,
+            )
+        return _pool
+
+
+async def run_sandboxed(code: str) -> dict[str, Any]:
+    return await asyncio.to_thread(get_sandbox_pool().run, code)
+
+
+def shutdown_sandbox_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
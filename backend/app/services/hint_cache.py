@@ -0,0 +1,118 @@
+"""Content-addressed cache of generated hints.
+
+A hint depends only on the question content, the hint level and the user's
+answer, so entries are keyed by question id, ``updated_at``, level and a digest
+of the normalized answer. Editing a question moves its ``updated_at`` and
+therefore its keys; archiving also bumps the question's cache generation so
+the old pools are dropped right away.
+
+Each key holds a small pool of up to ``HINT_CACHE_VARIANTS`` hints. Misses
+call the LLM and add to the pool until it is full; after that a random
+variant is served without touching the LLM.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import random
+from typing import Any
+from uuid import UUID
+
+from app.core.cache import bump_generation, namespaced_key
+from app.core.config import get_settings
+from app.core.metrics import counter_stats, increment
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+HINT_NAMESPACE_PREFIX = "quizstudy:hints:"
+
+
+def _namespace(question_id: UUID | str) -> str:
+    return f"{HINT_NAMESPACE_PREFIX}{question_id}"
+
+
+def normalize_answer(answer: str | None) -> str:
+    return " ".join((answer or "").split()).casefold()
+
+
+async def hint_cache_key(question, level: int, user_answer: str | None) -> str:
+    updated_at = question.updated_at
+    version = updated_at.isoformat() if updated_at is not None else "0"
+    answer_digest = hashlib.sha1(normalize_answer(user_answer).encode()).hexdigest()[:16]
+    return await namespaced_key(
+        _namespace(question.id), f"{version}:{level}:{answer_digest}"
+    )
+
+
+async def _read_pool(key: str) -> list[str]:
+    redis = await get_redis()
+    try:
+        raw = await redis.get(key)
+    except Exception:
+        logger.warning("Failed to read hint cache key=%s", key, exc_info=True)
+        increment("hints.cache.errors")
+        return []
+    if raw is None:
+        return []
+    try:
+        variants = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return [item for item in variants if isinstance(item, str)] if isinstance(variants, list) else []
+
+
+async def get_cached_hint(key: str) -> str | None:
+    """Return a pooled hint for ``key`` once its pool is full, else ``None``."""
+    pool_size = get_settings().HINT_CACHE_VARIANTS
+    if pool_size <= 0:
+        return None
+    variants = await _read_pool(key)
+    if len(variants) >= pool_size:
+        increment("hints.cache.hits")
+        return random.choice(variants)
+    increment("hints.cache.misses")
+    return None
+
+
+async def store_hint(key: str, hint: str) -> None:
+    """Add ``hint`` to the pool for ``key``.
+
+    Concurrent writers may overwrite each other's variant; that only delays
+    filling the pool.
+    """
+    settings = get_settings()
+    if settings.HINT_CACHE_VARIANTS <= 0 or not hint.strip():
+        return
+    variants = await _read_pool(key)
+    if hint in variants or len(variants) >= settings.HINT_CACHE_VARIANTS:
+        return
+    variants.append(hint)
+    redis = await get_redis()
+    try:
+        await redis.set(key, json.dumps(variants), ex=settings.HINT_CACHE_TTL_SECONDS)
+    except Exception:
+        logger.warning("Failed to write hint cache key=%s", key, exc_info=True)
+        increment("hints.cache.errors")
+        return
+    increment("hints.cache.stores")
+
+
+async def invalidate_hints(question_id: UUID | str) -> None:
+    await bump_generation(_namespace(question_id))
+
+
+def hint_cache_stats() -> dict[str, Any]:
+    counters = counter_stats()
+    hits = counters.get("hints.cache.hits", 0)
+    misses = counters.get("hints.cache.misses", 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "stores": counters.get("hints.cache.stores", 0),
+        "errors": counters.get("hints.cache.errors", 0),
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+    }
@@ -0,0 +1,122 @@
+"""Bounded thread pool for bcrypt password hashing and verification.
+
+A bcrypt round costs 100-300 ms of CPU. Running it on the event loop stalls
+every other request in the worker, so hashing runs on a dedicated pool
+instead. The ``bcrypt`` backend releases the GIL while hashing, which lets
+threads hash in parallel without the pickling overhead of a process pool.
+Work beyond ``workers + max_queue`` pending calls is rejected with
+``PasswordHasherBusy`` rather than queued without limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from passlib.context import CryptContext
+
+from app.core.metrics import increment, record_latency
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queued": self._pending - self._running,
+        }
+
+    def _run(self, name: str, submitted: float, func: Callable[..., T], *args: Any) -> T:
+        started = time.perf_counter()
+        record_latency("passwords.queue_wait", started - submitted)
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+            record_latency(f"passwords.{name}", time.perf_counter() - started)
+
+    def _release(self, _future: Future | None = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _submit(self, name: str, func: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                increment("passwords.rejected")
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._run, name, time.perf_counter(), func, *args)
+        except Exception:
+            self._release()
+            raise
+        # A cancelled caller (e.g. a client disconnect) does not stop a hash
+        # that is already running, so the slot is freed only once the executor
+        # is done with the call, or drops it from its queue.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", pwd_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._submit("verify", pwd_context.verify, password, password_hash)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: PasswordHasher | None = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            from app.core.config import get_settings
+
+            settings = get_settings()
+            _hasher = PasswordHasher(
+                settings.PASSWORD_HASH_WORKERS,
+                max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+            )
+        return _hasher
+
+
+def password_hasher_stats() -> dict[str, int]:
+    return _hasher.stats() if _hasher is not None else {}
+
+
+def shutdown_password_hasher() -> None:
+    global _hasher
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+            _hasher = None
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import increment
+from app.db import session as db_session
+from app.models.question import Question
+
+logger = logging.getLogger(__name__)
+
+BucketKey = tuple[str, str, str]
+
+
+def normalize_answer(value: str) -> str:
+    return value.replace("\r\n", "\n").strip()
+
+
+def _as_str(value) -> str | None:
+    if value is None:
+        return None
+    return value.value if hasattr(value, "value") else str(value)
+
+
+class QuestionBankIndex:
+    """Per-worker index of active question ids grouped by (topic, difficulty, type).
+
+    Sampling picks ``k`` random positions across the matching buckets, so quiz
+    generation no longer sorts the filtered ``questions`` table on every request.
+    Rows are fetched afterwards by primary key.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[BucketKey, list[uuid.UUID]] = {}
+        self._positions: dict[uuid.UUID, tuple[BucketKey, int]] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    async def load(self, session: AsyncSession) -> int:
+        result = await session.execute(
+            select(
+                Question.id,
+                Question.topic,
+                Question.difficulty,
+                Question.type,
+                Question.correct_answer,
+            ).where(Question.archived_at.is_(None))
+        )
+        buckets: dict[BucketKey, list[uuid.UUID]] = {}
+        positions: dict[uuid.UUID, tuple[BucketKey, int]] = {}
+        keys: dict[uuid.UUID, str] = {}
+        for question_id, topic, difficulty, qtype, correct_answer in result.all():
+            key = (str(topic), str(difficulty), str(qtype))
+            bucket = buckets.setdefault(key, [])
+            positions[question_id] = (key, len(bucket))
+            bucket.append(question_id)
+            keys[question_id] = normalize_answer(correct_answer)
+        self._buckets = buckets
+        self._positions = positions
+        self._loaded_at = time.monotonic()
+        answer_keys.replace(keys)
+        logger.info("Question bank loaded: %d questions in %d buckets", len(positions), len(buckets))
+        return len(positions)
+
+    async def reload(self, session: AsyncSession) -> int:
+        async with self._lock:
+            return await self.load(session)
+
+    async def ensure_loaded(self, session: AsyncSession, max_age: int) -> None:
+        """Load on first use and re-load once the snapshot is older than ``max_age``.
+
+        Other workers only see publish/archive changes through this refresh.
+        """
+        if self._is_fresh(max_age):
+            return
+        async with self._lock:
+            if self._is_fresh(max_age):
+                return
+            await self.load(session)
+
+    def _is_fresh(self, max_age: int) -> bool:
+        if self._loaded_at is None:
+            return False
+        return (time.monotonic() - self._loaded_at) < max_age
+
+    def add(self, question_id: uuid.UUID, topic, difficulty, qtype) -> None:
+        if not self.loaded:
+            return
+        self.remove(question_id)
+        key = (_as_str(topic) or "", _as_str(difficulty) or "", _as_str(qtype) or "")
+        bucket = self._buckets.setdefault(key, [])
+        self._positions[question_id] = (key, len(bucket))
+        bucket.append(question_id)
+
+    def remove(self, question_id: uuid.UUID) -> bool:
+        entry = self._positions.pop(question_id, None)
+        if entry is None:
+            return False
+        key, index = entry
+        bucket = self._buckets[key]
+        last = bucket.pop()
+        if index < len(bucket):
+            bucket[index] = last
+            self._positions[last] = (key, index)
+        return True
+
+    def _matching(
+        self,
+        topics: Iterable | None,
+        difficulty,
+        qtype,
+    ) -> list[list[uuid.UUID]]:
+        topic_set = {_as_str(item) for item in topics} if topics else None
+        difficulty_value = _as_str(difficulty)
+        qtype_value = _as_str(qtype)
+        matched: list[list[uuid.UUID]] = []
+        for (topic, bucket_difficulty, bucket_type), bucket in self._buckets.items():
+            if not bucket:
+                continue
+            if topic_set is not None and topic not in topic_set:
+                continue
+            if difficulty_value is not None and bucket_difficulty != difficulty_value:
+                continue
+            if qtype_value is not None and bucket_type != qtype_value:
+                continue
+            matched.append(bucket)
+        return matched
+
+    def count(self, topics: Iterable | None = None, difficulty=None, qtype=None) -> int:
+        return sum(len(bucket) for bucket in self._matching(topics, difficulty, qtype))
+
+    def sample(
+        self,
+        k: int,
+        topics: Iterable | None = None,
+        difficulty=None,
+        qtype=None,
+    ) -> list[uuid.UUID]:
+        """Return up to ``k`` distinct random ids matching the filter."""
+        buckets = self._matching(topics, difficulty, qtype)
+        total = sum(len(bucket) for bucket in buckets)
+        if total == 0 or k <= 0:
+            return []
+        picked: list[uuid.UUID] = []
+        for offset in random.sample(range(total), min(k, total)):
+            for bucket in buckets:
+                if offset < len(bucket):
+                    picked.append(bucket[offset])
+                    break
+                offset -= len(bucket)
+        return picked
+
+
+class AnswerKeyCache:
+    """Per-worker map of question id to normalized ``correct_answer``.
+
+    Filled from the question bank load and lazily for anything else (e.g.
+    archived questions still referenced by an attempt), so exam scoring does not
+    materialize full ``Question`` rows.
+    """
+
+    def __init__(self) -> None:
+        self._keys: dict[uuid.UUID, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def replace(self, keys: dict[uuid.UUID, str]) -> None:
+        self._keys = keys
+
+    def set(self, question_id: uuid.UUID, correct_answer: str) -> None:
+        self._keys[question_id] = normalize_answer(correct_answer)
+
+    def discard(self, question_id: uuid.UUID) -> None:
+        self._keys.pop(question_id, None)
+
+    def clear(self) -> None:
+        self._keys = {}
+
+    async def get_many(
+        self,
+        session: AsyncSession,
+        question_ids: Iterable[uuid.UUID],
+    ) -> dict[uuid.UUID, str]:
+        found: dict[uuid.UUID, str] = {}
+        misses: list[uuid.UUID] = []
+        for question_id in question_ids:
+            answer = self._keys.get(question_id)
+            if answer is None:
+                misses.append(question_id)
+            else:
+                found[question_id] = answer
+        increment("answer_keys.hits", len(found))
+        if misses:
+            increment("answer_keys.misses", len(misses))
+            result = await session.execute(
+                select(Question.id, Question.correct_answer).where(Question.id.in_(misses))
+            )
+            for question_id, correct_answer in result.all():
+                answer = normalize_answer(correct_answer)
+                self._keys[question_id] = answer
+                found[question_id] = answer
+        return found
+
+
+answer_keys = AnswerKeyCache()
+question_bank = QuestionBankIndex()
+
+
+async def load_question_bank() -> int:
+    """Warm the bank at startup; quiz generation loads it on first use otherwise."""
+    try:
+        async with db_session.AsyncSessionLocal() as session:
+            return await question_bank.reload(session)
+    except Exception:
+        logger.warning("Question bank preload failed; loading on first use", exc_info=True)
+        return 0
@@ -1,23 +1,31 @@
 from __future__ import annotations
 
 import hashlib
-import io
 import json
 import asyncio
-import multiprocessing
 import re
-import threading
+import time
+import uuid
+from collections.abc import Sequence
 from typing import Any
 
 from datetime import datetime, timezone
-from sqlalchemy import select, and_, or_
+import numpy as np
+from sqlalchemy import select, and_, insert, literal, or_, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.config import get_settings
+from app.core.metrics import record_latency
 from app.models.question_candidate import QuestionCandidate
 from app.models.question import Question
 from app.schemas.question_payload import validate_candidate_payload
+from app.services.code_sandbox import run_sandboxed
+from app.services.question_bank import answer_keys, question_bank
+from app.services.simhash_index import INDEXED_CANDIDATE_STATUSES, get_near_duplicates
 
-_DEDUP_STATUSES = {"validated", "approved", "published"}
+_DEDUP_STATUSES = set(INDEXED_CANDIDATE_STATUSES)
+_NEAR_DUPLICATE_REPORT_LIMIT = 10
 
 
 def _missing_required_fields(item: dict[str, Any]) -> bool:
@@ -29,7 +37,7 @@ async def record_parse_failure(
     topic: str,
     difficulty: str,
     qtype: str | None,
-    raw_output: str,
+    raw_output: str | None,
     error: str,
     prompt_version: str | None,
     source_model: str,
@@ -59,43 +67,56 @@ async def create_candidates_from_items(
     prompt_version: str | None,
     source_model: str,
 ) -> tuple[list[str], int]:
+    """Insert generated and failed candidates with one multi-row INSERT.
+
+    Ids are generated client-side, so no per-row flush is needed to learn them.
+    """
     created_ids: list[str] = []
     failed = 0
+    rows: list[dict[str, Any]] = []
 
     for item in items:
         if not isinstance(item, dict):
             failed += 1
             continue
 
+        candidate_id = uuid.uuid4()
         if _missing_required_fields(item):
             failed += 1
-            candidate = QuestionCandidate(
-                topic=fallback_topic,
-                difficulty=fallback_difficulty,
-                type=fallback_type or "unknown",
-                payload_json=item,
-                status="failed",
-                validation_report_json={"error": "missing required fields"},
-                raw_ai_output=None,
-                prompt_version=prompt_version,
-                source_model=source_model,
+            rows.append(
+                {
+                    "id": candidate_id,
+                    "topic": fallback_topic,
+                    "difficulty": fallback_difficulty,
+                    "type": fallback_type or "unknown",
+                    "payload_json": item,
+                    "status": "failed",
+                    "validation_report_json": {"error": "missing required fields"},
+                    "raw_ai_output": None,
+                    "prompt_version": prompt_version,
+                    "source_model": source_model,
+                }
             )
-            session.add(candidate)
             continue
 
-        candidate = QuestionCandidate(
-            topic=str(item.get("topic")),
-            difficulty=str(item.get("difficulty")),
-            type=str(item.get("type")),
-            payload_json=item,
-            status="generated",
-            prompt_version=prompt_version,
-            source_model=source_model,
+        rows.append(
+            {
+                "id": candidate_id,
+                "topic": str(item.get("topic")),
+                "difficulty": str(item.get("difficulty")),
+                "type": str(item.get("type")),
+                "payload_json": item,
+                "status": "generated",
+                "validation_report_json": None,
+                "raw_ai_output": None,
+                "prompt_version": prompt_version,
+                "source_model": source_model,
+            }
         )
-        session.add(candidate)
-        await session.flush()
-        created_ids.append(str(candidate.id))
+        created_ids.append(str(candidate_id))
 
+    if rows:
+        await session.execute(insert(QuestionCandidate), rows)
     await session.commit()
     return created_ids, failed
 
@@ -138,6 +159,65 @@ def _simhash64(text: str) -> str:
     return f"{result:016x}"
 
 
+_SIMHASH_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+_SIMHASH_CHUNK_TOKENS = 1 << 18
+
+
+def _pack_simhash_votes(votes: np.ndarray, docs: list[list[int]], token_count: int) -> list[str]:
+    lengths = np.fromiter((len(ids) for ids in docs), dtype=np.int64, count=len(docs))
+    offsets = np.zeros(len(docs), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    flat = np.fromiter((index for ids in docs for index in ids), dtype=np.int64, count=token_count)
+    scores = np.add.reduceat(votes[flat], offsets, axis=0)
+    packed = ((scores >= 0).astype(np.uint64) << _SIMHASH_BIT_SHIFTS).sum(
+        axis=1, dtype=np.uint64
+    )
+    return [f"{int(value):016x}" for value in packed]
+
+
+def _simhash64_many(texts: Sequence[str]) -> list[str]:
+    """Batched ``_simhash64``: identical fingerprints, computed with NumPy.
+
+    Each distinct token is hashed once for the whole batch; bit votes are
+    summed per text with ``np.add.reduceat`` in chunks of about
+    ``_SIMHASH_CHUNK_TOKENS`` tokens to bound memory.
+    """
+    if not texts:
+        return []
+    token_ids: dict[str, int] = {}
+    prefixes: list[bytes] = []
+    docs: list[list[int]] = []
+    for text in texts:
+        tokens = text.split() or [text]
+        ids = []
+        for token in tokens:
+            index = token_ids.get(token)
+            if index is None:
+                index = len(prefixes)
+                token_ids[token] = index
+                prefixes.append(hashlib.sha256(token.encode("utf-8")).digest()[:8])
+            ids.append(index)
+        docs.append(ids)
+
+    values = np.frombuffer(b"".join(prefixes), dtype=">u8").astype(np.uint64)
+    bits = ((values[:, None] >> _SIMHASH_BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+    votes = bits * 2 - 1
+
+    fingerprints: list[str] = []
+    chunk: list[list[int]] = []
+    chunk_tokens = 0
+    for ids in docs:
+        chunk.append(ids)
+        chunk_tokens += len(ids)
+        if chunk_tokens >= _SIMHASH_CHUNK_TOKENS:
+            fingerprints.extend(_pack_simhash_votes(votes, chunk, chunk_tokens))
+            chunk = []
+            chunk_tokens = 0
+    if chunk:
+        fingerprints.extend(_pack_simhash_votes(votes, chunk, chunk_tokens))
+    return fingerprints
+
+
 _CODE_FENCE_RE = re.compile(r"```(?:\w+)?\n([\s\S]*?)```")
 
 
@@ -175,98 +255,8 @@ def _question_to_payload(question: Question) -> dict[str, Any]:
     }
 
 
-_SAFE_BUILTINS = {
-    "abs": abs, "all": all, "any": any, "bin": bin, "bool": bool,
-    "bytes": bytes, "chr": chr, "dict": dict, "divmod": divmod,
-    "enumerate": enumerate, "filter": filter, "float": float,
-    "format": format, "frozenset": frozenset, "hash": hash, "hex": hex,
-    "int": int, "iter": iter, "len": len, "list": list, "map": map,
-    "max": max, "min": min, "next": next, "oct": oct, "ord": ord,
-    "pow": pow, "print": print, "range": range, "repr": repr,
-    "reversed": reversed, "round": round, "set": set, "slice": slice,
-    "sorted": sorted, "str": str, "sum": sum, "tuple": tuple, "zip": zip,
-    "True": True, "False": False, "None": None,
-}
-"""Soft guardrail only — restricts direct builtin access but cannot prevent
-attribute traversal escapes.  Real isolation comes from process-level
-mitigations applied inside _exec_in_process."""
-
-
-def _exec_in_process(code: str, result_dict: dict[str, Any]) -> None:
-    """Run *code* in an isolated child process.
-
-    Builtins are restricted as a soft guardrail but the true trust boundary is
-    the process itself.  Before executing user code we clear the environment,
-    close inherited file descriptors, and apply resource limits so a malicious
-    snippet cannot exfiltrate secrets or exhaust host resources.
-    """
-    import os
-    import sys
-    import resource as _resource
-
-    os.environ.clear()
-
-    for fd in range(3, 256):
-        try:
-            os.close(fd)
-        except OSError:
-            pass
-
-    try:
-        _resource.setrlimit(_resource.RLIMIT_CPU, (2, 3))
-    except (ValueError, OSError):
-        pass
-    try:
-        _resource.setrlimit(_resource.RLIMIT_AS, (256 * 1024 * 1024, 256 * 1024 * 1024))
-    except (ValueError, OSError):
-        pass
-    try:
-        _resource.setrlimit(_resource.RLIMIT_FSIZE, (0, 0))
-    except (ValueError, OSError):
-        pass
-
-    stdout_capture = io.StringIO()
-    restricted_globals = {"__builtins__": _SAFE_BUILTINS.copy()}
-    restricted_globals["__builtins__"]["print"] = (
-        lambda *args, **kwargs: print(
-            *args, **{**kwargs, "file": stdout_capture}
-        )
-    )
-    try:
-        exec(code, restricted_globals)  # noqa: S102
-        result_dict["exit_code"] = 0
-    except Exception as exc:
-        result_dict["exit_code"] = 1
-        result_dict["stderr"] = str(exc)[:10000]
-    finally:
-        result_dict["stdout"] = stdout_capture.getvalue()[:10000]
-
-
 async def _run_code_check(code: str, expected_output: str) -> dict[str, Any]:
-    def _run() -> dict[str, Any]:
-        ctx = multiprocessing.get_context("spawn")
-        manager = ctx.Manager()
-        try:
-            result_dict = manager.dict(
-                {"exit_code": None, "stdout": "", "stderr": "", "timeout": False}
-            )
-            proc = ctx.Process(
-                target=_exec_in_process, args=(code, result_dict)
-            )
-            proc.start()
-            proc.join(timeout=2)
-            if proc.is_alive():
-                proc.terminate()
-                proc.join(timeout=1)
-                if proc.is_alive():
-                    proc.kill()
-                    proc.join(timeout=1)
-                result_dict["timeout"] = True
-            return dict(result_dict)
-        finally:
-            manager.shutdown()
-
-    result = await asyncio.to_thread(_run)
+    result = await run_sandboxed(code)
     ok = (
         not result["timeout"]
         and result["exit_code"] == 0
@@ -275,6 +265,14 @@ async def _run_code_check(code: str, expected_output: str) -> dict[str, Any]:
     return {"ok": ok, **result}
 
 
+def _near_duplicate_report(simhash: str, candidate_id) -> list[dict[str, Any]]:
+    matches = get_near_duplicates().query(simhash, exclude=[("candidate", candidate_id)])
+    return [
+        {"kind": kind, "id": str(item_id), "distance": distance}
+        for kind, item_id, distance in matches[:_NEAR_DUPLICATE_REPORT_LIMIT]
+    ]
+
+
 async def validate_candidate(
     session: AsyncSession,
     candidate: QuestionCandidate,
@@ -331,7 +329,11 @@ async def validate_candidate(
         await session.refresh(candidate)
         return candidate
 
-    report["dedupe"] = {"ok": True}
+    await get_near_duplicates().ensure_loaded(session, get_settings().QUESTION_BANK_REFRESH_SECONDS)
+    report["dedupe"] = {
+        "ok": True,
+        "near_duplicates": _near_duplicate_report(simhash, candidate.id),
+    }
 
     if normalized.get("type") == "code_output":
         code_report = await _run_code_check(
@@ -350,6 +352,7 @@ async def validate_candidate(
     candidate.validation_report_json = report
     await session.commit()
     await session.refresh(candidate)
+    get_near_duplicates().add("candidate", candidate.id, simhash)
     return candidate
 
 
@@ -381,18 +384,176 @@ async def get_candidate_by_id(
 async def validate_candidates_batch(
     session: AsyncSession,
     limit: int,
-) -> list[QuestionCandidate]:
+) -> tuple[list[QuestionCandidate], dict[str, float]]:
+    """Validate up to ``limit`` generated candidates in one pass.
+
+    Equivalent to calling ``validate_candidate`` on each candidate in
+    ``created_at`` order, but duplicate lookups are prefetched in one query,
+    code checks run concurrently on the sandbox pool and all results are
+    written with a single bulk UPDATE. Returns the candidates and per-phase
+    timings in milliseconds.
+    """
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    phase_started = started
+
+    def _phase(name: str) -> None:
+        nonlocal phase_started
+        now = time.perf_counter()
+        timings[name] = round((now - phase_started) * 1000, 2)
+        phase_started = now
+
     result = await session.execute(
         select(QuestionCandidate)
         .where(QuestionCandidate.status == "generated")
         .order_by(QuestionCandidate.created_at.asc())
         .limit(limit)
     )
-    items = result.scalars().all()
-    validated: list[QuestionCandidate] = []
+    items = list(result.scalars().all())
+    _phase("fetch_ms")
+
+    outcomes: dict[Any, dict[str, Any]] = {}
+    normalized_by_id: dict[Any, dict[str, Any]] = {}
+    for candidate in items:
+        schema_ok, normalized, errors = validate_candidate_payload(candidate.payload_json)
+        report: dict[str, Any] = {"schema": {"ok": schema_ok, "errors": errors}}
+        outcomes[candidate.id] = {
+            "status": "failed",
+            "report": report,
+            "simhash": candidate.simhash,
+        }
+        if schema_ok and normalized is not None:
+            normalized_by_id[candidate.id] = normalized
+    fingerprints = _simhash64_many(
+        [_stable_string(normalized) for normalized in normalized_by_id.values()]
+    )
+    for cid, simhash in zip(normalized_by_id, fingerprints):
+        outcomes[cid]["simhash"] = simhash
+    _phase("schema_ms")
+
+    simhashes = {outcomes[cid]["simhash"] for cid in normalized_by_id}
+    duplicate_candidates: dict[str, str] = {}
+    duplicate_questions: dict[str, str] = {}
+    if simhashes:
+        collisions = union_all(
+            select(
+                literal("candidate").label("kind"),
+                QuestionCandidate.simhash.label("simhash"),
+                QuestionCandidate.id.label("id"),
+            ).where(
+                QuestionCandidate.simhash.in_(simhashes),
+                QuestionCandidate.status.in_(_DEDUP_STATUSES),
+                QuestionCandidate.id.not_in([item.id for item in items]),
+            ),
+            select(
+                literal("question").label("kind"),
+                Question.simhash.label("simhash"),
+                Question.id.label("id"),
+            ).where(Question.simhash.in_(simhashes)),
+        )
+        for kind, collision, row_id in (await session.execute(collisions)).all():
+            if collision is None:
+                continue
+            target = duplicate_candidates if kind == "candidate" else duplicate_questions
+            target.setdefault(collision, str(row_id))
+        await get_near_duplicates().ensure_loaded(
+            session, get_settings().QUESTION_BANK_REFRESH_SECONDS
+        )
+    _phase("dedupe_prefetch_ms")
+
+    code_targets = [
+        cid
+        for cid, normalized in normalized_by_id.items()
+        if normalized.get("type") == "code_output"
+        and outcomes[cid]["simhash"] not in duplicate_candidates
+        and outcomes[cid]["simhash"] not in duplicate_questions
+    ]
+    code_reports: dict[Any, dict[str, Any]] = {}
+    if code_targets:
+        semaphore = asyncio.Semaphore(max(1, get_settings().SANDBOX_POOL_SIZE))
+
+        async def _check(cid) -> None:
+            normalized = normalized_by_id[cid]
+            async with semaphore:
+                code_reports[cid] = await _run_code_check(
+                    normalized.get("code") or "",
+                    normalized.get("expected_output") or "",
+                )
+
+        await asyncio.gather(*[_check(cid) for cid in code_targets])
+    _phase("code_checks_ms")
+
+    # Resolve in created_at order so a candidate validated earlier in this
+    # batch blocks later duplicates, as sequential validation would.
+    validated_in_batch: dict[str, str] = {}
     for candidate in items:
-        validated.append(await validate_candidate(session, candidate))
-    return validated
+        outcome = outcomes[candidate.id]
+        if candidate.id not in normalized_by_id:
+            continue
+        report = outcome["report"]
+        simhash = outcome["simhash"]
+        duplicate_candidate_id = duplicate_candidates.get(simhash) or validated_in_batch.get(
+            simhash
+        )
+        if duplicate_candidate_id:
+            report["dedupe"] = {
+                "ok": False,
+                "reason": "duplicate_candidate",
+                "candidate_id": duplicate_candidate_id,
+            }
+            continue
+        if simhash in duplicate_questions:
+            report["dedupe"] = {
+                "ok": False,
+                "reason": "duplicate_question",
+                "question_id": duplicate_questions[simhash],
+            }
+            continue
+        report["dedupe"] = {
+            "ok": True,
+            "near_duplicates": _near_duplicate_report(simhash, candidate.id),
+        }
+        if candidate.id in code_reports:
+            report["code_output"] = code_reports[candidate.id]
+            if not code_reports[candidate.id].get("ok"):
+                continue
+        outcome["status"] = "validated"
+        validated_in_batch[simhash] = str(candidate.id)
+        get_near_duplicates().add("candidate", candidate.id, simhash)
+
+    if items:
+        now = datetime.now(timezone.utc)
+        await session.execute(
+            update(QuestionCandidate),
+            [
+                {
+                    "id": candidate.id,
+                    "status": outcomes[candidate.id]["status"],
+                    "validation_report_json": outcomes[candidate.id]["report"],
+                    "simhash": outcomes[candidate.id]["simhash"],
+                    "updated_at": now,
+                }
+                for candidate in items
+            ],
+        )
+        try:
+            await session.commit()
+        except Exception:
+            for candidate in items:
+                if outcomes[candidate.id]["status"] == "validated":
+                    get_near_duplicates().remove("candidate", candidate.id)
+            raise
+        for candidate in items:
+            outcome = outcomes[candidate.id]
+            set_committed_value(candidate, "status", outcome["status"])
+            set_committed_value(candidate, "validation_report_json", outcome["report"])
+            set_committed_value(candidate, "simhash", outcome["simhash"])
+            set_committed_value(candidate, "updated_at", now)
+    _phase("write_ms")
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    for name, value in timings.items():
+        record_latency(f"candidates.validate_batch.{name[:-3]}", value / 1000)
+    return items, timings
 
 
 def _merge_report(report: dict | None, patch: dict) -> dict:
@@ -453,6 +614,7 @@ async def reject_candidate(
     candidate.status = "rejected"
     await session.commit()
     await session.refresh(candidate)
+    get_near_duplicates().remove("candidate", candidate.id)
     return candidate
 
 
@@ -483,6 +645,11 @@ def _payload_to_question_fields(payload: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+def _question_seed_key(fields: dict[str, Any]) -> str:
+    seed_payload = f"{fields['topic']}|{fields['difficulty']}|{fields['type']}|{fields['prompt']}|{fields.get('code') or ''}"
+    return hashlib.sha256(seed_payload.encode("utf-8")).hexdigest()[:64]
+
+
 async def publish_candidate(
     session: AsyncSession,
     candidate: QuestionCandidate,
@@ -545,6 +712,7 @@ async def publish_candidate(
         )
         await session.commit()
         await session.refresh(candidate)
+        get_near_duplicates().remove("candidate", candidate.id)
         return candidate, None
 
     fields = _payload_to_question_fields(normalized)
@@ -575,11 +743,10 @@ async def publish_candidate(
         existing_stmt = existing_stmt.where(Question.prompt == fields["prompt"])
     existing = await session.execute(existing_stmt)
     question = existing.scalar_one_or_none()
+    created = question is None
     if not question:
-        seed_payload = f"{fields['topic']}|{fields['difficulty']}|{fields['type']}|{fields['prompt']}|{fields.get('code') or ''}"
-        seed_key = hashlib.sha256(seed_payload.encode("utf-8")).hexdigest()[:64]
         q_simhash = _simhash64(_stable_string(normalized))
-        question = Question(**fields, seed_key=seed_key, simhash=q_simhash)
+        question = Question(**fields, seed_key=_question_seed_key(fields), simhash=q_simhash)
         session.add(question)
         await session.flush()
 
@@ -591,9 +758,140 @@ async def publish_candidate(
     )
     await session.commit()
     await session.refresh(candidate)
+    if created:
+        question_bank.add(question.id, question.topic, question.difficulty, question.type)
+        get_near_duplicates().add("question", question.id, question.simhash)
+    answer_keys.set(question.id, question.correct_answer)
     return candidate, str(question.id)
 
 
+async def publish_candidates_batch(
+    session: AsyncSession,
+    candidate_ids: list[uuid.UUID],
+    user_id=None,
+    approve: bool = False,
+) -> list[dict[str, Any]]:
+    """Publish many approved candidates in one transaction.
+
+    Existing questions are matched by ``seed_key`` or ``simhash`` in a single
+    query (a match links the candidate instead of creating a question), new
+    questions go in one multi-row INSERT and candidates are updated in one bulk
+    UPDATE. With ``approve`` set, validated candidates are approved on the way.
+    In-process question caches are refreshed once after the commit; callers
+    still invalidate shared caches. Returns one result per requested id.
+    """
+    result = await session.execute(
+        select(QuestionCandidate).where(QuestionCandidate.id.in_(candidate_ids))
+    )
+    candidates = {candidate.id: candidate for candidate in result.scalars().all()}
+    publishable = {"approved", "validated"} if approve else {"approved"}
+
+    results: dict[uuid.UUID, dict[str, Any]] = {}
+    pending: list[tuple[QuestionCandidate, dict[str, Any], dict[str, Any]]] = []
+    failed: list[tuple[QuestionCandidate, dict[str, Any]]] = []
+    for candidate_id in dict.fromkeys(candidate_ids):
+        candidate = candidates.get(candidate_id)
+        entry: dict[str, Any] = {"candidate_id": str(candidate_id), "question_id": None}
+        results[candidate_id] = entry
+        if candidate is None:
+            entry.update(status=None, reason="not_found")
+            continue
+        entry["status"] = candidate.status
+        if candidate.status == "published" or candidate.published_at is not None:
+            published = (candidate.validation_report_json or {}).get("published") or {}
+            entry.update(question_id=published.get("question_id"), reason="already_published")
+            continue
+        if candidate.status not in publishable:
+            entry["reason"] = "invalid_status"
+            continue
+        ok, normalized, errors = validate_candidate_payload(candidate.payload_json)
+        if not ok or normalized is None:
+            entry.update(status="failed", reason="schema")
+            failed.append((candidate, {"schema": {"ok": False, "errors": errors}}))
+            continue
+        pending.append((candidate, normalized, _payload_to_question_fields(normalized)))
+
+    seed_keys = [_question_seed_key(fields) for _, _, fields in pending]
+    simhashes = _simhash64_many([_stable_string(normalized) for _, normalized, _ in pending])
+    by_seed_key: dict[str, uuid.UUID] = {}
+    by_simhash: dict[str, uuid.UUID] = {}
+    if pending:
+        existing = await session.execute(
+            select(Question.id, Question.seed_key, Question.simhash).where(
+                or_(Question.seed_key.in_(seed_keys), Question.simhash.in_(simhashes))
+            )
+        )
+        for question_id, seed_key, simhash in existing.all():
+            by_seed_key.setdefault(seed_key, question_id)
+            if simhash:
+                by_simhash.setdefault(simhash, question_id)
+
+    now = datetime.now(timezone.utc)
+    new_questions: list[dict[str, Any]] = []
+    updates: list[dict[str, Any]] = []
+    for (candidate, _, fields), seed_key, simhash in zip(pending, seed_keys, simhashes):
+        existing_id = by_seed_key.get(seed_key) or by_simhash.get(simhash)
+        created = existing_id is None
+        question_id = existing_id or uuid.uuid4()
+        if created:
+            new_questions.append(
+                {**fields, "id": question_id, "seed_key": seed_key, "simhash": simhash}
+            )
+            # Later duplicates in the same batch link to this question.
+            by_seed_key[seed_key] = question_id
+            by_simhash[simhash] = question_id
+        approving = candidate.status != "approved"
+        updates.append(
+            {
+                "id": candidate.id,
+                "status": "published",
+                "published_at": now,
+                "approved_at": now if approving else candidate.approved_at,
+                "approved_by_user_id": user_id if approving else candidate.approved_by_user_id,
+                "validation_report_json": _merge_report(
+                    candidate.validation_report_json,
+                    {"published": {"question_id": str(question_id)}},
+                ),
+                "updated_at": now,
+            }
+        )
+        results[candidate.id].update(
+            status="published", question_id=str(question_id), created=created, reason=None
+        )
+    for candidate, patch in failed:
+        updates.append(
+            {
+                "id": candidate.id,
+                "status": "failed",
+                "published_at": None,
+                "approved_at": candidate.approved_at,
+                "approved_by_user_id": candidate.approved_by_user_id,
+                "validation_report_json": _merge_report(candidate.validation_report_json, patch),
+                "updated_at": now,
+            }
+        )
+
+    if new_questions:
+        await session.execute(insert(Question), new_questions)
+    if updates:
+        await session.execute(update(QuestionCandidate), updates)
+    await session.commit()
+
+    for row in updates:
+        candidate = candidates[row["id"]]
+        for key, value in row.items():
+            if key != "id":
+                set_committed_value(candidate, key, value)
+        if row["status"] == "failed":
+            get_near_duplicates().remove("candidate", candidate.id)
+    for question in new_questions:
+        question_bank.add(question["id"], question["topic"], question["difficulty"], question["type"])
+        get_near_duplicates().add("question", question["id"], question["simhash"])
+        # Linked questions keep their own answer; only new ones are cached.
+        answer_keys.set(question["id"], question["correct_answer"])
+    return list(results.values())
+
+
 async def update_candidate_payload(
     session: AsyncSession,
     candidate: QuestionCandidate,
@@ -608,4 +906,5 @@ async def update_candidate_payload(
     candidate.published_at = None
     await session.commit()
     await session.refresh(candidate)
+    get_near_duplicates().remove("candidate", candidate.id)
     return candidate
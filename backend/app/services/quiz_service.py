@@ -2,24 +2,49 @@ import uuid
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.cache import cached
 from app.core.config import get_settings
 from app.core.exceptions import InsufficientQuestionsError
 import random
 
+from app.models.question import Question
 from app.repositories.question_repo import QuestionRepository
 from app.repositories.attempt_answer_repo import AttemptAnswerRepository
 from app.schemas.quiz import QuizGenerateResponse, QuizQuestionOut
+from app.services.question_bank import question_bank
 from app.utils.enums import Difficulty, QuizMode, Topic
 
-QCOUNT_CACHE_TTL = 600
-
 
 class QuizService:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
         self.settings = get_settings()
 
+    async def _sample_questions(
+        self,
+        repo: QuestionRepository,
+        topics: list[Topic] | None,
+        difficulty: Difficulty | None,
+        size: int,
+    ) -> list[Question]:
+        """Sample ids from the in-process question bank and load them by primary key.
+
+        A short sample or a missing/archived row means this worker's snapshot is
+        stale, so the bank is reloaded once before giving up.
+        """
+        await question_bank.ensure_loaded(
+            self.session, self.settings.QUESTION_BANK_REFRESH_SECONDS
+        )
+        for reloaded in (False, True):
+            if reloaded:
+                await question_bank.reload(self.session)
+            picked_ids = question_bank.sample(size, topics=topics, difficulty=difficulty)
+            if len(picked_ids) < size:
+                continue
+            picked = [q for q in await repo.get_by_ids(picked_ids) if q.archived_at is None]
+            if len(picked) == size:
+                return picked
+        raise InsufficientQuestionsError("Not enough questions for the requested filter")
+
     async def generate_quiz(
         self,
         topics: list[Topic] | None,
@@ -31,28 +56,11 @@ class QuizService:
         requested_size = size or self.settings.DEFAULT_QUIZ_SIZE
         requested_size = min(requested_size, self.settings.MAX_QUESTIONS_PER_QUIZ)
 
-        if topics:
-            topics_key = ",".join(sorted(item.value for item in topics))
-        else:
-            topics_key = "none"
-        cache_key = f"quizstudy:qcount:{topics_key}:{difficulty}:None"
-        available = await cached(
-            cache_key,
-            QCOUNT_CACHE_TTL,
-            lambda: repo.count_questions(
-                topics=topics or None,
-                difficulty=difficulty,
-            ),
-        )
-        if available < requested_size:
-            raise InsufficientQuestionsError("Not enough questions for the requested filter")
-
-        picked = await repo.get_random_questions(
-            topic=None,
+        picked = await self._sample_questions(
+            repo,
             topics=topics or None,
             difficulty=difficulty,
-            qtype=None,
-            limit=requested_size,
+            size=requested_size,
         )
         quiz_questions: list[QuizQuestionOut] = []
         for q in picked:
@@ -99,25 +107,11 @@ class QuizService:
             picked_ids = list(seen)[:sample_size]
 
         if not picked_ids:
-            cache_key = f"quizstudy:qcount:{topic}:{difficulty}:None"
-            available = await cached(
-                cache_key,
-                QCOUNT_CACHE_TTL,
-                lambda: repo.count_questions(
-                    topic=topic,
-                    difficulty=difficulty,
-                ),
-            )
-            if available < requested_size:
-                raise InsufficientQuestionsError(
-                    "Not enough questions for the requested filter"
-                )
-            picked = await repo.get_random_questions(
-                topic=topic,
+            picked = await self._sample_questions(
+                repo,
                 topics=[topic] if topic else None,
                 difficulty=difficulty,
-                qtype=None,
-                limit=requested_size,
+                size=requested_size,
             )
         else:
             picked = await repo.get_by_ids(picked_ids)
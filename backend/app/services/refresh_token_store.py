@@ -0,0 +1,361 @@
+"""Redis fast path and write-behind persistence for refresh tokens.
+
+Live tokens are Redis keys holding the user id, with a TTL equal to the
+token's remaining lifetime. Rotating a token is a single atomic claim that
+deletes the key, leaves a ``used`` tombstone for the rest of the token's
+lifetime and queues the revocation. Presenting a claimed token again hits
+the tombstone, so reuse is detected even before Postgres has caught up.
+
+Inserts and revocations are appended to a Redis list and written to
+``refresh_tokens`` in batches by every worker's flusher. A flusher moves its
+batch into its own processing list and only drops it once the transaction
+has committed; a failed batch is retried by the same worker, and the lists
+of workers whose heartbeat lapsed are put back on the queue at startup and
+by the compaction task. Replayed inserts of rows that already exist are
+skipped. Batches from different workers can commit in any order, so a
+revocation may reach Postgres before its insert. Every revocation therefore
+leaves a tombstone, and inserts of tombstoned tokens are written as already
+revoked. A periodic task deletes expired rows in bulk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import get_settings
+from app.core.metrics import increment, record_latency
+from app.core.redis_client import get_redis, get_redis_real
+from app.db import session as db_session
+from app.repositories.refresh_token_repo import RefreshTokenRepository
+from app.repositories.user_repo import UserRepository
+
+logger = logging.getLogger(__name__)
+
+REFRESH_KEY_PREFIX = "quizstudy:refresh:"
+USED_KEY_PREFIX = "quizstudy:refresh:used:"
+WRITES_KEY = "quizstudy:refresh:writes"
+PROCESSING_KEY_PREFIX = "quizstudy:refresh:writes:processing:"
+WORKER_ALIVE_KEY_PREFIX = "quizstudy:refresh:writes:alive:"
+WORKERS_KEY = "quizstudy:refresh:writes:workers"
+# A flusher that has not taken a batch for this long is presumed dead.
+WORKER_TTL_SECONDS = 300
+COMPACT_LOCK_KEY = "quizstudy:refresh:compact:lock"
+COMPACT_CHUNK_ROWS = 1000
+
+# KEYS: live token key, tombstone key, write queue. ARGV: revoke op JSON.
+# Returns the user id, or nil when the token is not live in Redis.
+_CLAIM_SCRIPT = """
+local user_id = redis.call('GET', KEYS[1])
+if not user_id then
+  return nil
+end
+local ttl = redis.call('TTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+if ttl > 0 then
+  redis.call('SET', KEYS[2], '1', 'EX', ttl)
+end
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return user_id
+"""
+
+# KEYS: write queue, processing list, heartbeat key, worker set.
+# ARGV: batch size, heartbeat TTL (s), worker id. Returns the worker's
+# unfinished batch if there is one, otherwise moves up to ARGV[1] ops from
+# the queue to the processing list and returns them.
+_TAKE_SCRIPT = """
+redis.call('SET', KEYS[3], '1', 'EX', ARGV[2])
+redis.call('SADD', KEYS[4], ARGV[3])
+local held = redis.call('LRANGE', KEYS[2], 0, -1)
+if #held > 0 then
+  return held
+end
+local ops = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #ops > 0 then
+  redis.call('LTRIM', KEYS[1], #ops, -1)
+  redis.call('RPUSH', KEYS[2], unpack(ops))
+end
+return ops
+"""
+
+# KEYS: write queue, processing list, heartbeat key, worker set. ARGV: worker
+# id. Puts a dead worker's batch back at the head of the queue; returns the
+# number of ops moved, or -1 if the worker is still alive.
+_RECOVER_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+  return -1
+end
+local ops = redis.call('LRANGE', KEYS[2], 0, -1)
+for index = #ops, 1, -1 do
+  redis.call('LPUSH', KEYS[1], ops[index])
+end
+redis.call('DEL', KEYS[2])
+redis.call('SREM', KEYS[4], ARGV[1])
+return #ops
+"""
+
+_tasks: list[asyncio.Task] = []
+_worker_id = uuid.uuid4().hex
+
+
+def refresh_key(token_hash: str) -> str:
+    return f"{REFRESH_KEY_PREFIX}{token_hash}"
+
+
+def used_key(token_hash: str) -> str:
+    return f"{USED_KEY_PREFIX}{token_hash}"
+
+
+def _worker_keys(worker_id: str) -> tuple[str, str]:
+    return f"{PROCESSING_KEY_PREFIX}{worker_id}", f"{WORKER_ALIVE_KEY_PREFIX}{worker_id}"
+
+
+def _revoke_op(token_hash: str) -> str:
+    return json.dumps({"op": "revoke", "token_hash": token_hash})
+
+
+async def store_token(redis, user_id, token_hash: str, expires_at: datetime) -> None:
+    """Make the token live in Redis and queue its row for insertion."""
+    ttl = max(int((expires_at - datetime.now(timezone.utc)).total_seconds()), 1)
+    op = json.dumps(
+        {
+            "op": "create",
+            "user_id": str(user_id),
+            "token_hash": token_hash,
+            "expires_at": expires_at.isoformat(),
+        }
+    )
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(refresh_key(token_hash), str(user_id), ex=ttl)
+        pipe.rpush(WRITES_KEY, op)
+        await pipe.execute()
+
+
+async def claim_token(redis, token_hash: str) -> uuid.UUID | None:
+    """Atomically consume a live token; ``None`` if Redis does not hold it."""
+    user_id = await redis.eval(
+        _CLAIM_SCRIPT,
+        3,
+        refresh_key(token_hash),
+        used_key(token_hash),
+        WRITES_KEY,
+        _revoke_op(token_hash),
+    )
+    if user_id is None:
+        return None
+    return uuid.UUID(str(user_id))
+
+
+async def was_used(redis, token_hash: str) -> bool:
+    return bool(await redis.exists(used_key(token_hash)))
+
+
+async def mark_used(redis, token_hash: str, expires_at: datetime) -> None:
+    """Tombstone a token that was rotated through the database path."""
+    ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(refresh_key(token_hash))
+        if ttl > 0:
+            pipe.set(used_key(token_hash), "1", ex=ttl)
+        await pipe.execute()
+
+
+async def queue_revoke(redis, token_hash: str) -> None:
+    """Queue the revocation of a token that is not live in Redis."""
+    ttl = int(timedelta(days=get_settings().REFRESH_TOKEN_EXPIRES_DAYS).total_seconds())
+    async with redis.pipeline(transaction=True) as pipe:
+        # The tombstone revokes the row even if its insert is flushed later.
+        pipe.set(used_key(token_hash), "1", ex=ttl)
+        pipe.rpush(WRITES_KEY, _revoke_op(token_hash))
+        await pipe.execute()
+
+
+def _parse_op(raw) -> dict | str | None:
+    """A create row, a revoked token hash, or ``None`` for a malformed op."""
+    try:
+        op = json.loads(raw)
+        if op["op"] == "create":
+            return {
+                "id": uuid.uuid4(),
+                "user_id": uuid.UUID(op["user_id"]),
+                "token_hash": str(op["token_hash"]),
+                "expires_at": datetime.fromisoformat(op["expires_at"]),
+                "revoked": False,
+            }
+        if op["op"] == "revoke":
+            return str(op["token_hash"])
+    except (json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+async def flush_pending_writes(limit: int | None = None) -> int:
+    """Write up to ``limit`` queued operations to Postgres in one transaction."""
+    redis = await get_redis_real()
+    if redis is None:
+        return 0
+    limit = limit or get_settings().REFRESH_TOKEN_FLUSH_BATCH
+    processing_key, alive_key = _worker_keys(_worker_id)
+    raw_ops = await redis.eval(
+        _TAKE_SCRIPT,
+        4,
+        WRITES_KEY,
+        processing_key,
+        alive_key,
+        WORKERS_KEY,
+        str(limit),
+        str(WORKER_TTL_SECONDS),
+        _worker_id,
+    )
+    if not raw_ops:
+        return 0
+
+    creates: list[dict] = []
+    revokes: list[str] = []
+    for raw in raw_ops:
+        op = _parse_op(raw)
+        if op is None:
+            # Retrying cannot fix it; drop it alone rather than the batch.
+            logger.warning("Dropping malformed refresh token write: %r", raw)
+            increment("auth.refresh_tokens.malformed_writes")
+        elif isinstance(op, dict):
+            creates.append(op)
+        else:
+            revokes.append(op)
+
+    started = time.perf_counter()
+    try:
+        if creates:
+            # A revocation flushed by another worker may already have matched
+            # no row; the tombstone carries it over to the insert.
+            tombstones = await redis.mget([used_key(row["token_hash"]) for row in creates])
+            for row, tombstone in zip(creates, tombstones):
+                row["revoked"] = tombstone is not None
+        async with db_session.AsyncSessionLocal() as session:
+            repo = RefreshTokenRepository(session)
+            users = await UserRepository(session).existing_ids(
+                [row["user_id"] for row in creates]
+            )
+            # Tokens of users deleted since issue would fail the whole batch;
+            # rows that exist already come from a replayed batch.
+            existing = await repo.existing_hashes([row["token_hash"] for row in creates])
+            creates = [
+                row
+                for row in creates
+                if row["user_id"] in users and row["token_hash"] not in existing
+            ]
+            await repo.create_many(creates, commit=False)
+            await repo.revoke_by_hashes(revokes, commit=False)
+            await session.commit()
+    except Exception:
+        # The batch stays in the processing list for the next flush.
+        increment("auth.refresh_tokens.flush_failures")
+        raise
+    await redis.delete(processing_key)
+    record_latency("auth.refresh_tokens.flush", time.perf_counter() - started)
+    increment("auth.refresh_tokens.flushed", len(raw_ops))
+    return len(raw_ops)
+
+
+async def recover_stalled_writes() -> int:
+    """Requeue the batches of flushers whose heartbeat lapsed; returns the op count."""
+    redis = await get_redis_real()
+    if redis is None:
+        return 0
+    recovered = 0
+    for raw_id in await redis.smembers(WORKERS_KEY):
+        worker_id = str(raw_id)
+        processing_key, alive_key = _worker_keys(worker_id)
+        moved = await redis.eval(
+            _RECOVER_SCRIPT, 4, WRITES_KEY, processing_key, alive_key, WORKERS_KEY, worker_id
+        )
+        if int(moved) > 0:
+            logger.warning("Requeued %d refresh token writes of worker %s", moved, worker_id)
+            recovered += int(moved)
+    increment("auth.refresh_tokens.recovered_writes", recovered)
+    return recovered
+
+
+async def compact_expired_tokens() -> int:
+    """Delete expired rows in chunks; returns the number of rows removed."""
+    removed = 0
+    now = datetime.now(timezone.utc)
+    async with db_session.AsyncSessionLocal() as session:
+        repo = RefreshTokenRepository(session)
+        while True:
+            deleted = await repo.delete_expired(now, COMPACT_CHUNK_ROWS)
+            removed += deleted
+            if deleted < COMPACT_CHUNK_ROWS:
+                break
+    increment("auth.refresh_tokens.compacted", removed)
+    return removed
+
+
+async def _flush_loop() -> None:
+    settings = get_settings()
+    while True:
+        try:
+            flushed = await flush_pending_writes()
+            if flushed < settings.REFRESH_TOKEN_FLUSH_BATCH:
+                await asyncio.sleep(settings.REFRESH_TOKEN_FLUSH_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Refresh token flush failed; retrying")
+            await asyncio.sleep(settings.REFRESH_TOKEN_FLUSH_SECONDS)
+
+
+async def _compact_loop() -> None:
+    interval = get_settings().REFRESH_TOKEN_COMPACT_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            redis = await get_redis()
+            # One worker per interval; the lock simply expires.
+            if not await redis.set(COMPACT_LOCK_KEY, "1", ex=interval, nx=True):
+                continue
+            await recover_stalled_writes()
+            removed = await compact_expired_tokens()
+            logger.info("Compacted %d expired refresh tokens", removed)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Refresh token compaction failed")
+
+
+async def start_refresh_token_tasks() -> None:
+    if _tasks:
+        return
+    try:
+        await recover_stalled_writes()
+    except Exception:
+        logger.warning("Recovering refresh token writes failed", exc_info=True)
+    _tasks.append(asyncio.create_task(_flush_loop()))
+    _tasks.append(asyncio.create_task(_compact_loop()))
+
+
+async def stop_refresh_token_tasks() -> None:
+    for task in _tasks:
+        task.cancel()
+    for task in _tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _tasks.clear()
+    # Whatever is left stays queued in Redis for the remaining workers.
+    try:
+        await flush_pending_writes()
+    except Exception:
+        logger.warning("Final refresh token flush failed", exc_info=True)
+    try:
+        redis = await get_redis_real()
+        if redis is not None:
+            # Lets other workers requeue a batch this worker could not flush.
+            await redis.delete(_worker_keys(_worker_id)[1])
+    except Exception:
+        logger.warning("Clearing the refresh token flusher heartbeat failed", exc_info=True)
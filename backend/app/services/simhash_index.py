@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.metrics import increment
+from app.models.question import Question
+from app.models.question_candidate import QuestionCandidate
+
+logger = logging.getLogger(__name__)
+
+# Candidate statuses that can block a new candidate; mirrors the exact dedupe.
+INDEXED_CANDIDATE_STATUSES = ("validated", "approved", "published")
+
+EntryKey = tuple[str, uuid.UUID]
+
+
+def _as_int(simhash: str | int) -> int:
+    return simhash if isinstance(simhash, int) else int(simhash, 16)
+
+
+class SimhashLSHIndex:
+    """Per-worker banded LSH index over 64-bit simhashes.
+
+    The fingerprint is split into ``max_distance + 1`` bands. Two fingerprints
+    within Hamming distance ``max_distance`` differ in at most that many bits,
+    so by pigeonhole they agree on at least one whole band; a lookup only
+    verifies the entries sharing a band with the query instead of scanning the
+    table. Entries are keyed by ``("question" | "candidate", id)``.
+    """
+
+    def __init__(self, max_distance: int = 3) -> None:
+        if not 0 <= max_distance < 64:
+            raise ValueError("max_distance must be between 0 and 63")
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._band_bits = [
+            (64 * index // self._bands, 64 * (index + 1) // self._bands)
+            for index in range(self._bands)
+        ]
+        self._tables: list[dict[int, set[EntryKey]]] = [{} for _ in range(self._bands)]
+        self._fingerprints: dict[EntryKey, int] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _band_values(self, value: int) -> list[int]:
+        return [
+            (value >> start) & ((1 << (end - start)) - 1)
+            for start, end in self._band_bits
+        ]
+
+    def _reset(self) -> None:
+        self._tables = [{} for _ in range(self._bands)]
+        self._fingerprints = {}
+
+    def _insert(self, key: EntryKey, value: int) -> None:
+        self._fingerprints[key] = value
+        for table, band in zip(self._tables, self._band_values(value)):
+            table.setdefault(band, set()).add(key)
+
+    async def load(self, session: AsyncSession) -> int:
+        questions = await session.execute(
+            select(Question.id, Question.simhash).where(Question.simhash.is_not(None))
+        )
+        candidates = await session.execute(
+            select(QuestionCandidate.id, QuestionCandidate.simhash).where(
+                QuestionCandidate.simhash.is_not(None),
+                QuestionCandidate.status.in_(INDEXED_CANDIDATE_STATUSES),
+            )
+        )
+        self._reset()
+        for question_id, simhash in questions.all():
+            if simhash is not None:
+                self._insert(("question", question_id), _as_int(simhash))
+        for candidate_id, simhash in candidates.all():
+            if simhash is not None:
+                self._insert(("candidate", candidate_id), _as_int(simhash))
+        self._loaded_at = time.monotonic()
+        logger.info("Simhash index loaded: %d fingerprints", len(self._fingerprints))
+        return len(self._fingerprints)
+
+    async def ensure_loaded(self, session: AsyncSession, max_age: int) -> None:
+        """Load on first use and re-load once the snapshot is older than ``max_age``."""
+        if self._loaded_at is not None and (time.monotonic() - self._loaded_at) < max_age:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and (time.monotonic() - self._loaded_at) < max_age:
+                return
+            await self.load(session)
+
+    def add(self, kind: str, item_id: uuid.UUID, simhash: str | int | None) -> None:
+        self.remove(kind, item_id)
+        if simhash is None:
+            return
+        self._insert((kind, item_id), _as_int(simhash))
+
+    def remove(self, kind: str, item_id: uuid.UUID) -> bool:
+        key = (kind, item_id)
+        value = self._fingerprints.pop(key, None)
+        if value is None:
+            return False
+        for table, band in zip(self._tables, self._band_values(value)):
+            bucket = table.get(band)
+            if bucket is None:
+                continue
+            bucket.discard(key)
+            if not bucket:
+                del table[band]
+        return True
+
+    def query(
+        self,
+        simhash: str | int,
+        max_distance: int | None = None,
+        exclude: Iterable[EntryKey] = (),
+    ) -> list[tuple[str, uuid.UUID, int]]:
+        """Return ``(kind, id, distance)`` for entries within ``max_distance`` bits.
+
+        ``max_distance`` cannot exceed the distance the index was built for.
+        Results are ordered by distance.
+        """
+        limit = self.max_distance if max_distance is None else max_distance
+        if limit > self.max_distance:
+            raise ValueError(f"index only supports distances up to {self.max_distance}")
+        value = _as_int(simhash)
+        excluded = set(exclude)
+        seen: set[EntryKey] = set()
+        matches: list[tuple[str, uuid.UUID, int]] = []
+        for table, band in zip(self._tables, self._band_values(value)):
+            for key in table.get(band, ()):
+                if key in seen or key in excluded:
+                    continue
+                seen.add(key)
+                distance = (self._fingerprints[key] ^ value).bit_count()
+                if distance <= limit:
+                    matches.append((key[0], key[1], distance))
+        increment("simhash_index.queries")
+        increment("simhash_index.verified", len(seen))
+        matches.sort(key=lambda item: (item[2], item[0], str(item[1])))
+        return matches
+
+
+_near_duplicates: SimhashLSHIndex | None = None
+
+
+def get_near_duplicates() -> SimhashLSHIndex:
+    """The worker's index, created on first use so importing reads no settings."""
+    global _near_duplicates
+    if _near_duplicates is None:
+        _near_duplicates = SimhashLSHIndex(get_settings().SIMHASH_NEAR_DUP_DISTANCE)
+    return _near_duplicates
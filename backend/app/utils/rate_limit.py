@@ -1,26 +1,12 @@
 from __future__ import annotations
 
-import importlib
 from math import ceil
 
-from fastapi import Request, Response
-from fastapi.security.utils import get_authorization_scheme_param
+from fastapi import Request
 from starlette.responses import JSONResponse
 
-from app.services.auth_service import decode_access_token
-def _load_rate_limiter():
-    for name in ("fastapi_limiter.depends", "fastapi_limiter"):
-        try:
-            module = importlib.import_module(name)
-        except ModuleNotFoundError:
-            continue
-        if hasattr(module, "RateLimiter"):
-            return module.RateLimiter
-    raise ImportError("RateLimiter not found in fastapi_limiter")
-
-
-RateLimiter = _load_rate_limiter()
-
+from app.core.rate_limiter import RateLimit, RateLimitExceeded
+from app.services.auth_service import request_token_payload
 
 
 def _get_client_ip(request: Request) -> str:
@@ -36,12 +22,8 @@ def _get_client_ip(request: Request) -> str:
 
 
 def _get_user_id(request: Request) -> str | None:
-    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
-    if scheme.lower() != "bearer" or not token:
-        return None
-    try:
-        payload = decode_access_token(token)
-    except Exception:
+    payload = request_token_payload(request)
+    if payload is None:
         return None
     user_id = payload.get("sub")
     if not user_id:
@@ -56,16 +38,8 @@ def user_or_ip_identifier(request: Request) -> str:
     return f"ip:{_get_client_ip(request)}"
 
 
-async def async_user_or_ip_identifier(request: Request) -> str:
-    return user_or_ip_identifier(request)
-
-
-async def rate_limit_callback(
-    request: Request,
-    response: Response,
-    pexpire: int,
-) -> JSONResponse:
-    retry_after = max(1, int(ceil(pexpire / 1000)))
+def rate_limit_response(exc: RateLimitExceeded) -> JSONResponse:
+    retry_after = max(1, int(ceil(exc.retry_after)))
     return JSONResponse(
         status_code=429,
         content={
@@ -80,6 +54,7 @@ async def rate_limit_callback(
 
 
 def build_rate_limiter(
+    name: str,
     *,
     user_times: int,
     user_seconds: int,
@@ -87,31 +62,25 @@ def build_rate_limiter(
     anon_seconds: int = 3600,
     require_user: bool = False,
 ):
-    async def dependency(request: Request, response: Response) -> None:
+    user_limit = RateLimit(f"{name}:user", user_times, user_seconds)
+    anon_limit = RateLimit(f"{name}:anon", anon_times, anon_seconds)
+
+    async def dependency(request: Request) -> None:
         if not getattr(request.app.state, "rate_limit_enabled", True):
             return
         user_id = _get_user_id(request)
-        if require_user and not user_id:
-            return
         if user_id:
-            limiter = RateLimiter(
-                times=user_times,
-                seconds=user_seconds,
-                identifier=async_user_or_ip_identifier,
-                callback=rate_limit_callback,
-            )
-        else:
-            limiter = RateLimiter(
-                times=anon_times,
-                seconds=anon_seconds,
-                identifier=async_user_or_ip_identifier,
-                callback=rate_limit_callback,
-            )
-        await limiter(request, response)
+            await user_limit.hit(f"user:{user_id}")
+        elif not require_user:
+            await anon_limit.hit(f"ip:{_get_client_ip(request)}")
 
     return dependency
 
 
-ai_hint_rate_limiter = build_rate_limiter(user_times=20, user_seconds=3600)
-ai_review_rate_limiter = build_rate_limiter(user_times=10, user_seconds=86400, require_user=True)
-ai_coach_rate_limiter = build_rate_limiter(user_times=5, user_seconds=3600, require_user=True)
+ai_hint_rate_limiter = build_rate_limiter("ai_hint", user_times=20, user_seconds=3600)
+ai_review_rate_limiter = build_rate_limiter(
+    "ai_review", user_times=10, user_seconds=86400, require_user=True
+)
+ai_coach_rate_limiter = build_rate_limiter(
+    "ai_coach", user_times=5, user_seconds=3600, require_user=True
+)
@@ -0,0 +1,37 @@
+"""Benchmark batched candidate generation against the offline stub LLM.
+
+Run from backend/: PYTHONPATH=. python scripts/bench_candidate_generation.py [count]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("GEMINI_QC_STUB", "true")
+os.environ.setdefault("GEMINI_QC_STUB_LATENCY_SECONDS", "0.5")
+
+from app.integrations.question_candidates_chain import generate_question_candidates_items  # noqa: E402
+
+
+async def run(count: int, fanout: int) -> float:
+    started = time.perf_counter()
+    items = await generate_question_candidates_items(
+        {"count": count, "topic": "python_core", "difficulty": "junior", "qtype": "mixed"},
+        fanout=fanout,
+    )
+    elapsed = time.perf_counter() - started
+    if len(items) != count:
+        raise SystemExit(f"FAIL: expected {count} items, got {len(items)}")
+    return elapsed
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for fanout in (1, 2, 4, 8):
+        elapsed = await run(count, fanout)
+        print(f"fanout={fanout}: {count} items in {elapsed:.2f}s ({count / elapsed:.0f} items/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
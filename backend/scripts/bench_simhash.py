@@ -0,0 +1,64 @@
+"""Compare scalar and batched simhash fingerprinting.
+
+Run from backend/: PYTHONPATH=. python scripts/bench_simhash.py [count]
+"""
+
+import random
+import sys
+import time
+
+from app.services.question_candidates_service import (
+    _simhash64,
+    _simhash64_many,
+    _stable_string,
+)
+
+TOPICS = ["python_core", "big_o", "algorithms", "data_structures"]
+WORDS = (
+    "what is the output of this function when called with list dict set tuple "
+    "value index loop return yield generator class instance method complexity"
+).split()
+
+
+def make_payloads(count: int) -> list[dict]:
+    rng = random.Random(42)
+    payloads = []
+    for index in range(count):
+        prompt = " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 40)))
+        payloads.append(
+            {
+                "topic": rng.choice(TOPICS),
+                "difficulty": rng.choice(["junior", "middle"]),
+                "type": "mcq",
+                "prompt": f"{prompt} #{index}",
+                "choices": [
+                    {"key": key, "text": " ".join(rng.choice(WORDS) for _ in range(4))}
+                    for key in "ABCD"
+                ],
+                "answer": rng.choice("ABCD"),
+            }
+        )
+    return payloads
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    texts = [_stable_string(payload) for payload in make_payloads(count)]
+
+    started = time.perf_counter()
+    scalar = [_simhash64(text) for text in texts]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = _simhash64_many(texts)
+    batched_seconds = time.perf_counter() - started
+
+    if scalar != batched:
+        raise SystemExit("FAIL: batched fingerprints differ from scalar")
+    print(f"payloads: {count}")
+    print(f"scalar:  {scalar_seconds:.3f}s")
+    print(f"batched: {batched_seconds:.3f}s ({scalar_seconds / batched_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
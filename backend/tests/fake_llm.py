@@ -0,0 +1,125 @@
+"""Local OpenAI-compatible chat server standing in for Groq in tests.
+
+Point ``GROQ_API_BASE`` at ``server.base_url``. Every request is recorded
+together with the client port it arrived on, so tests can tell whether
+connections were reused.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+Responder = Callable[[dict[str, Any]], str]
+
+
+class FakeLLMServer:
+    def __init__(self, reply: str | Responder = "ok", chunk_chars: int = 4) -> None:
+        self.reply = reply
+        self.chunk_chars = chunk_chars
+        self.requests: list[dict[str, Any]] = []
+        self.client_ports: list[int] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> FakeLLMServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _text(self, body: dict[str, Any]) -> str:
+        return self.reply(body) if callable(self.reply) else self.reply
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests.append(body)
+                server.client_ports.append(self.client_address[1])
+                text = server._text(body)
+                usage = {
+                    "prompt_tokens": 11,
+                    "completion_tokens": len(text.split()),
+                    "total_tokens": 11 + len(text.split()),
+                }
+                if body.get("stream"):
+                    self._stream(body, text, usage)
+                else:
+                    self._complete(body, text, usage)
+
+            def _complete(self, body: dict[str, Any], text: str, usage: dict) -> None:
+                payload = json.dumps(
+                    {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": body.get("model", "fake"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": text},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": usage,
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body: dict[str, Any], text: str, usage: dict) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = [
+                    text[start : start + server.chunk_chars]
+                    for start in range(0, len(text), server.chunk_chars)
+                ]
+                for index, piece in enumerate(pieces + [None]):
+                    chunk: dict[str, Any] = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": body.get("model", "fake"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": piece} if piece is not None else {},
+                                "finish_reason": None if piece is not None else "stop",
+                            }
+                        ],
+                    }
+                    if piece is None:
+                        chunk["x_groq"] = {"usage": usage}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
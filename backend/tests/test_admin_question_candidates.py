@@ -24,6 +24,11 @@ class FakeSession:
     def add(self, item) -> None:
         self.items.append(item)
 
+    async def execute(self, statement, params=None):
+        if params:
+            self.items.extend(params)
+        return None
+
     async def flush(self) -> None:
         return None
 
@@ -49,7 +54,10 @@ def test_generate_question_candidates(monkeypatch: pytest.MonkeyPatch):
             "]"
         )
 
-    monkeypatch.setattr(question_candidates_chain, "generate_question_candidates", fake_generate)
+    async def fake_stream(payload: dict):
+        yield await fake_generate(payload)
+
+    monkeypatch.setattr(question_candidates_chain, "stream_question_candidates", fake_stream)
 
     settings = config_module.get_settings()
     monkeypatch.setattr(settings, "GOOGLE_API_KEY", "test-key")
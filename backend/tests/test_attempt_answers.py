@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models.user_question_state import UserQuestionState
+from app.repositories.attempt_answer_repo import AttemptAnswerRepository
+from app.repositories.quiz_attempt_repo import QuizAttemptRepository
+from factories import create_question, create_user
+
+
+async def _attempt(session, user_id, created_at: datetime):
+    return await QuizAttemptRepository(session).create_attempt(
+        {
+            "user_id": user_id,
+            "topic": "python_core",
+            "difficulty": "junior",
+            "mode": "practice",
+            "correct_count": 0,
+            "total_count": 0,
+            "answers": [],
+            "created_at": created_at,
+        }
+    )
+
+
+def _answer(question, is_correct: bool, selected: str = "A") -> dict:
+    return {"question_id": str(question.id), "is_correct": is_correct, "selected_answer": selected}
+
+
+async def _states(session, user_id) -> dict:
+    result = await session.execute(
+        select(UserQuestionState)
+        .where(UserQuestionState.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return {
+        row.question_id: (row.is_correct, row.wrong_count, row.last_attempt_id)
+        for row in result.scalars()
+    }
+
+
+@pytest.mark.asyncio
+async def test_question_state_follows_the_latest_attempt(db_session):
+    user = await create_user(db_session, email="state@example.com", password_hash=None)
+    question = await create_question(db_session)
+    now = datetime.now(timezone.utc)
+    older = await _attempt(db_session, user.id, now - timedelta(days=1))
+    newer = await _attempt(db_session, user.id, now)
+    repo = AttemptAnswerRepository(db_session)
+
+    await repo.replace_for_attempt(older.id, user.id, [_answer(question, False)])
+    await repo.replace_for_attempt(newer.id, user.id, [_answer(question, True)])
+    assert await _states(db_session, user.id) == {question.id: (True, 1, newer.id)}
+
+    # Re-saving the older attempt neither wins over the newer answer nor
+    # counts the same miss twice.
+    await repo.replace_for_attempt(older.id, user.id, [_answer(question, False, "B")])
+    assert await _states(db_session, user.id) == {question.id: (True, 1, newer.id)}
+
+    await repo.replace_for_attempt(newer.id, user.id, [_answer(question, False)])
+    assert await _states(db_session, user.id) == {question.id: (False, 2, newer.id)}
+
+
+@pytest.mark.asyncio
+async def test_removed_answers_stop_counting(db_session):
+    user = await create_user(db_session, email="removed@example.com", password_hash=None)
+    first_question = await create_question(db_session)
+    second_question = await create_question(db_session)
+    now = datetime.now(timezone.utc)
+    older = await _attempt(db_session, user.id, now - timedelta(days=1))
+    newer = await _attempt(db_session, user.id, now)
+    repo = AttemptAnswerRepository(db_session)
+
+    await repo.replace_for_attempt(
+        older.id, user.id, [_answer(first_question, True), _answer(second_question, False)]
+    )
+    await repo.replace_for_attempt(newer.id, user.id, [_answer(first_question, False)])
+    assert await _states(db_session, user.id) == {
+        first_question.id: (False, 1, newer.id),
+        second_question.id: (False, 1, older.id),
+    }
+
+    await repo.replace_for_attempt(newer.id, user.id, [])
+    await repo.replace_for_attempt(older.id, user.id, [_answer(first_question, True)])
+    assert await _states(db_session, user.id) == {first_question.id: (True, 0, older.id)}
+
+
+@pytest.mark.asyncio
+async def test_replace_for_attempt_reports_changed_rows(db_session):
+    user = await create_user(db_session, email="diff@example.com", password_hash=None)
+    kept, changed, removed, added = [await create_question(db_session) for _ in range(4)]
+    attempt = await _attempt(db_session, user.id, datetime.now(timezone.utc))
+    repo = AttemptAnswerRepository(db_session)
+
+    counts = await repo.replace_for_attempt(
+        attempt.id,
+        user.id,
+        [_answer(kept, True), _answer(changed, False), _answer(removed, False)],
+    )
+    assert counts == {"inserted": 3, "updated": 0, "deleted": 0}
+
+    counts = await repo.replace_for_attempt(
+        attempt.id,
+        user.id,
+        [_answer(kept, True), _answer(changed, True, "C"), _answer(added, False, "D")],
+    )
+    assert counts == {"inserted": 1, "updated": 1, "deleted": 1}
+
+    rows = await repo.list_for_attempt(attempt.id, user.id)
+    assert {row.question_id: (row.is_correct, row.selected_answer) for row in rows} == {
+        kept.id: (True, "A"),
+        changed.id: (True, "C"),
+        added.id: (False, "D"),
+    }
+
+    unchanged = [_answer(kept, True), _answer(changed, True, "C"), _answer(added, False, "D")]
+    counts = await repo.replace_for_attempt(attempt.id, user.id, unchanged)
+    assert counts == {"inserted": 0, "updated": 0, "deleted": 0}
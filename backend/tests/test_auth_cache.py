@@ -0,0 +1,143 @@
+import time
+import uuid
+from datetime import datetime, timezone
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+from app.core import cache as cache_module
+from app.core.redis_client import MemoryStore
+from app.models.user import User
+from app.services import auth_service
+
+
+@pytest.fixture(autouse=True)
+def rsa_keys(monkeypatch: pytest.MonkeyPatch):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    monkeypatch.setattr(auth_service, "_load_private_key", lambda: private_pem)
+    monkeypatch.setattr(auth_service, "_load_public_key", lambda: public_pem)
+    monkeypatch.setattr(auth_service.settings, "JWT_ALG", "RS256")
+
+    store = MemoryStore()
+
+    async def fake_get_redis():
+        return store
+
+    monkeypatch.setattr(cache_module, "get_redis", fake_get_redis)
+    auth_service._token_cache.clear()
+    auth_service._user_cache.clear()
+    yield private_pem
+
+
+@pytest.fixture
+def jwt_decodes(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+    real_decode = jwt.decode
+
+    def counting_decode(token, *args, **kwargs):
+        calls.append(token)
+        return real_decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(auth_service.jwt, "decode", counting_decode)
+    return calls
+
+
+def _request(token: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+    )
+
+
+def test_verified_tokens_are_cached_until_exp(rsa_keys, jwt_decodes):
+    token = auth_service.create_access_token(str(uuid.uuid4()), "a@example.com")
+
+    first = auth_service.decode_access_token(token)
+    second = auth_service.decode_access_token(token)
+
+    assert first == second
+    assert len(jwt_decodes) == 1
+    (_, _, expires_at), = auth_service._token_cache._data.values()
+    assert expires_at - time.monotonic() <= first["exp"] - time.time()
+
+    expired = jwt.encode(
+        {"sub": "x", "exp": int(time.time()) - 5}, rsa_keys, algorithm="RS256"
+    )
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            auth_service.decode_access_token(expired)
+        assert exc_info.value.detail == "Access token expired"
+    assert len(jwt_decodes) == 3
+
+
+def test_request_payload_is_resolved_once(jwt_decodes):
+    token = auth_service.create_access_token(str(uuid.uuid4()), "a@example.com")
+    request = _request(token)
+
+    payload = auth_service.request_token_payload(request)
+    auth_service._token_cache.clear()
+
+    assert auth_service.request_token_payload(request) is payload
+    assert len(jwt_decodes) == 1
+    assert auth_service.request_token_payload(_request("garbage")) is None
+
+
+async def test_user_record_is_cached_and_invalidated(monkeypatch: pytest.MonkeyPatch):
+    user_id = uuid.uuid4()
+    db_user = User(
+        id=user_id,
+        email="a@example.com",
+        password_hash=None,
+        is_admin=False,
+        role=None,
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+    lookups: list[uuid.UUID] = []
+
+    class FakeUserRepository:
+        def __init__(self, session) -> None:
+            pass
+
+        async def get_by_id(self, lookup_id):
+            lookups.append(lookup_id)
+            return db_user
+
+    monkeypatch.setattr(auth_service, "UserRepository", FakeUserRepository)
+    token = auth_service.create_access_token(str(user_id), "a@example.com")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    async def current_user():
+        return await auth_service.get_current_user(_request(token), credentials, None)
+
+    first = await current_user()
+    cached = await current_user()
+
+    assert first is db_user
+    assert cached is not db_user
+    assert (cached.id, cached.email, cached.is_admin) == (user_id, "a@example.com", False)
+    assert lookups == [user_id]
+
+    db_user.is_admin = True
+    await auth_service.invalidate_cached_user(user_id)
+    refreshed = await current_user()
+
+    assert refreshed.is_admin is True
+    assert lookups == [user_id, user_id]
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.redis_client import MemoryStore
+
+
+@pytest.fixture()
+def memory_store(monkeypatch: pytest.MonkeyPatch) -> MemoryStore:
+    store = MemoryStore()
+
+    async def fake_get_redis():
+        return store
+
+    monkeypatch.setattr(cache_module, "get_redis", fake_get_redis)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(memory_store):
+    calls = 0
+
+    async def fetch() -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": calls}
+
+    before = cache_module.cache_stats()
+    results = await asyncio.gather(
+        *[cache_module.cached("test:single-flight", 60, fetch) for _ in range(10)]
+    )
+    after = cache_module.cache_stats()
+
+    assert calls == 1
+    assert all(item == {"value": 1} for item in results)
+    assert after["coalesced"] - before["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_waiters_take_over_when_the_leader_is_cancelled(memory_store):
+    calls = 0
+    leader_started = asyncio.Event()
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            leader_started.set()
+            await asyncio.sleep(10)
+        return calls
+
+    leader = asyncio.create_task(cache_module.cached("test:leader-cancel", 60, fetch))
+    await leader_started.wait()
+    waiters = [
+        asyncio.create_task(cache_module.cached("test:leader-cancel", 60, fetch))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.gather(*waiters) == [2, 2, 2]
+    assert leader.cancelled()
+    assert calls == 2
+
+
+class FakeEvalStore(MemoryStore):
+    async def eval(self, script: str, numkeys: int, key: str, token: str) -> int:
+        async with self._lock:
+            current = self._data.get(key)
+            if current is None or current[0] != token:
+                return 0
+            self._data.pop(key)
+            return 1
+
+
+@pytest.mark.asyncio
+async def test_release_lock_keeps_a_lock_taken_by_another_worker():
+    store = FakeEvalStore()
+    token = await cache_module._acquire_lock(store, "test:key:lock")
+    store._data.clear()  # our lock expired ...
+    await store.set("test:key:lock", "other-worker", ex=5)  # ... and someone else took it
+
+    await cache_module._release_lock(store, "test:key:lock", token)
+    assert await store.get("test:key:lock") == "other-worker"
+
+    await cache_module._release_lock(store, "test:key:lock", "other-worker")
+    assert await store.get("test:key:lock") is None
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_served_while_refreshing(memory_store):
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await cache_module.cached("test:swr", 60, fetch, soft_ttl=0) == 1
+    assert await cache_module.cached("test:swr", 60, fetch, soft_ttl=0) == 1
+    await asyncio.sleep(0.05)
+
+    assert calls == 2
+    assert await cache_module.cached("test:swr", 60, fetch, soft_ttl=60) == 2
+
+
+@pytest.mark.asyncio
+async def test_l1_serves_repeat_reads_until_invalidated(memory_store):
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await cache_module.cached("test:l1", 60, fetch, l1_ttl=60) == 1
+    await memory_store.delete("test:l1")
+    assert await cache_module.cached("test:l1", 60, fetch, l1_ttl=60) == 1
+
+    await cache_module.invalidate("test:l1")
+    assert await cache_module.cached("test:l1", 60, fetch, l1_ttl=60) == 2
+
+
+def test_local_cache_evicts_least_recently_used():
+    local = cache_module.LocalCache(max_entries=2)
+    local.set("a", 1, None, 60)
+    local.set("b", 2, None, 60)
+    assert local.get("a") == (1, None)
+    local.set("c", 3, None, 60)
+
+    assert local.get("b") is None
+    assert local.get("a") == (1, None)
+    assert local.get("c") == (3, None)
+
+
+@pytest.mark.asyncio
+async def test_bump_generation_orphans_namespaced_keys(memory_store):
+    namespace = "test:user:1:stats"
+    first = await cache_module.namespaced_key(namespace, "all")
+    assert first == f"{namespace}:g0:all"
+
+    assert await cache_module.bump_generation(namespace) == 1
+    assert await cache_module.bump_generation(namespace) == 2
+    assert await cache_module.namespaced_key(namespace, "all") == f"{namespace}:g2:all"
+
+
+def test_l1_is_sized_from_settings_on_first_use(monkeypatch: pytest.MonkeyPatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "CACHE_L1_MAX_ENTRIES", 7)
+    monkeypatch.setattr(cache_module, "_l1", None)
+    monkeypatch.setattr(cache_module, "_local_caches", [])
+
+    local = cache_module._get_l1()
+    assert local.max_entries == 7
+    assert cache_module._get_l1() is local
+    assert cache_module._local_caches == [local]
@@ -0,0 +1,29 @@
+from app.services.code_sandbox import SandboxPool
+
+
+def test_pool_runs_snippets_and_recycles_workers():
+    pool = SandboxPool(size=1, max_runs=2)
+    try:
+        first = pool.run("print(sum(range(4)))")
+        second = pool.run("print(1 // 0)")
+        third = pool.run("print('fresh')")
+    finally:
+        pool.shutdown()
+
+    assert first == {"exit_code": 0, "stdout": "6\n", "stderr": "", "timeout": False}
+    assert second["exit_code"] == 1
+    assert second["stderr"] == "integer division or modulo by zero"
+    assert third["stdout"] == "fresh\n"
+
+
+def test_pool_keeps_isolation_guarantees():
+    pool = SandboxPool(size=1)
+    try:
+        blocked = pool.run("open('/etc/passwd')")
+        looping = pool.run("while True:\n    pass", timeout=0.5)
+    finally:
+        pool.shutdown()
+
+    assert blocked["exit_code"] == 1
+    assert "open" in blocked["stderr"]
+    assert looping["timeout"] is True
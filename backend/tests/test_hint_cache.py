@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import app.core.config as config_module
+from app.core import cache as cache_module
+from app.core.metrics import reset_metrics
+from app.core.redis_client import MemoryStore
+from app.services import hint_cache
+
+
+@pytest.fixture()
+def memory_store(monkeypatch: pytest.MonkeyPatch) -> MemoryStore:
+    store = MemoryStore()
+
+    async def fake_get_redis():
+        return store
+
+    monkeypatch.setattr(cache_module, "get_redis", fake_get_redis)
+    monkeypatch.setattr(hint_cache, "get_redis", fake_get_redis)
+    monkeypatch.setattr(config_module.get_settings(), "HINT_CACHE_VARIANTS", 2)
+    cache_module._get_l1().clear()
+    reset_metrics()
+    return store
+
+
+def _question(updated_at: datetime | None = None):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        updated_at=updated_at or datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+async def test_pool_fills_then_serves_variants(memory_store):
+    question = _question()
+    key = await hint_cache.hint_cache_key(question, 1, "  O(N)  log n ")
+
+    assert await hint_cache.hint_cache_key(question, 1, "o(n) LOG n") == key
+    assert await hint_cache.hint_cache_key(question, 2, "o(n) log n") != key
+
+    assert await hint_cache.get_cached_hint(key) is None
+    await hint_cache.store_hint(key, "hint a")
+    assert await hint_cache.get_cached_hint(key) is None
+    await hint_cache.store_hint(key, "hint b")
+    await hint_cache.store_hint(key, "hint c")
+
+    served = {await hint_cache.get_cached_hint(key) for _ in range(20)}
+    assert served == {"hint a", "hint b"}
+    stats = hint_cache.hint_cache_stats()
+    assert stats["hits"] == 20
+    assert stats["misses"] == 2
+    assert stats["stores"] == 2
+    assert stats["hit_ratio"] == round(20 / 22, 4)
+
+
+async def test_edit_and_archive_invalidate(memory_store):
+    question = _question()
+    key = await hint_cache.hint_cache_key(question, 1, None)
+    await hint_cache.store_hint(key, "hint a")
+    await hint_cache.store_hint(key, "hint b")
+    assert await hint_cache.get_cached_hint(key) is not None
+
+    edited = SimpleNamespace(id=question.id, updated_at=question.updated_at + timedelta(seconds=1))
+    assert await hint_cache.hint_cache_key(edited, 1, None) != key
+
+    await hint_cache.invalidate_hints(question.id)
+    fresh_key = await hint_cache.hint_cache_key(question, 1, None)
+    assert fresh_key != key
+    assert await hint_cache.get_cached_hint(fresh_key) is None
@@ -0,0 +1,222 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import jobs as jobs_module
+from app.core.config import get_settings
+from app.core.redis_client import MemoryStore
+
+
+@pytest.fixture()
+async def local_jobs(monkeypatch: pytest.MonkeyPatch):
+    store = MemoryStore()
+
+    async def fake_get_redis():
+        return store
+
+    async def no_redis():
+        return None
+
+    monkeypatch.setattr(jobs_module, "get_redis", fake_get_redis)
+    monkeypatch.setattr(jobs_module, "get_redis_real", no_redis)
+    monkeypatch.setattr(jobs_module, "POLL_TIMEOUT_SECONDS", 0.05)
+    await jobs_module.start_job_workers(2)
+    yield
+    await jobs_module.stop_job_workers()
+
+
+async def wait_for_job(job_id: str) -> dict:
+    for _ in range(100):
+        job = await jobs_module.get_job(job_id)
+        if job["status"] in {"done", "error"}:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_enqueued_job_runs_and_stores_result(local_jobs):
+    @jobs_module.job_handler("test_echo")
+    async def echo(payload: dict) -> dict:
+        return {"echo": payload["value"]}
+
+    job = await jobs_module.enqueue("test_echo", {"value": 3}, user_id="u1")
+    assert job["status"] == "queued"
+
+    finished = await wait_for_job(job["id"])
+    assert finished["status"] == "done"
+    assert finished["result"] == {"echo": 3}
+    assert finished["user_id"] == "u1"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_reports_error(local_jobs):
+    @jobs_module.job_handler("test_fail")
+    async def fail(payload: dict) -> dict:
+        raise RuntimeError("llm down")
+
+    job = await jobs_module.enqueue("test_fail", {}, user_id="u1")
+
+    finished = await wait_for_job(job["id"])
+    assert finished["status"] == "error"
+    assert finished["error"] == jobs_module.JOB_FAILED_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_unknown_kind(local_jobs):
+    with pytest.raises(jobs_module.UnknownJobKind):
+        await jobs_module.enqueue("does_not_exist", {}, user_id="u1")
+
+
+class FakeQueueRedis:
+    def __init__(self) -> None:
+        self.lists: dict[str, list[str]] = {}
+
+    async def rpush(self, key: str, *values: str) -> int:
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def blmove(self, source: str, destination: str, timeout, src: str, dest: str):
+        items = self.lists.get(source)
+        if not items:
+            await asyncio.sleep(timeout)
+            return None
+        value = items.pop(0)
+        self.lists.setdefault(destination, []).append(value)
+        return value
+
+    async def lrange(self, key: str, start: int, end: int) -> list[str]:
+        return list(self.lists.get(key, []))
+
+    async def lrem(self, key: str, count: int, value: str) -> int:
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+            return 1
+        return 0
+
+    async def eval(self, script: str, numkeys: int, processing: str, queue: str, job_id: str):
+        if await self.lrem(processing, 1, job_id):
+            await self.rpush(queue, job_id)
+            return 1
+        return 0
+
+
+@pytest.fixture()
+async def redis_jobs(monkeypatch: pytest.MonkeyPatch):
+    store = MemoryStore()
+    redis = FakeQueueRedis()
+
+    async def fake_get_redis():
+        return store
+
+    async def fake_get_redis_real():
+        return redis
+
+    monkeypatch.setattr(jobs_module, "get_redis", fake_get_redis)
+    monkeypatch.setattr(jobs_module, "get_redis_real", fake_get_redis_real)
+    monkeypatch.setattr(jobs_module, "POLL_TIMEOUT_SECONDS", 0.05)
+    yield redis
+    await jobs_module.stop_job_workers()
+
+
+@pytest.mark.asyncio
+async def test_stalled_jobs_are_requeued_or_failed(redis_jobs):
+    @jobs_module.job_handler("test_stalled")
+    async def stalled(payload: dict) -> dict:
+        return {}
+
+    stale = "2000-01-01T00:00:00+00:00"
+    jobs = [await jobs_module.enqueue("test_stalled", {}, user_id="u1") for _ in range(4)]
+    for _ in jobs:
+        await jobs_module._next_job_id()
+    crashed, exhausted, finished, fresh = jobs
+    await jobs_module._save({**crashed, "status": "running", "started_at": stale, "runs": 1})
+    await jobs_module._save({**exhausted, "status": "running", "started_at": stale, "runs": 3})
+    await jobs_module._save({**finished, "status": "done"})
+    await jobs_module._save({**fresh, "status": "running", "started_at": jobs_module._now()})
+
+    assert await jobs_module.requeue_stalled_jobs() == 1
+    assert redis_jobs.lists[jobs_module.QUEUE_KEY] == [crashed["id"]]
+    assert redis_jobs.lists[jobs_module.PROCESSING_KEY] == [fresh["id"]]
+    failed = await jobs_module.get_job(exhausted["id"])
+    assert failed["status"] == "error"
+    assert failed["error"] == jobs_module.JOB_FAILED_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_jobs_interrupted_by_shutdown_go_back_to_the_queue(redis_jobs):
+    started = asyncio.Event()
+
+    @jobs_module.job_handler("test_blocking")
+    async def blocking(payload: dict) -> dict:
+        started.set()
+        await asyncio.sleep(10)
+        return {}
+
+    await jobs_module.start_job_workers(1)
+    job = await jobs_module.enqueue("test_blocking", {}, user_id="u1")
+    await asyncio.wait_for(started.wait(), 1)
+    assert redis_jobs.lists[jobs_module.PROCESSING_KEY] == [job["id"]]
+
+    await jobs_module.stop_job_workers()
+    assert redis_jobs.lists[jobs_module.PROCESSING_KEY] == []
+    assert redis_jobs.lists[jobs_module.QUEUE_KEY] == [job["id"]]
+
+
+class FakeSlotsRedis:
+    def __init__(self) -> None:
+        self.leases: dict[str, float] = {}
+
+    async def eval(self, script: str, numkeys: int, key: str, *args):
+        now = time.monotonic() * 1000
+        self.leases = {lease: expiry for lease, expiry in self.leases.items() if expiry > now}
+        if script is jobs_module._ACQUIRE_SLOT_SCRIPT:
+            limit, lease_id, lease_ms = args
+            if len(self.leases) >= limit:
+                return 0
+            self.leases[lease_id] = now + lease_ms
+            return 1
+        lease_id, lease_ms = args
+        if lease_id in self.leases:
+            self.leases[lease_id] = now + lease_ms
+            return 1
+        return 0
+
+    async def zrem(self, key: str, lease_id: str) -> int:
+        return 1 if self.leases.pop(lease_id, None) is not None else 0
+
+
+@pytest.mark.asyncio
+async def test_llm_slots_are_shared_across_workers(monkeypatch: pytest.MonkeyPatch):
+    redis = FakeSlotsRedis()
+
+    async def fake_get_redis_real():
+        return redis
+
+    monkeypatch.setattr(jobs_module, "get_redis_real", fake_get_redis_real)
+    monkeypatch.setattr(jobs_module, "LLM_SLOT_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(jobs_module, "_llm_semaphore", None)
+    monkeypatch.setattr(get_settings(), "LLM_MAX_CONCURRENCY", 2)
+    # Another worker holds one slot; an expired lease from a dead worker is ignored.
+    redis.leases = {"other-worker": float("inf"), "dead-worker": 0}
+    inside = 0
+    release = asyncio.Event()
+
+    async def call() -> None:
+        nonlocal inside
+        async with jobs_module.llm_slot():
+            inside += 1
+            await release.wait()
+
+    calls = asyncio.gather(call(), call())
+    await asyncio.sleep(0.05)
+    assert inside == 1
+    redis.leases.pop("other-worker")
+    await asyncio.sleep(0.05)
+    assert inside == 2
+
+    release.set()
+    await calls
+    assert redis.leases == {}
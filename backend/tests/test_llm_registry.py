@@ -0,0 +1,87 @@
+import pytest
+
+import app.core.config as config_module
+from app.core.metrics import counter_stats, latency_stats, reset_metrics
+from app.integrations import llm_registry
+from app.integrations.hint_chain import generate_hint
+from fake_llm import FakeLLMServer
+
+
+@pytest.fixture
+def fake_groq(monkeypatch: pytest.MonkeyPatch):
+    settings = config_module.get_settings()
+    with FakeLLMServer(reply="- Think about the loop bounds.") as server:
+        monkeypatch.setattr(settings, "GROQ_API_BASE", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        reset_metrics()
+        yield server
+
+
+@pytest.fixture(autouse=True)
+async def close_clients():
+    yield
+    await llm_registry.close_llm_clients()
+
+
+def _hint_payload() -> dict:
+    return {
+        "question_type": "mcq",
+        "question_prompt": "What does range(3) yield?",
+        "choices_text": "A) 0,1,2\nB) 1,2,3",
+        "user_answer": "",
+        "level": 1,
+    }
+
+
+async def test_chain_and_connection_are_reused(fake_groq: FakeLLMServer):
+    first = await generate_hint(_hint_payload())
+    second = await generate_hint(_hint_payload())
+
+    assert first == second == "- Think about the loop bounds."
+    assert len(fake_groq.requests) == 2
+    # Same keep-alive connection for both calls.
+    assert len(set(fake_groq.client_ports)) == 1
+    counters = counter_stats()
+    assert counters["llm_registry.builds"] == 1
+    assert counters["llm.hint.calls"] == 2
+    assert counters["llm.hint.input_tokens"] == 22
+    assert counters["llm.hint.output_tokens"] == 12
+    assert latency_stats()["llm.hint"]["count"] == 2
+    assert llm_registry.llm_registry_stats() == {
+        "chains": ["hint"],
+        "http_clients": ["groq"],
+    }
+
+
+async def test_settings_change_rebuilds_chain(
+    fake_groq: FakeLLMServer, monkeypatch: pytest.MonkeyPatch
+):
+    settings = config_module.get_settings()
+    default_max_tokens = settings.GROQ_HINT_MAX_TOKENS
+    await generate_hint(_hint_payload())
+    monkeypatch.setattr(settings, "GROQ_HINT_MAX_TOKENS", 64)
+    await generate_hint(_hint_payload())
+
+    assert counter_stats()["llm_registry.builds"] == 2
+    assert [request["max_tokens"] for request in fake_groq.requests] == [
+        default_max_tokens,
+        64,
+    ]
+    assert llm_registry.llm_registry_stats()["chains"] == ["hint"]
+
+
+async def test_streaming_counts_tokens(fake_groq: FakeLLMServer):
+    chain = llm_registry.get_chain(
+        "hint",
+        system_prompt="sys",
+        human_prompt="{question_prompt}",
+        provider="groq",
+        model="fake",
+        temperature=0.0,
+        max_tokens=32,
+    )
+    chunks = [chunk async for chunk in chain.astream({"question_prompt": "q"})]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == "- Think about the loop bounds."
+    assert counter_stats()["llm.hint.output_tokens"] == 6
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.metrics import counter_stats, latency_stats, reset_metrics
+from app.services.password_hashing import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def hasher():
+    reset_metrics()
+    pool = PasswordHasher(workers=1, max_queue=1)
+    yield pool
+    pool.shutdown()
+
+
+async def test_hashing_does_not_block_the_event_loop(hasher: PasswordHasher):
+    ticks = 0
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    password_hash = await hasher.hash("correct horse")
+    done.set()
+    await task
+
+    assert ticks > 5
+    assert await hasher.verify("correct horse", password_hash) is True
+    assert await hasher.verify("wrong horse", password_hash) is False
+    assert latency_stats()["passwords.verify"]["count"] == 2
+
+
+async def test_calls_beyond_the_queue_limit_are_rejected(hasher: PasswordHasher):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    running = asyncio.create_task(hasher._submit("hash", blocking))
+    queued = asyncio.create_task(hasher._submit("hash", blocking))
+    await asyncio.to_thread(started.wait, 5)
+    await asyncio.sleep(0)
+
+    assert hasher.stats() == {"workers": 1, "max_queue": 1, "running": 1, "queued": 1}
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("overflow")
+    assert counter_stats()["passwords.rejected"] == 1
+
+    release.set()
+    assert await running == "done"
+    assert await queued == "done"
+    assert hasher.stats()["queued"] == 0
+
+
+async def test_cancelled_callers_keep_their_slot_until_the_work_ends(hasher: PasswordHasher):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    running = asyncio.create_task(hasher._submit("hash", blocking))
+    queued = asyncio.create_task(hasher._submit("hash", blocking))
+    await asyncio.to_thread(started.wait, 5)
+    running.cancel()
+    queued.cancel()
+    await asyncio.gather(running, queued, return_exceptions=True)
+
+    # The queued call was dropped; the running one still holds its slot.
+    assert hasher.stats() == {"workers": 1, "max_queue": 1, "running": 1, "queued": 0}
+    follow_up = asyncio.create_task(hasher._submit("hash", lambda: "next"))
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("overflow")
+
+    release.set()
+    assert await follow_up == "next"
+    assert hasher.stats()["queued"] == 0
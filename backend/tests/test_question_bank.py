@@ -0,0 +1,94 @@
+from uuid import uuid4
+
+import pytest
+
+from app.db import session as db_session
+from app.services import question_bank as question_bank_module
+from app.services.question_bank import AnswerKeyCache, QuestionBankIndex
+
+
+def build_index(entries: list[tuple[str, str, str]]) -> tuple[QuestionBankIndex, list]:
+    index = QuestionBankIndex()
+    index._loaded_at = 0.0
+    ids = []
+    for topic, difficulty, qtype in entries:
+        question_id = uuid4()
+        index.add(question_id, topic, difficulty, qtype)
+        ids.append(question_id)
+    return index, ids
+
+
+def test_sample_respects_filters():
+    index, ids = build_index(
+        [
+            ("python_core", "junior", "mcq"),
+            ("python_core", "junior", "code_output"),
+            ("big_o", "junior", "mcq"),
+            ("big_o", "middle", "mcq"),
+        ]
+    )
+
+    assert index.count(topics=["python_core"], difficulty="junior") == 2
+    picked = index.sample(5, topics=["python_core", "big_o"], difficulty="junior")
+    assert sorted(picked) == sorted(ids[:3])
+    assert index.sample(1, topics=["big_o"], difficulty="middle") == [ids[3]]
+
+
+def test_remove_keeps_positions_consistent():
+    index, ids = build_index([("python_core", "junior", "mcq")] * 4)
+
+    assert index.remove(ids[0]) is True
+    assert index.remove(ids[0]) is False
+    assert index.remove(ids[2]) is True
+
+    assert sorted(index.sample(10)) == sorted([ids[1], ids[3]])
+    assert len(index) == 2
+
+
+class FakeResult:
+    def __init__(self, rows) -> None:
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return FakeResult(self.rows)
+
+
+async def test_answer_keys_batch_fill_misses_once():
+    cached_id, missing_id = uuid4(), uuid4()
+    keys = AnswerKeyCache()
+    keys.set(cached_id, " A\r\n")
+    session = FakeSession([(missing_id, "print(1)\r\n")])
+
+    found = await keys.get_many(session, [cached_id, missing_id])
+    assert found == {cached_id: "A", missing_id: "print(1)"}
+    assert session.queries == 1
+
+    found = await keys.get_many(session, [missing_id])
+    assert found == {missing_id: "print(1)"}
+    assert session.queries == 1
+
+    keys.discard(missing_id)
+    await keys.get_many(session, [missing_id])
+    assert session.queries == 2
+
+
+async def test_startup_load_failure_falls_back_to_lazy_loading(monkeypatch: pytest.MonkeyPatch):
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    index = QuestionBankIndex()
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", broken_session)
+    monkeypatch.setattr(question_bank_module, "question_bank", index)
+
+    assert await question_bank_module.load_question_bank() == 0
+    assert index.loaded is False
@@ -0,0 +1,220 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+import app.core.config as config_module
+from app.integrations import question_candidates_chain
+from app.integrations.question_candidates_chain import (
+    CandidateParseError,
+    CandidateStreamParser,
+    generate_question_candidates_items,
+    parse_candidates_json,
+)
+
+
+def _items(count: int) -> str:
+    return json.dumps(
+        [
+            {"topic": "python_core", "difficulty": "junior", "type": "mcq", "prompt": str(i)}
+            for i in range(count)
+        ]
+    )
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch: pytest.MonkeyPatch):
+    settings = config_module.get_settings()
+    monkeypatch.setattr(settings, "GEMINI_QC_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "GEMINI_QC_MAX_RETRIES", 2)
+
+
+async def test_batches_run_concurrently_and_split_on_parse_failure(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    in_flight = 0
+    peak = 0
+    asks: list[int] = []
+    failed_once = False
+
+    async def fake_stream(payload: dict):
+        nonlocal in_flight, peak, failed_once
+        asks.append(payload["count"])
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if payload["count"] == 10 and not failed_once:
+            failed_once = True
+            yield "not json"
+            return
+        yield _items(payload["count"])
+
+    monkeypatch.setattr(question_candidates_chain, "stream_question_candidates", fake_stream)
+
+    delivered: list[int] = []
+
+    async def on_batch(items: list) -> None:
+        delivered.append(len(items))
+
+    items = await generate_question_candidates_items(
+        {"count": 30, "topic": "python_core", "difficulty": "junior"},
+        batch_size=10,
+        fanout=3,
+        on_batch=on_batch,
+    )
+
+    assert len(items) == 30
+    assert sum(delivered) == 30
+    assert peak == 3
+    # Only the failed batch was split; the other two finished untouched.
+    assert sorted(asks) == [5, 5, 10, 10, 10]
+
+
+async def test_exhausted_retries_raise_after_other_batches(monkeypatch: pytest.MonkeyPatch):
+    async def fake_stream(payload: dict):
+        if payload["count"] <= 5:
+            yield "still not json"
+            return
+        yield _items(payload["count"])
+
+    monkeypatch.setattr(question_candidates_chain, "stream_question_candidates", fake_stream)
+
+    delivered: list[int] = []
+
+    async def on_batch(items: list) -> None:
+        delivered.append(len(items))
+
+    with pytest.raises(CandidateParseError) as exc_info:
+        await generate_question_candidates_items(
+            {"count": 10, "topic": "python_core", "difficulty": "junior"},
+            batch_size=6,
+            on_batch=on_batch,
+        )
+
+    assert exc_info.value.raw_output == "still not json"
+    assert sum(delivered) == 6
+
+
+async def test_persistence_errors_are_not_retried(monkeypatch: pytest.MonkeyPatch):
+    asks: list[int] = []
+
+    async def fake_stream(payload: dict):
+        asks.append(payload["count"])
+        yield _items(payload["count"])
+
+    monkeypatch.setattr(question_candidates_chain, "stream_question_candidates", fake_stream)
+
+    async def on_batch(items: list) -> None:
+        raise RuntimeError("database is down")
+
+    with pytest.raises(RuntimeError, match="database is down"):
+        await generate_question_candidates_items(
+            {"count": 5, "topic": "python_core", "difficulty": "junior"},
+            batch_size=5,
+            on_batch=on_batch,
+        )
+
+    assert asks == [5]
+
+
+async def test_llm_slot_is_released_before_persistence_finishes(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def fake_stream(payload: dict):
+        yield _items(payload["count"])
+
+    slot_released = asyncio.Event()
+
+    @contextlib.asynccontextmanager
+    async def fake_llm_slot():
+        yield
+        slot_released.set()
+
+    monkeypatch.setattr(question_candidates_chain, "stream_question_candidates", fake_stream)
+    monkeypatch.setattr(question_candidates_chain, "llm_slot", fake_llm_slot)
+
+    async def on_batch(items: list) -> None:
+        # A slow database must not keep the LLM slot busy.
+        await slot_released.wait()
+
+    items = await asyncio.wait_for(
+        generate_question_candidates_items(
+            {"count": 10, "topic": "python_core", "difficulty": "junior"},
+            batch_size=10,
+            on_batch=on_batch,
+        ),
+        timeout=5,
+    )
+    assert len(items) == 10
+
+
+async def test_truncated_stream_keeps_items_and_asks_for_the_rest(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    asks: list[int] = []
+
+    async def fake_stream(payload: dict):
+        asks.append(payload["count"])
+        raw = _items(payload["count"])
+        if len(asks) == 1:
+            raw = raw[: len(raw) * 2 // 3]
+        for start in range(0, len(raw), 7):
+            yield raw[start : start + 7]
+
+    monkeypatch.setattr(question_candidates_chain, "stream_question_candidates", fake_stream)
+
+    items = await generate_question_candidates_items(
+        {"count": 9, "topic": "python_core", "difficulty": "junior"}, batch_size=9
+    )
+
+    assert len(items) == 9
+    assert len(asks) == 2
+    assert asks[0] == 9
+    assert 0 < asks[1] < 9
+    assert [item["prompt"] for item in items[: 9 - asks[1]]] == [
+        str(i) for i in range(9 - asks[1])
+    ]
+
+
+def test_stream_parser_yields_objects_as_they_close():
+    raw = (
+        '```json\nHere are [2] questions:\n[{"prompt": "a [b] {c}", "n": 1},'
+        ' {"prompt": "line\nbreak \\" quote", "choices": [{"key": "A"}]},'
+        ' {"prompt": "trunc'
+    )
+    parser = CandidateStreamParser()
+    seen = []
+    for start in range(0, len(raw), 3):
+        seen.append(parser.feed(raw[start : start + 3]))
+
+    items = [item for batch in seen for item in batch]
+    assert items == [
+        {"prompt": "a [b] {c}", "n": 1},
+        {"prompt": "line\nbreak \" quote", "choices": [{"key": "A"}]},
+    ]
+    # The first object is emitted before the second one has been fed.
+    first_index = next(index for index, batch in enumerate(seen) if batch)
+    assert first_index * 3 < raw.index("line")
+    assert parser.truncated is True
+    assert parse_candidates_json(raw) == items
+
+
+def test_parse_candidates_json_wrapper_and_errors():
+    assert parse_candidates_json('{"questions": [{"prompt": "x"}]}') == [{"prompt": "x"}]
+    assert parse_candidates_json("[]") == []
+    assert parse_candidates_json('{"items": [ ]}') == []
+    assert parse_candidates_json("Here are [20] questions: []") == []
+    for raw in ("no json here", "[20] questions", '[{"prompt": "trunc'):
+        with pytest.raises(ValueError):
+            parse_candidates_json(raw)
+
+
+def test_stream_parser_keeps_a_bounded_raw_tail():
+    parser = CandidateStreamParser()
+    for _ in range(1000):
+        parser.feed("x" * 100)
+    parser.feed("end")
+    assert len(parser.raw_output) == question_candidates_chain._RAW_TAIL_CHARS
+    assert parser.raw_output.endswith("xend")
@@ -1,9 +1,21 @@
 import pytest
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.db.base import Base
+from app.models.question import Question
 from app.models.question_candidate import QuestionCandidate
-from app.services.question_candidates_service import validate_candidate
+from app.services.question_bank import answer_keys
+from app.services.question_candidates_service import (
+    _simhash64,
+    create_candidates_from_items,
+    publish_candidates_batch,
+    _simhash64_many,
+    _stable_string,
+    validate_candidate,
+    validate_candidates_batch,
+)
+from factories import create_question
 
 
 @pytest.fixture()
@@ -153,3 +165,216 @@ async def test_code_output_timeout(async_session):
     updated_timeout = await validate_candidate(async_session, candidate_timeout)
     assert updated_timeout.status == "failed"
     assert updated_timeout.validation_report_json["code_output"]["timeout"] is True
+
+
+@pytest.mark.asyncio
+async def test_validate_batch_matches_sequential(async_session):
+    mcq = {
+        "topic": "python_core",
+        "difficulty": "junior",
+        "type": "mcq",
+        "prompt": "What is 2+2?",
+        "choices": [{"key": "A", "text": "4"}],
+        "answer": "A",
+    }
+    code_pass = {
+        "topic": "python_core",
+        "difficulty": "junior",
+        "type": "code_output",
+        "prompt": "Output?",
+        "code": "print(1 + 1)",
+        "expected_output": "2",
+    }
+    code_fail = {**code_pass, "expected_output": "3"}
+    payloads = [mcq, mcq, code_pass, code_fail, {"prompt": "broken"}]
+    candidates = []
+    for payload in payloads:
+        candidate = QuestionCandidate(
+            topic="python_core",
+            difficulty="junior",
+            type=payload.get("type", "mcq"),
+            payload_json=payload,
+            status="generated",
+        )
+        async_session.add(candidate)
+        await async_session.commit()
+        candidates.append(candidate)
+
+    items, timings = await validate_candidates_batch(async_session, 10)
+
+    assert [item.id for item in items] == [item.id for item in candidates]
+    assert [item.status for item in items] == [
+        "validated",
+        "failed",
+        "validated",
+        "failed",
+        "failed",
+    ]
+    assert items[1].validation_report_json["dedupe"] == {
+        "ok": False,
+        "reason": "duplicate_candidate",
+        "candidate_id": str(items[0].id),
+    }
+    assert items[3].validation_report_json["code_output"]["ok"] is False
+    assert items[4].validation_report_json["schema"]["ok"] is False
+    assert set(timings) >= {"dedupe_prefetch_ms", "code_checks_ms", "write_ms", "total_ms"}
+
+    await async_session.refresh(items[2])
+    assert items[2].status == "validated"
+    assert items[2].simhash is not None
+
+
+def test_simhash64_many_matches_scalar():
+    texts = [
+        "",
+        "   ",
+        "single",
+        "repeated repeated repeated tokens",
+        _stable_string(
+            {
+                "topic": "python_core",
+                "difficulty": "junior",
+                "type": "code_output",
+                "prompt": "Output?",
+                "code": "print(1 + 1)",
+                "expected_output": "2",
+            }
+        ),
+    ] + [f"question {index} about topic {index % 7} unicode é {index * 31}" for index in range(50)]
+
+    assert _simhash64_many(texts) == [_simhash64(text) for text in texts]
+    assert _simhash64_many([]) == []
+
+
+@pytest.mark.asyncio
+async def test_create_candidates_uses_one_insert(async_session):
+    statements = []
+    engine = async_session.bind.sync_engine
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    items = [
+        {"topic": "python_core", "difficulty": "junior", "type": "mcq", "prompt": str(index)}
+        for index in range(30)
+    ]
+    items.append({"prompt": "missing fields"})
+    items.append("not a dict")
+    try:
+        created_ids, failed = await create_candidates_from_items(
+            session=async_session,
+            items=items,
+            fallback_topic="python_core",
+            fallback_difficulty="junior",
+            fallback_type=None,
+            prompt_version="v1",
+            source_model="stub",
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert len(created_ids) == 30
+    assert failed == 2
+    assert len([sql for sql in statements if sql.lstrip().upper().startswith("INSERT")]) == 1
+    rows = (await async_session.execute(select(QuestionCandidate))).scalars().all()
+    assert {str(row.id) for row in rows if row.status == "generated"} == set(created_ids)
+    assert [row.type for row in rows if row.status == "failed"] == ["unknown"]
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_links_duplicates_and_inserts_once(async_session):
+    def mcq(prompt: str) -> dict:
+        return {
+            "topic": "python_core",
+            "difficulty": "junior",
+            "type": "mcq",
+            "prompt": prompt,
+            "choices": [{"key": "A", "text": "4"}, {"key": "B", "text": "5"}],
+            "answer": "A",
+        }
+
+    candidates = [
+        QuestionCandidate(
+            topic="python_core",
+            difficulty="junior",
+            type="mcq",
+            payload_json=payload,
+            status=status,
+        )
+        for payload, status in [
+            (mcq("first"), "approved"),
+            (mcq("first"), "approved"),
+            (mcq("second"), "validated"),
+            ({"prompt": "broken"}, "approved"),
+            (mcq("third"), "generated"),
+        ]
+    ]
+    async_session.add_all(candidates)
+    await async_session.commit()
+
+    statements = []
+    engine = async_session.bind.sync_engine
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        results = await publish_candidates_batch(
+            async_session, [item.id for item in candidates], approve=True
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert [item["reason"] for item in results] == [None, None, None, "schema", "invalid_status"]
+    assert results[0]["created"] is True
+    assert results[1]["created"] is False
+    assert results[1]["question_id"] == results[0]["question_id"]
+    assert statements.count("INSERT") == 1
+    assert statements.count("UPDATE") == 1
+
+    questions = (await async_session.execute(select(Question))).scalars().all()
+    assert sorted(question.prompt for question in questions) == ["first", "second"]
+    assert [item.status for item in candidates] == [
+        "published",
+        "published",
+        "published",
+        "failed",
+        "generated",
+    ]
+    assert candidates[2].approved_at is not None
+
+    again = await publish_candidates_batch(async_session, [candidates[0].id])
+    assert again[0]["reason"] == "already_published"
+    assert again[0]["question_id"] == results[0]["question_id"]
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_keeps_answer_key_of_linked_question(async_session):
+    existing = await create_question(async_session, prompt="linked", correct_answer="B")
+    answer_keys.set(existing.id, existing.correct_answer)
+    candidate = QuestionCandidate(
+        topic="python_core",
+        difficulty="junior",
+        type="mcq",
+        payload_json={
+            "topic": "python_core",
+            "difficulty": "junior",
+            "type": "mcq",
+            "prompt": "linked",
+            "choices": [{"key": "A", "text": "4"}, {"key": "B", "text": "5"}],
+            "answer": "A",
+        },
+        status="approved",
+    )
+    async_session.add(candidate)
+    await async_session.commit()
+
+    try:
+        results = await publish_candidates_batch(async_session, [candidate.id])
+        assert results[0]["created"] is False
+        assert results[0]["question_id"] == str(existing.id)
+        assert await answer_keys.get_many(async_session, [existing.id]) == {existing.id: "B"}
+    finally:
+        answer_keys.discard(existing.id)
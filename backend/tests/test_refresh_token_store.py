@@ -0,0 +1,229 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import session as db_session
+from app.db.base import Base
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services import refresh_token_store
+
+
+class FakeListRedis:
+    """Lists, plain values and sets, with the store's two scripts in Python."""
+
+    def __init__(self) -> None:
+        self.lists: dict[str, list[str]] = {}
+        self.values: dict[str, str] = {}
+        self.sets: dict[str, set[str]] = {}
+
+    async def eval(self, script: str, numkeys: int, *args: str):
+        queue, processing, alive, workers = args[:4]
+        if script == refresh_token_store._TAKE_SCRIPT:
+            limit, _, worker_id = args[4:]
+            self.values[alive] = "1"
+            self.sets.setdefault(workers, set()).add(worker_id)
+            if self.lists.get(processing):
+                return list(self.lists[processing])
+            items = self.lists.get(queue) or []
+            taken, self.lists[queue] = items[: int(limit)], items[int(limit) :]
+            self.lists.setdefault(processing, []).extend(taken)
+            return taken
+        if alive in self.values:
+            return -1
+        held = self.lists.pop(processing, [])
+        self.lists[queue] = held + self.lists.get(queue, [])
+        self.sets.get(workers, set()).discard(args[4])
+        return len(held)
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            removed += self.lists.pop(key, None) is not None
+            removed += self.values.pop(key, None) is not None
+        return removed
+
+    async def smembers(self, key: str) -> set[str]:
+        return set(self.sets.get(key, set()))
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        self.values[key] = value
+        return True
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [self.values.get(key) for key in keys]
+
+    async def rpush(self, key: str, *values: str) -> int:
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+
+
+@pytest_asyncio.fixture
+async def store(monkeypatch: pytest.MonkeyPatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: Base.metadata.create_all(
+                sync_conn, tables=[User.__table__, RefreshToken.__table__]
+            )
+        )
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    redis = FakeListRedis()
+
+    async def fake_get_redis_real():
+        return redis
+
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(refresh_token_store, "get_redis_real", fake_get_redis_real)
+    user_id = uuid.uuid4()
+    async with factory() as session:
+        session.add(User(id=user_id, email="a@example.com"))
+        await session.commit()
+    yield redis, factory, user_id
+    await engine.dispose()
+
+
+def _create_op(user_id, token_hash: str, expires_at: datetime) -> str:
+    return json.dumps(
+        {
+            "op": "create",
+            "user_id": str(user_id),
+            "token_hash": token_hash,
+            "expires_at": expires_at.isoformat(),
+        }
+    )
+
+
+async def _revoke(redis, token_hash: str) -> str:
+    # What claim_token and queue_revoke leave behind besides the queued op.
+    await redis.set(refresh_token_store.used_key(token_hash), "1")
+    return json.dumps({"op": "revoke", "token_hash": token_hash})
+
+
+async def _rows(factory) -> dict[str, bool]:
+    async with factory() as session:
+        result = await session.execute(select(RefreshToken.token_hash, RefreshToken.revoked))
+        return dict(result.all())
+
+
+async def test_flush_writes_batches_and_retries_failed_ones(store, monkeypatch):
+    redis, factory, user_id = store
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    ops = [
+        _create_op(user_id, "a", expires_at),
+        _create_op(user_id, "b", expires_at),
+        await _revoke(redis, "a"),
+    ]
+    await redis.rpush(refresh_token_store.WRITES_KEY, *ops)
+
+    assert await refresh_token_store.flush_pending_writes() == 3
+    assert await _rows(factory) == {"a": True, "b": False}
+
+    later = [_create_op(user_id, "c", expires_at), await _revoke(redis, "c")]
+    await redis.rpush(refresh_token_store.WRITES_KEY, *later)
+
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", broken_session)
+    with pytest.raises(RuntimeError):
+        await refresh_token_store.flush_pending_writes(limit=1)
+    processing_key, _ = refresh_token_store._worker_keys(refresh_token_store._worker_id)
+    # The failed op is held by this worker and retried before anything new.
+    assert redis.lists[processing_key] == later[:1]
+    assert redis.lists[refresh_token_store.WRITES_KEY] == later[1:]
+
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", factory)
+    assert await refresh_token_store.flush_pending_writes(limit=1) == 1
+    assert not redis.lists.get(processing_key)
+    assert await _rows(factory) == {"a": True, "b": False, "c": True}
+
+
+async def test_batches_of_dead_workers_are_requeued_once(store):
+    redis, factory, user_id = store
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    dead_processing, _ = refresh_token_store._worker_keys("dead")
+    live_processing, live_alive = refresh_token_store._worker_keys("live")
+    redis.sets[refresh_token_store.WORKERS_KEY] = {"dead", "live"}
+    redis.lists[dead_processing] = [_create_op(user_id, "a", expires_at)]
+    redis.lists[live_processing] = [_create_op(user_id, "b", expires_at)]
+    redis.values[live_alive] = "1"
+    await redis.rpush(refresh_token_store.WRITES_KEY, _create_op(user_id, "c", expires_at))
+
+    assert await refresh_token_store.recover_stalled_writes() == 1
+    assert redis.lists[refresh_token_store.WRITES_KEY][0] == _create_op(user_id, "a", expires_at)
+    assert redis.sets[refresh_token_store.WORKERS_KEY] == {"live"}
+    assert redis.lists[live_processing] == [_create_op(user_id, "b", expires_at)]
+
+    # The dead worker had already committed its batch before dying.
+    async with factory() as session:
+        session.add(
+            RefreshToken(user_id=user_id, token_hash="a", expires_at=expires_at, revoked=False)
+        )
+        await session.commit()
+    assert await refresh_token_store.flush_pending_writes() == 2
+    async with factory() as session:
+        hashes = (await session.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert sorted(hashes) == ["a", "c"]
+
+
+async def test_revocation_flushed_before_its_insert_still_applies(store):
+    redis, factory, user_id = store
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    # Another worker popped the create and commits it after this revocation.
+    await redis.rpush(refresh_token_store.WRITES_KEY, await _revoke(redis, "a"))
+    assert await refresh_token_store.flush_pending_writes() == 1
+    assert await _rows(factory) == {}
+
+    await redis.rpush(refresh_token_store.WRITES_KEY, _create_op(user_id, "a", expires_at))
+    assert await refresh_token_store.flush_pending_writes() == 1
+    assert await _rows(factory) == {"a": True}
+
+
+async def test_malformed_writes_are_dropped_one_by_one(store):
+    redis, factory, user_id = store
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    ops = [
+        "not json",
+        json.dumps(["create"]),
+        _create_op("not-a-uuid", "bad", expires_at),
+        json.dumps({"op": "create", "user_id": str(user_id), "token_hash": "x"}),
+        _create_op(uuid.uuid4(), "unknown-user", expires_at),
+        _create_op(user_id, "good", expires_at),
+    ]
+    await redis.rpush(refresh_token_store.WRITES_KEY, *ops)
+
+    assert await refresh_token_store.flush_pending_writes() == len(ops)
+    assert await _rows(factory) == {"good": False}
+    assert not redis.lists[refresh_token_store.WRITES_KEY]
+
+
+async def test_compaction_deletes_only_expired_rows(store, monkeypatch):
+    _, factory, user_id = store
+    monkeypatch.setattr(refresh_token_store, "COMPACT_CHUNK_ROWS", 2)
+    now = datetime.now(timezone.utc)
+    async with factory() as session:
+        session.add_all(
+            [
+                RefreshToken(
+                    user_id=user_id,
+                    token_hash=f"old-{index}",
+                    expires_at=now - timedelta(days=1),
+                    revoked=index % 2 == 0,
+                )
+                for index in range(5)
+            ]
+            + [RefreshToken(user_id=user_id, token_hash="live", expires_at=now + timedelta(days=1))]
+        )
+        await session.commit()
+
+    assert await refresh_token_store.compact_expired_tokens() == 5
+    async with factory() as session:
+        remaining = (await session.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert remaining == ["live"]
@@ -0,0 +1,63 @@
+import random
+import uuid
+
+import pytest
+
+import app.core.config as config_module
+from app.services import simhash_index
+from app.services.simhash_index import SimhashLSHIndex
+
+
+def _flip(value: int, bits: list[int]) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_query_finds_everything_within_distance():
+    rng = random.Random(7)
+    index = SimhashLSHIndex(max_distance=3)
+    base = rng.getrandbits(64)
+    expected = {}
+    for distance in range(5):
+        item_id = uuid.uuid4()
+        index.add("question", item_id, f"{_flip(base, rng.sample(range(64), distance)):016x}")
+        expected[item_id] = distance
+    for _ in range(2000):
+        index.add("candidate", uuid.uuid4(), rng.getrandbits(64))
+
+    matches = index.query(f"{base:016x}")
+
+    assert [(kind, item_id, distance) for kind, item_id, distance in matches] == [
+        ("question", item_id, distance)
+        for item_id, distance in expected.items()
+        if distance <= 3
+    ]
+    assert [item[2] for item in index.query(base, max_distance=1)] == [0, 1]
+
+
+def test_remove_and_exclude():
+    index = SimhashLSHIndex(max_distance=2)
+    candidate_id = uuid.uuid4()
+    question_id = uuid.uuid4()
+    index.add("candidate", candidate_id, "00000000000000ff")
+    index.add("question", question_id, "00000000000000fe")
+
+    assert index.query("00000000000000ff", exclude=[("candidate", candidate_id)]) == [
+        ("question", question_id, 1)
+    ]
+    assert index.remove("question", question_id) is True
+    assert index.remove("question", question_id) is False
+    assert index.query("00000000000000fe") == [("candidate", candidate_id, 1)]
+    assert len(index) == 1
+    with pytest.raises(ValueError):
+        index.query("00000000000000fe", max_distance=3)
+
+
+def test_shared_index_is_created_on_first_use(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(simhash_index, "_near_duplicates", None)
+    monkeypatch.setattr(config_module.get_settings(), "SIMHASH_NEAR_DUP_DISTANCE", 5)
+
+    index = simhash_index.get_near_duplicates()
+    assert index.max_distance == 5
+    assert simhash_index.get_near_duplicates() is index
@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.api.v1.endpoints import attempts as attempts_module
 from app.db.session import get_session
+from app.services import attempt_service
 from app.services.auth_service import get_current_user
 
 
@@ -54,25 +55,65 @@ class FakeAttemptRepo:
             return None
         return self.attempt
 
-    async def update_attempt(self, attempt: FakeAttempt, data: dict):
+    async def update_attempt(self, attempt: FakeAttempt, data: dict, commit: bool = True):
         for key, value in data.items():
             setattr(attempt, key, value)
         return attempt
 
 
 class FakeAnswerRepo:
-    async def replace_for_attempt(self, attempt_id: UUID, user_id: UUID, answers: list[dict]):
+    async def replace_for_attempt(
+        self,
+        attempt_id: UUID,
+        user_id: UUID,
+        answers: list[dict],
+        commit: bool = True,
+    ):
+        return None
+
+
+class FakeRecommendationRepo:
+    async def complete_by_attempt(self, user_id: UUID, attempt_id: UUID, commit: bool = True):
+        return False
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.commits = 0
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
         return None
 
 
-def configure_dependencies(monkeypatch: pytest.MonkeyPatch, attempt: FakeAttempt) -> None:
+class FakeRollupRepo:
+    def __init__(self) -> None:
+        self.recorded: list[FakeAttempt] = []
+
+    async def record_attempt(self, attempt: FakeAttempt, previously_counted: bool = False):
+        self.recorded.append(attempt)
+
+
+def configure_dependencies(
+    monkeypatch: pytest.MonkeyPatch, attempt: FakeAttempt
+) -> tuple[FakeRollupRepo, FakeSession]:
     fake_repo = FakeAttemptRepo(attempt)
+    fake_rollup = FakeRollupRepo()
+    fake_session = FakeSession()
     monkeypatch.setattr(attempts_module, "QuizAttemptRepository", lambda session: fake_repo)
-    monkeypatch.setattr(attempts_module, "AttemptAnswerRepository", lambda session: FakeAnswerRepo())
+    monkeypatch.setattr(attempt_service, "QuizAttemptRepository", lambda session: fake_repo)
+    monkeypatch.setattr(attempt_service, "AttemptAnswerRepository", lambda session: FakeAnswerRepo())
+    monkeypatch.setattr(
+        attempt_service, "AiRecommendationRepository", lambda session: FakeRecommendationRepo()
+    )
+    monkeypatch.setattr(attempt_service, "UserStatsRollupRepository", lambda session: fake_rollup)
 
     user = FakeUser(attempt.user_id)
     app.dependency_overrides[get_current_user] = lambda: user
-    app.dependency_overrides[get_session] = lambda: None
+    app.dependency_overrides[get_session] = lambda: fake_session
+    return fake_rollup, fake_session
 
 
 @pytest.fixture(autouse=True)
@@ -92,7 +133,7 @@ def test_submit_without_topic_uses_attempt_topic(monkeypatch: pytest.MonkeyPatch
         meta={"questions": [str(question_id)]},
     )
 
-    configure_dependencies(monkeypatch, attempt)
+    rollup, session = configure_dependencies(monkeypatch, attempt)
 
     payload = {
         "difficulty": "junior",
@@ -116,3 +157,5 @@ def test_submit_without_topic_uses_attempt_topic(monkeypatch: pytest.MonkeyPatch
     data = response.json()
     assert data["topic"] == "python_core"
     assert data["submitted_at"] is not None
+    assert rollup.recorded == [attempt]
+    assert session.commits == 1
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.user_stats_rollup import OVERALL_TOPIC, UserStatsRollup
+from app.repositories.quiz_attempt_repo import QuizAttemptRepository
+from app.repositories.user_stats_rollup_repo import UserStatsRollupRepository
+from factories import create_user
+
+
+def _day(days_ago: int) -> datetime:
+    today = datetime.now(timezone.utc).date() - timedelta(days=days_ago)
+    return datetime.combine(today, time(12), tzinfo=timezone.utc)
+
+
+async def _submit(session, user_id, created_at: datetime, correct: int, topic="python_core"):
+    attempt = await QuizAttemptRepository(session).create_attempt(
+        {
+            "user_id": user_id,
+            "topic": topic,
+            "difficulty": "junior",
+            "mode": "practice",
+            "correct_count": correct,
+            "total_count": 4,
+            "answers": [],
+            "created_at": created_at,
+            "submitted_at": created_at,
+        },
+        commit=False,
+    )
+    await UserStatsRollupRepository(session).record_attempt(attempt)
+    await session.commit()
+    return attempt
+
+
+async def _rows(session, user_id) -> dict[str, tuple]:
+    result = await session.execute(
+        select(UserStatsRollup)
+        .where(UserStatsRollup.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return {
+        row.topic: (
+            row.attempts,
+            row.score_sum,
+            row.best_score,
+            row.last_attempt_date,
+            row.current_streak,
+            [item["id"] for item in row.recent_attempts or []],
+        )
+        for row in result.scalars()
+    }
+
+
+@pytest.mark.asyncio
+async def test_deltas_match_a_full_rebuild(db_session):
+    user = await create_user(db_session, email="rollup@example.com", password_hash=None)
+    await _submit(db_session, user.id, _day(2), correct=2)
+    await _submit(db_session, user.id, _day(1), correct=4, topic="sql")
+    await _submit(db_session, user.id, _day(0), correct=3)
+
+    incremental = await _rows(db_session, user.id)
+    assert incremental[OVERALL_TOPIC][:5] == (3, 225, 100, _day(0).date(), 3)
+    assert incremental["python_core"][:3] == (2, 125, 75)
+    assert incremental["sql"][:3] == (1, 100, 100)
+
+    await UserStatsRollupRepository(db_session).rebuild(user.id)
+    await db_session.commit()
+    assert await _rows(db_session, user.id) == incremental
+
+
+@pytest.mark.asyncio
+async def test_streak_resets_after_a_gap_and_ignores_same_day(db_session):
+    user = await create_user(db_session, email="streak@example.com", password_hash=None)
+    repo = UserStatsRollupRepository(db_session)
+    await _submit(db_session, user.id, _day(4), correct=1)
+    await _submit(db_session, user.id, _day(3), correct=1)
+    assert (await _rows(db_session, user.id))[OVERALL_TOPIC][4] == 2
+
+    await _submit(db_session, user.id, _day(1), correct=1)
+    await _submit(db_session, user.id, _day(1) + timedelta(hours=1), correct=1)
+    assert (await _rows(db_session, user.id))[OVERALL_TOPIC][4] == 1
+
+    await _submit(db_session, user.id, _day(0), correct=1)
+    stats = await repo.stats(user.id)
+    assert stats["current_streak_days"] == 2
+    assert stats["total_attempts"] == 5
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_and_unsubmitted_attempts_are_rebuilt(db_session):
+    user = await create_user(db_session, email="resubmit@example.com", password_hash=None)
+    first = await _submit(db_session, user.id, _day(1), correct=4)
+    second = await _submit(db_session, user.id, _day(0), correct=2)
+    attempt_repo = QuizAttemptRepository(db_session)
+    rollup_repo = UserStatsRollupRepository(db_session)
+
+    first = await attempt_repo.update_attempt(
+        first, {"correct_count": 1, "total_count": 4, "topic": "sql"}, commit=False
+    )
+    await rollup_repo.record_attempt(first, previously_counted=True)
+    await db_session.commit()
+    rows = await _rows(db_session, user.id)
+    assert rows[OVERALL_TOPIC][:3] == (2, 75, 50)
+    assert rows["sql"][:3] == (1, 25, 25)
+
+    second = await attempt_repo.update_attempt(
+        second, {"submitted_at": None, "total_count": 4}, commit=False
+    )
+    await rollup_repo.record_attempt(second, previously_counted=True)
+    await db_session.commit()
+    rows = await _rows(db_session, user.id)
+    assert rows[OVERALL_TOPIC][:5] == (1, 25, 25, _day(1).date(), 1)
+    assert "python_core" not in rows
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_submissions_are_both_counted(async_engine, db_session):
+    user = await create_user(db_session, email="race@example.com", password_hash=None)
+    factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def submit(correct: int) -> None:
+        async with factory() as session:
+            await _submit(session, user.id, _day(0), correct=correct)
+
+    await asyncio.gather(submit(4), submit(2))
+
+    rows = await _rows(db_session, user.id)
+    assert rows[OVERALL_TOPIC][:3] == (2, 150, 100)
+    assert rows["python_core"][:3] == (2, 150, 100)